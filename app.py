@@ -11,6 +11,8 @@ import history_page
 import eda_page
 import profile_page
 import atm_page  # --- NAYA: ATM Page import kiya ---
+import fraud_engine as fe
+import fraud_metrics as fm
 # Nayi Import for AI
 import bank_bot_logic as bot 
 import sentiment_engine as se 
@@ -23,6 +25,8 @@ load_dotenv()
 st.set_page_config(page_title="BOP Digital Banking", page_icon="🏦", layout="centered")
 
 dm.init_db()
+fe.warm_up()  # fraud model loads in the background, not on the first transfer
+fm.start_exporter()  # fraud_metrics.json every few seconds (+ /metrics if FRAUD_METRICS_PORT is set)
 
 if 'page' not in st.session_state:
     st.session_state.page = "Login"
@@ -1,7 +1,7 @@
 import streamlit as st
 import data_manager as dm
 import rules as val
-import fraud_engine as fe
+import fraud_service as fs
 
 def show():
     user = st.session_state.get('logged_in_user')
@@ -38,14 +38,15 @@ def show():
                 current_step = dm.get_current_step()
                 
                 # Model prediction call (Directly sending 'CASH_OUT' string for OneHotEncoder)
-                is_fraud, prob_score = fe.predict_fraud(
+                is_fraud, prob_score = fs.score(
                     step=current_step,
                     trans_type='CASH_OUT',
                     amount=amt_val,
                     oldbalanceOrg=current_bal,
                     newbalanceOrig=current_bal - amt_val,
                     oldbalanceDest=0.0, 
-                    newbalanceDest=amt_val
+                    newbalanceDest=amt_val,
+                    context=dm.get_fraud_context(user['account_no'])
                 )
 
                 if is_fraud:
@@ -0,0 +1,97 @@
+"""
+Ledger-wide fraud backfill throughput (rows/sec) by worker count.
+
+    python benchmarks/bench_backfill.py --rows 1000000 --accounts 100000 --workers 1 2 4 8
+
+Writes a synthetic JSON-lines ledger to a temp dir and runs
+fraud_backfill.run over it once per worker count (fresh output each
+time, opening balances = zero). Also checks that an interrupted run
+resumes from its checkpoint (ledger offset + saved balances, no earlier
+chunk rebuilt) and ends with the same scores and balance features.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import record_codec
+import fraud_backfill
+
+class Interrupted(Exception):
+    pass
+
+
+TYPES = [("Transfer", 0.5), ("CASH_OUT", 0.25), ("Deposit", 0.2), ("Insurance", 0.05)]
+
+
+def write_ledger(path, n, accounts, seed=7):
+    rnd = random.Random(seed)
+    t = datetime(2025, 1, 1)
+    names, weights = zip(*TYPES)
+    with open(path, "wb") as f:
+        for i in range(n):
+            t += timedelta(seconds=rnd.randint(1, 30))
+            kind = rnd.choices(names, weights)[0]
+            sender = f"BOP-{10000000 + rnd.randrange(accounts)}"
+            receiver = {"Transfer": f"BOP-{10000000 + rnd.randrange(accounts)}", "Deposit": "Self"}.get(kind, "N/A")
+            row = {"date": t.strftime("%Y-%m-%d %H:%M:%S"), "type": kind, "amount": float(rnd.randint(10, 90000)),
+                   "sender": sender, "receiver_acc": receiver, "receiver_name": "x",
+                   "status": "AI_Estimated" if kind == "Insurance" else "Success", "category": "General", "seq": i + 1}
+            f.write(record_codec.encode(row) + b"\n")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1000000)
+    ap.add_argument("--accounts", type=int, default=100000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--chunk-rows", type=int, default=fraud_backfill.CHUNK_ROWS)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = os.path.join(tmp, "transactions.txt")
+        write_ledger(ledger, args.rows, args.accounts)
+        quiet = lambda msg: None
+
+        print(f"{'workers':>8} {'rows/s':>10} {'seconds':>8}")
+        for workers in args.workers:
+            out = os.path.join(tmp, f"out-{workers}")
+            t0 = time.perf_counter()
+            fraud_backfill.run(ledger, out, workers, args.chunk_rows, opening="zero", restart=True, log=quiet)
+            elapsed = time.perf_counter() - t0
+            print(f"{workers:>8} {args.rows / elapsed:>10,.0f} {elapsed:>8.1f}")
+
+        # Resume: stop a run after half of the chunks (checkpoint after every chunk), then run again.
+        # The second run must start at the checkpoint's ledger offset with its saved balances.
+        out = os.path.join(tmp, f"out-{args.workers[0]}")
+        full = fraud_backfill.load_scores(out)
+        keep = fraud_backfill._read_checkpoint(out)["chunks_done"] // 2
+
+        def crash_after_half(msg):
+            if msg.startswith(f"chunk {keep - 1}:"):
+                raise Interrupted
+
+        try:
+            fraud_backfill.run(ledger, out, args.workers[0], args.chunk_rows, opening="zero", restart=True,
+                               log=crash_after_half, checkpoint_every=0)
+        except Interrupted:
+            pass
+        for name in os.listdir(out):   # parts past the checkpoint may or may not exist after a crash
+            if name.startswith("part-") and int(name[5:11]) >= keep:
+                os.remove(os.path.join(out, name))
+        resumed_from = []
+        t0 = time.perf_counter()
+        fraud_backfill.run(ledger, out, args.workers[0], args.chunk_rows, opening="zero",
+                           log=lambda msg: resumed_from.append(msg) if msg.startswith("resuming") else None)
+        elapsed = time.perf_counter() - t0
+        resumed = fraud_backfill.load_scores(out)
+        same = len(resumed) == len(full) and all(np.array_equal(resumed[c], full[c])
+                                                 for c in ("fraud_probability", "oldbalanceOrg", "oldbalanceDest"))
+        print(f"{resumed_from[0] if resumed_from else 'NOT RESUMED'}: rest done in {elapsed:.1f}s, "
+              f"{'identical output' if same else 'MISMATCH'}")
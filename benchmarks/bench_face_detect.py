@@ -0,0 +1,82 @@
+"""
+Face detection frames per second per backend, and downscaled vs full-resolution boxes.
+
+    python benchmarks/bench_face_detect.py --account BOP-94875595 --frames 100 --width 640 --height 480
+
+Frames are synthetic camera frames: one of the user's enrollment crops,
+resized to 60-260 px, pasted on a noisy background. "per-frame cascade" is
+what the pages used to do (load the XML, detect at full resolution). The
+DNN row needs face_detect.DNN_MODEL (FACE_DNN_MODEL) to exist.
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import face_store
+import face_detect
+
+
+def make_frames(samples, n, width, height, seed=0):
+    rnd = np.random.default_rng(seed)
+    frames, truth = [], []
+    for _ in range(n):
+        frame = cv2.GaussianBlur(rnd.integers(40, 200, (height, width), dtype=np.uint8), (0, 0), 3)
+        size = int(rnd.integers(60, min(260, height - 10)))
+        face = cv2.resize(samples[rnd.integers(len(samples))], (size, size))
+        x, y = int(rnd.integers(0, width - size)), int(rnd.integers(0, height - size))
+        frame[y:y + size, x:x + size] = face
+        frames.append(frame)
+        truth.append((x, y, size, size))
+    return frames, truth
+
+
+def iou(a, b):
+    ax1, ay1, bx1, by1 = a[0] + a[2], a[1] + a[3], b[0] + b[2], b[1] + b[3]
+    iw, ih = max(0, min(ax1, bx1) - max(a[0], b[0])), max(0, min(ay1, by1) - max(a[1], b[1]))
+    inter = iw * ih
+    return inter / float(a[2] * a[3] + b[2] * b[3] - inter)
+
+
+def per_frame_cascade(gray):
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    faces = cascade.detectMultiScale(gray, 1.3, 5)
+    return [tuple(f) for f in faces if f[2] >= 80 and f[3] >= 80]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--account", default="BOP-94875595")
+    ap.add_argument("--frames", type=int, default=100)
+    ap.add_argument("--width", type=int, default=640)
+    ap.add_argument("--height", type=int, default=480)
+    args = ap.parse_args()
+
+    frames, truth = make_frames(face_store.load_samples(args.account), args.frames, args.width, args.height)
+    big = [t[2] >= face_detect.MIN_FACE for t in truth]
+
+    runs = [("per-frame cascade", per_frame_cascade),
+            ("haar full res", lambda g: face_detect.detect_faces(g, detect_width=None, backend="haar")),
+            (f"haar @{face_detect.DETECT_WIDTH}px", lambda g: face_detect.detect_faces(g, backend="haar"))]
+    if os.path.exists(face_detect.DNN_MODEL):
+        runs.append((f"dnn @{face_detect.DETECT_WIDTH}px", lambda g: face_detect.detect_faces(g, backend="dnn")))
+    else:
+        print(f"dnn skipped: {face_detect.DNN_MODEL} not found")
+
+    print(f"{args.frames} frames {args.width}x{args.height}, {sum(big)} faces >= {face_detect.MIN_FACE}px")
+    print(f"{'backend':<20} {'FPS':>7} {'found':>6} {'small rejected':>15} {'mean IoU':>9}")
+    for label, fn in runs:
+        fn(frames[0])  # loads the shared detector
+        t0 = time.perf_counter()
+        results = [fn(g) for g in frames]
+        fps = len(frames) / (time.perf_counter() - t0)
+        hits = [max((iou(f, t) for f in faces), default=0.0) for faces, t in zip(results, truth)]
+        found = sum(h > 0.3 for h, b in zip(hits, big) if b)
+        rejected = sum(not faces for faces, b in zip(results, big) if not b)
+        mean_iou = np.mean([h for h, b in zip(hits, big) if b and h > 0.3] or [0.0])
+        print(f"{label:<20} {fps:>7.1f} {found:>3}/{sum(big):<3} {rejected:>8}/{len(big) - sum(big):<6} {mean_iou:>9.2f}")
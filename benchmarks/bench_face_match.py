@@ -0,0 +1,108 @@
+"""
+NumPy LBP templates vs cv2.face.LBPHFaceRecognizer: parity and latency.
+
+    python benchmarks/bench_face_match.py --account BOP-94875595 --face-id 101 --probes 200
+
+Parity: for the user's own samples and perturbed versions of them (noise,
+rescaling, brightness, flips) plus random images, face_match must return
+the same label and distance as the OpenCV recognizer (and so the same
+"confidence < 35" decision). Latency: one predict per probe, and the
+time to load each stored model format.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import face_store
+import face_match
+
+ACCEPT = 35
+
+
+def train_lbph(face_id, samples):
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.train(list(samples), np.full(len(samples), int(face_id), dtype=np.int32))
+    return recognizer
+
+
+def make_probes(samples, n, seed=0):
+    rnd = np.random.default_rng(seed)
+    probes = list(samples)
+    while len(probes) < n:
+        s = samples[rnd.integers(len(samples))]
+        kind = rnd.integers(5)
+        if kind == 0:
+            p = np.clip(s.astype(np.int16) + rnd.integers(-25, 25, s.shape), 0, 255).astype(np.uint8)
+        elif kind == 1:
+            scale = rnd.uniform(0.6, 1.4)
+            p = cv2.resize(s, (max(16, int(s.shape[1] * scale)), max(16, int(s.shape[0] * scale))))
+        elif kind == 2:
+            p = cv2.convertScaleAbs(s, alpha=rnd.uniform(0.7, 1.3), beta=rnd.uniform(-30, 30))
+        elif kind == 3:
+            p = cv2.flip(s, 1)
+        else:
+            p = rnd.integers(0, 256, (rnd.integers(80, 300), rnd.integers(80, 300)), dtype=np.uint8)
+        probes.append(p)
+    return probes[:n]
+
+
+def per_probe(fn, probes):
+    samples = []
+    for p in probes:
+        t0 = time.perf_counter()
+        fn(p)
+        samples.append(time.perf_counter() - t0)
+    return np.array(samples) * 1e3
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--account", default="BOP-94875595")
+    ap.add_argument("--face-id", type=int, default=101)
+    ap.add_argument("--probes", type=int, default=200)
+    args = ap.parse_args()
+
+    samples = face_store.load_samples(args.account)
+    recognizer = train_lbph(args.face_id, samples)
+    templates = face_match.Templates.from_samples(samples, args.face_id)
+    probes = make_probes(samples, args.probes)
+
+    same_hist = np.array_equal(np.vstack([h.ravel() for h in recognizer.getHistograms()]), templates.columns.T)
+    label_ok = dist_err = decision_ok = 0
+    for p in probes:
+        (l1, d1), (l2, d2) = recognizer.predict(p), templates.predict(p)
+        label_ok += l1 == l2
+        dist_err = max(dist_err, abs(d1 - d2))
+        decision_ok += (d1 < ACCEPT) == (d2 < ACCEPT)
+    accepted = sum(recognizer.predict(p)[1] < ACCEPT for p in probes)
+    print(f"parity over {len(probes)} probes ({accepted} accepted by OpenCV): histograms identical={same_hist}, "
+          f"labels {label_ok}/{len(probes)}, decisions {decision_ok}/{len(probes)}, max |distance diff| {dist_err:.2e}")
+
+    work = tempfile.mkdtemp()
+    yml, npy = os.path.join(work, "m.yml"), os.path.join(work, "m.npy")
+    recognizer.write(yml)
+    templates.save(npy)
+    t0 = time.perf_counter()
+    cv2.face.LBPHFaceRecognizer_create().read(yml)
+    yml_ms = (time.perf_counter() - t0) * 1e3
+    t0 = time.perf_counter()
+    mapped = face_match.Templates.load(npy, args.face_id)
+    npy_ms = (time.perf_counter() - t0) * 1e3
+    print(f"load: LBPH .yml {yml_ms:.1f} ms ({os.path.getsize(yml) / 2**20:.1f} MiB), "
+          f"templates .npy mmap {npy_ms:.2f} ms ({os.path.getsize(npy) / 2**20:.1f} MiB)")
+
+    print(f"{'predict per probe':<26} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, fn in (("cv2 LBPH", recognizer.predict), ("numpy templates", templates.predict),
+                      ("numpy templates (mmap)", mapped.predict)):
+        ms = per_probe(fn, probes)
+        print(f"{label:<26} {np.percentile(ms, 50):>8.2f} {np.percentile(ms, 99):>8.2f}")
+    del mapped
+    shutil.rmtree(work)
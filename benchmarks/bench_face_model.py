@@ -0,0 +1,76 @@
+"""
+Face login model cost: retraining per login vs the stored / cached templates.
+
+    python benchmarks/bench_face_model.py --account BOP-94875595 --face-id 101 --runs 5
+
+"retrain" is what every login and PIN reset used to do (decode all
+samples, train a fresh LBPHFaceRecognizer). "load" mmaps the versioned
+templates file written at enrollment, "cache hit" is a repeat login in the
+same process. Predictions of the loaded templates are checked against
+freshly built ones on the user's own samples.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import face_store
+from bench_face_match import train_lbph
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return result, np.median(samples) * 1e3
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--account", default="BOP-94875595")
+    ap.add_argument("--face-id", type=int, default=101)
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    # Work on a copy so the real data/_models is not touched
+    work = tempfile.mkdtemp()
+    shutil.copytree(os.path.join(ROOT, "data", args.account), os.path.join(work, args.account))
+    face_store.DATA_DIR = work
+    face_store.MODEL_DIR = os.path.join(work, "_models")
+
+    def retrain():
+        return train_lbph(args.face_id, face_store.load_samples(args.account))
+
+    def load():
+        face_store._cache.clear()
+        face_store._cache_bytes = 0
+        return face_store.get_templates(args.face_id, args.account)
+
+    _, retrain_ms = timed(retrain, args.runs)
+    face_store.get_templates(args.face_id, args.account)  # first login builds and writes them
+    loaded, load_ms = timed(load, args.runs)
+    _, hit_ms = timed(lambda: face_store.get_templates(args.face_id, args.account), args.runs * 20)
+
+    samples = face_store.load_samples(args.account)
+    fresh = face_store.build(args.face_id, samples)
+    same = sum(fresh.predict(s) == loaded.predict(s) for s in samples)
+    print(f"{len(samples)} samples, templates {loaded.nbytes / 2**20:.1f} MiB")
+    print(f"retrain LBPH per login: {retrain_ms:8.1f} ms")
+    print(f"load stored templates:  {load_ms:8.1f} ms")
+    print(f"cache hit:              {hit_ms:8.3f} ms")
+    print(f"predictions identical on {same}/{len(samples)} samples; {face_store.cache_info()}")
+
+    # Samples changed -> new version -> rebuilt once
+    os.utime(os.path.join(work, args.account, os.listdir(os.path.join(work, args.account))[0]))
+    face_store.get_templates(args.face_id, args.account)
+    print(f"after touching a sample: trains={face_store.stats['trains']}, "
+          f"model files={os.listdir(face_store.MODEL_DIR)}")
+    shutil.rmtree(work)
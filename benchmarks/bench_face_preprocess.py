@@ -0,0 +1,62 @@
+"""
+Per-user face preprocessing time: serial loop vs face_preprocess's thread pool.
+
+    python benchmarks/bench_face_preprocess.py --account BOP-94875595 --sizes 100 1000 --threads 1 4 8
+
+Sources are the user's JPEG samples (repeated to reach each size). "serial
+loop" is the old per-file Image.open(...).convert('L') followed by resize
+and equalize into a list; the pool rows do the same into one preallocated batch.
+The batch is checked to be identical to the serial result.
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import face_preprocess
+
+
+def serial(paths, size):
+    out = []
+    for p in paths:
+        gray = np.array(Image.open(p).convert('L'), 'uint8')
+        out.append(face_preprocess.normalize(gray, size, equalize=True))
+    return np.stack(out)
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return result, np.median(samples) * 1e3
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--account", default="BOP-94875595")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    ap.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    folder = os.path.join(ROOT, "data", args.account)
+    files = sorted(os.path.join(folder, n) for n in os.listdir(folder))
+    size = face_preprocess.FACE_SIZE
+    print(f"{os.cpu_count()} CPU(s), {size}x{size} faces, equalize on")
+    print(f"{'samples':>8} {'':<14} {'ms':>9} {'ms/sample':>10} {'speedup':>8}")
+    for n in args.sizes:
+        paths = (files * (n // len(files) + 1))[:n]
+        ref, base_ms = timed(lambda: serial(paths, size), args.runs)
+        print(f"{n:>8} {'serial loop':<14} {base_ms:>9.1f} {base_ms / n:>10.3f} {1.0:>8.2f}")
+        out = np.empty((n, size, size), dtype=np.uint8)
+        for t in args.threads:
+            batch, ms = timed(lambda: face_preprocess.preprocess_batch(paths, size, True, t, out), args.runs)
+            assert np.array_equal(batch, ref)
+            print(f"{n:>8} {f'pool x{t}':<14} {ms:>9.1f} {ms / n:>10.3f} {base_ms / ms:>8.2f}")
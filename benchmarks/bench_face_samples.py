@@ -0,0 +1,118 @@
+"""
+Enrollment samples: JPEG folder vs packed archive (face_samples.py).
+
+    python benchmarks/bench_face_samples.py --account BOP-94875595 --face-id 101 --runs 5
+
+Migrates a copy of the user's folder, then compares files / bytes on
+disk, the time to load all samples (JPEG decode vs mmap) and to build the
+match templates from them, and whether login decisions (distance < 35)
+stay the same for the user's own crops, perturbed crops and random images.
+
+Page-path parity: camera frames (JPEG bytes) are enrolled the way signup
+does it (to_gray -> detect_faces -> face_samples.append -> train_user) and
+probed the way login / PIN reset do (get_templates -> predict of
+face_samples.crop). Re-probing an enrollment frame must give distance 0:
+the probe and the stored sample went through the same preprocessing.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import face_store
+import face_samples
+import face_match
+import face_detect
+import face_preprocess
+from bench_face_match import make_probes, ACCEPT
+from bench_face_detect import make_frames
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return result, np.median(samples) * 1e3
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--account", default="BOP-94875595")
+    ap.add_argument("--face-id", type=int, default=101)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--probes", type=int, default=200)
+    args = ap.parse_args()
+
+    work = tempfile.mkdtemp()
+    folder = os.path.join(work, args.account)
+    shutil.copytree(os.path.join(ROOT, "data", args.account), folder)
+    face_store.DATA_DIR = work
+    names = face_samples.folder_images(folder)
+    folder_bytes = sum(os.path.getsize(os.path.join(folder, n)) for n in names)
+
+    jpegs, jpeg_ms = timed(lambda: face_store.load_samples(args.account), args.runs)
+    path = face_samples.archive_path(args.account, work)
+    kept, dropped = face_samples.pack_folder(folder, path)
+    packed, packed_ms = timed(lambda: face_store.load_samples(args.account), args.runs)
+
+    old, old_build_ms = timed(lambda: face_match.Templates.from_samples(jpegs, args.face_id), args.runs)
+    new, new_build_ms = timed(lambda: face_match.Templates.from_samples(packed, args.face_id), args.runs)
+
+    print(f"{'':<22} {'files':>6} {'MiB':>6} {'samples':>8} {'load ms':>8} {'build ms':>9}")
+    print(f"{'JPEG folder':<22} {len(names):>6} {folder_bytes / 2**20:>6.1f} {len(jpegs):>8} "
+          f"{jpeg_ms:>8.1f} {old_build_ms:>9.1f}")
+    print(f"{'archive (mmap)':<22} {1:>6} {os.path.getsize(path) / 2**20:>6.1f} {len(packed):>8} "
+          f"{packed_ms:>8.1f} {new_build_ms:>9.1f}")
+    print(f"{dropped} byte-identical samples dropped")
+
+    probes = make_probes(jpegs, args.probes)
+    agree = accepted_old = accepted_new = 0
+    for p in probes:
+        a, b = old.predict(p)[1] < ACCEPT, new.predict(p)[1] < ACCEPT
+        agree += a == b
+        accepted_old += a
+        accepted_new += b
+    print(f"login decisions on {len(probes)} probes: folder accepts {accepted_old}, archive accepts {accepted_new}, "
+          f"agree on {agree}")
+
+    # --- Page path: enroll like signup_page, probe like verify_page / reset_page ---
+    enrolled = "BOP-PAGE-PATH"
+    path = face_samples.archive_path(enrolled, work)
+    frames, _ = make_frames(packed, 60, 640, 480, seed=1)
+    shots = []
+    for frame in frames:
+        jpeg = cv2.imencode(".jpg", frame)[1].tobytes()  # st.camera_input hands the page a JPEG
+        gray = face_preprocess.to_gray(jpeg)
+        faces = face_detect.detect_faces(gray)
+        if faces:
+            shots.append((gray, faces[0]))
+    enroll, held_out = shots[:10], shots[10:]
+    for gray, (x, y, w, h) in enroll:
+        face_samples.append(path, [gray[y:y+h, x:x+w]])
+    face_store.train_user(args.face_id, enrolled)
+    matcher = face_store.get_templates(args.face_id, enrolled)
+
+    def page_probe(gray, box):
+        return matcher.predict(face_samples.crop(gray, box))[1]
+
+    def raw_probe(gray, box):  # what the pages did before: un-normalized detector crop
+        x, y, w, h = box
+        return matcher.predict(gray[y:y+h, x:x+w])[1]
+
+    same = [page_probe(g, b) for g, b in enroll]
+    raw = [raw_probe(g, b) for g, b in enroll]
+    held = np.array([page_probe(g, b) for g, b in held_out])
+    print(f"page path: {len(enroll)} frames enrolled ({len(matcher)} samples); re-probing them gives "
+          f"max distance {max(same):.2g} (raw crops: {min(raw):.2f}-{max(raw):.2f}); "
+          f"{int((held < ACCEPT).sum())}/{len(held)} held-out frames accepted, median distance {np.median(held):.1f}")
+    assert max(same) < 1e-6
+    shutil.rmtree(work)
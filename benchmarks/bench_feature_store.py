@@ -0,0 +1,67 @@
+"""
+Feature store cost: streaming updates vs. rescanning an account's history.
+
+    python benchmarks/bench_feature_store.py --rows 1000000 --accounts 10000
+
+Feeds N synthetic ledger rows (one every few seconds) through
+FeatureStore.add, then times features() against a pandas rescan of the
+same account's last 24h that computes a few of the same numbers.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import feature_store
+
+
+def make_rows(n, accounts, seed=7):
+    rnd = random.Random(seed)
+    t = datetime(2025, 1, 1)
+    rows = []
+    for _ in range(n):
+        t += timedelta(seconds=rnd.randint(1, 5))
+        a, b = rnd.randrange(accounts), rnd.randrange(accounts)
+        rows.append({"date": t.strftime("%Y-%m-%d %H:%M:%S"), "type": "Transfer", "amount": float(rnd.randint(1, 50000)),
+                     "sender": f"BOP-{10000000 + a}", "receiver_acc": f"BOP-{10000000 + b}",
+                     "receiver_name": "x", "status": "Success", "category": "Transfer"})
+    return rows
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1000000)
+    ap.add_argument("--accounts", type=int, default=10000)
+    ap.add_argument("--queries", type=int, default=1000)
+    args = ap.parse_args()
+
+    rows = make_rows(args.rows, args.accounts)
+    store = feature_store.FeatureStore()
+    t0 = time.perf_counter()
+    for r in rows:
+        store.add(r)
+    elapsed = time.perf_counter() - t0
+    print(f"updates: {args.rows / elapsed:,.0f} rows/s ({elapsed * 1e6 / args.rows:.1f} us/row)")
+
+    now = rows[-1]["date"]
+    rnd = random.Random(3)
+    accs = [f"BOP-{10000000 + rnd.randrange(args.accounts)}" for _ in range(args.queries)]
+    t0 = time.perf_counter()
+    for acc in accs:
+        store.features(acc, now=now)
+    fast = (time.perf_counter() - t0) / len(accs)
+
+    df = pd.DataFrame(rows)
+    df["date"] = pd.to_datetime(df["date"])
+    cutoff = pd.Timestamp(now) - pd.Timedelta(hours=24)
+    t0 = time.perf_counter()
+    for acc in accs[:100]:
+        mine = df[(df["sender"] == acc) & (df["date"] > cutoff)]
+        mine["amount"].sum(), len(mine), mine["receiver_acc"].nunique()
+    scan = (time.perf_counter() - t0) / min(len(accs), 100)
+    print(f"query: store {fast * 1e6:,.1f} us, rescan {scan * 1e6:,.0f} us ({scan / fast:,.0f}x)")
@@ -0,0 +1,72 @@
+"""
+Fraud scoring throughput: predict_fraud per row vs. predict_fraud_batch.
+
+    python benchmarks/bench_fraud_batch.py --sizes 1 10 100 1000 10000 100000
+
+Rows are synthetic PaySim-shaped transactions. The single-row loop is
+skipped above --single-max (it costs a few ms per row). Also checks that
+both paths give the same probabilities and decisions.
+"""
+import os
+import io
+import sys
+import time
+import argparse
+import contextlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+with contextlib.redirect_stdout(io.StringIO()):
+    import fraud_engine
+
+TYPES = ["CASH_IN", "CASH_OUT", "DEBIT", "PAYMENT", "TRANSFER"]
+
+
+def make_records(n, seed=7):
+    rnd = np.random.default_rng(seed)
+    old_org = rnd.uniform(0, 200000, n).round(2)
+    amount = np.minimum(rnd.exponential(20000, n), old_org).round(2)
+    wipeout = rnd.random(n) < 0.1
+    amount[wipeout] = old_org[wipeout]
+    old_dest = rnd.uniform(0, 100000, n).round(2)
+    return [{"step": int(i + 1), "type": TYPES[rnd.integers(len(TYPES))], "amount": float(amount[i]),
+             "oldbalanceOrg": float(old_org[i]), "newbalanceOrig": float(old_org[i] - amount[i]),
+             "oldbalanceDest": float(old_dest[i]), "newbalanceDest": float(old_dest[i] + amount[i])}
+            for i in range(n)]
+
+
+def score_single(records):
+    out = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for r in records:
+            out.append(fraud_engine.predict_fraud(r["step"], r["type"], r["amount"], r["oldbalanceOrg"],
+                                                  r["newbalanceOrig"], r["oldbalanceDest"], r["newbalanceDest"]))
+    return np.array([f for f, _ in out]), np.array([p for _, p in out])
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000, 100000])
+    ap.add_argument("--single-max", type=int, default=1000)
+    args = ap.parse_args()
+
+    if not fraud_engine.MODEL_LOADED:
+        sys.exit("fraud model not loaded")
+
+    print(f"{'rows':>8} {'single rows/s':>14} {'batch rows/s':>13} {'speedup':>8} {'parity':>7}")
+    for n in args.sizes:
+        records = make_records(n)
+        t0 = time.perf_counter()
+        b_flags, b_probs = fraud_engine.predict_fraud_batch(records)
+        batch = n / (time.perf_counter() - t0)
+
+        single, speedup, parity = None, "", ""
+        if n <= args.single_max:
+            t0 = time.perf_counter()
+            s_flags, s_probs = score_single(records)
+            single = n / (time.perf_counter() - t0)
+            speedup = f"{batch / single:.1f}x"
+            parity = "ok" if (np.array_equal(s_flags, b_flags) and np.allclose(s_probs, b_probs, atol=1e-6)) else "FAIL"
+        single_txt = f"{single:,.0f}" if single else "-"
+        print(f"{n:>8} {single_txt:>14} {batch:>13,.0f} {speedup:>8} {parity:>7}")
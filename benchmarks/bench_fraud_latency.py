@@ -0,0 +1,106 @@
+"""
+Single-transaction fraud scoring latency: full pipeline vs. the fast path.
+
+    python benchmarks/bench_fraud_latency.py --calls 5000 --parity-rows 100000
+
+Parity: fast-path probabilities (row by row and vectorized) are compared
+with Pipeline.predict_proba on random rows, including unknown types and
+account wipeouts; the decisions of predict_features (rules + fast path)
+are compared with the same rules on the Pipeline's probabilities. Latency: p50/p99 per call, measured one row at a time.
+"""
+import os
+import io
+import sys
+import time
+import argparse
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+with contextlib.redirect_stdout(io.StringIO()):
+    import fraud_engine
+from bench_fraud_batch import make_records
+
+
+def percentiles(samples):
+    p50, p99 = np.percentile(np.array(samples) * 1e6, [50, 99])
+    return p50, p99
+
+
+def make_contexts(n, seed=13):
+    """Transfer-graph context so the mule_receiver / round_trip threshold rules match some rows."""
+    rnd = np.random.default_rng(seed)
+    mule = rnd.random(n) < 0.05
+    round_trip = rnd.random(n) < 0.05
+    return [{"receiver_fan_in_24h": 12 if mule[i] else 1, "receiver_forward_ratio_24h": 0.9 if mule[i] else 0.0,
+             "reverse_edge": bool(round_trip[i]), "pass_through_depth": 1 if round_trip[i] else 0}
+            for i in range(n)]
+
+
+def time_calls(fn, rows):
+    samples = []
+    for r in rows:
+        t0 = time.perf_counter()
+        fn(r)
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=5000)
+    ap.add_argument("--parity-rows", type=int, default=100000)
+    args = ap.parse_args()
+
+    fast = fraud_engine.fast_scorer
+    if fast is None:
+        sys.exit("fast path unavailable (model missing or pipeline layout not supported)")
+    model = fraud_engine.fraud_model
+
+    # --- Parity ---
+    records = make_records(args.parity_rows, seed=11)
+    for r in records[::97]:
+        r["type"] = "UNKNOWN"
+    data = fraud_engine._to_frame(records)
+    expected = model.predict_proba(data)[:, 1]
+    vectorized = fast.predict_many(data)
+    sample = data.iloc[:min(len(data), 20000)]
+    single = np.array([fast.predict_one(r) for r in sample.to_dict("records")])
+    err = max(np.abs(vectorized - expected).max(), np.abs(single - expected[:len(sample)]).max())
+    print(f"parity: {len(data):,} rows, max |diff| = {err:.2e}")
+
+    # Decisions: predict_features (rules + fast path, as fraud_service calls it) against the same
+    # rules with the Pipeline's probabilities, so every threshold rule (wipeout, mule, round trip) is covered
+    rows = data.to_dict("records")
+    contexts = make_contexts(len(rows))
+    score = fraud_engine.predict_features(rows, contexts)
+    reference = fraud_engine.ModelBundle(fraud_engine.get_model().version, pipeline=model)
+    expected_score = fraud_engine._decide(
+        reference, len(rows), fraud_engine._row_columns(rows, contexts),
+        lambda todo: reference.predict_rows([r for r, t in zip(rows, todo) if t]), "batch", time.perf_counter())
+    decided = {name: int(n) for name, n in zip(*np.unique(expected_score.rule.astype(str), return_counts=True))}
+    print(f"decisions {'identical' if np.array_equal(score[0], expected_score[0]) else 'DIFFER'} "
+          f"(flagged {int(expected_score[0].sum()):,}; rows per rule {decided})")
+
+    # --- Latency ---
+    rows = data.iloc[:args.calls].to_dict("records")
+    for r in rows[:200]:  # warm up
+        fast.predict_one(r)
+        model.predict_proba(pd.DataFrame([r], columns=fraud_engine.FEATURES))
+
+    def predict_fraud(r):
+        with contextlib.redirect_stdout(io.StringIO()):
+            fraud_engine.predict_fraud(r["step"], r["type"], r["amount"], r["oldbalanceOrg"],
+                                       r["newbalanceOrig"], r["oldbalanceDest"], r["newbalanceDest"])
+
+    cases = [
+        ("pipeline (1-row DataFrame)", lambda r: model.predict_proba(pd.DataFrame([r], columns=fraud_engine.FEATURES))),
+        ("fast path predict_one", fast.predict_one),
+        ("predict_fraud (end to end)", predict_fraud),
+    ]
+    print(f"{'path':>28} {'p50 (us)':>10} {'p99 (us)':>10}")
+    for label, fn in cases:
+        p50, p99 = percentiles(time_calls(fn, rows))
+        print(f"{label:>28} {p50:>10,.0f} {p99:>10,.0f}")
@@ -0,0 +1,51 @@
+"""
+Fraud model cold start: pickled pipeline vs. exported UBJSON artifacts.
+
+    python benchmarks/bench_fraud_load.py --runs 5
+
+Each run is a fresh interpreter that imports fraud_engine and scores one
+transaction (import + load + first score), like a new Streamlit worker.
+Run `python fraud_engine.py --export` first so the artifacts exist.
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import io, sys, time, contextlib
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import fraud_engine as fe
+    if {use_pkl}:
+        fe.META_FILE = "missing.json"
+    t1 = time.perf_counter()
+    score = fe.predict_fraud(1, "TRANSFER", 1000, 5000, 4000)
+t2 = time.perf_counter()
+import resource
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(t1 - t0, t2 - t1, rss, fe.get_model().source)
+"""
+
+
+def run(use_pkl):
+    out = subprocess.run([sys.executable, "-c", CHILD.format(root=ROOT, use_pkl=use_pkl)],
+                         capture_output=True, text=True, cwd=ROOT, check=True).stdout.split()
+    return float(out[0]), float(out[1]), float(out[2]), out[3]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'source':>10} {'import s':>9} {'load+score s':>13} {'max RSS MB':>11}")
+    for label, use_pkl in (("pickle", True), ("artifacts", False)):
+        results = [run(use_pkl) for _ in range(args.runs)]
+        imp, first, rss = (np.median([r[i] for r in results]) for i in range(3))
+        print(f"{label:>10} {imp:>9.3f} {first:>13.3f} {rss:>11.0f}   ({os.path.basename(results[0][3])})")
@@ -0,0 +1,97 @@
+"""
+Cost of fraud scoring instrumentation, and drift detection on a shifted stream.
+
+    python benchmarks/bench_fraud_metrics.py --calls 3000 --rows 20000
+
+Per-call latency of predict_fraud with: no instrumentation, metrics +
+sampled JSON logging (the default), and the old behaviour of printing the
+features on every call (stdout sent to /dev/null in all runs). Then a
+baseline is taken from one synthetic stream and compared (PSI / KS) with
+a window from the same distribution and from a shifted one.
+"""
+import os
+import io
+import sys
+import time
+import logging
+import argparse
+import contextlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+with contextlib.redirect_stdout(io.StringIO()):
+    import fraud_engine
+    import fraud_metrics
+    fraud_engine.warm_up(background=False)
+from bench_fraud_batch import make_records
+
+
+def single_calls(records, old_prints=False):
+    samples = []
+    for r in records:
+        args = (r["step"], r["type"], r["amount"], r["oldbalanceOrg"], r["newbalanceOrig"],
+                r["oldbalanceDest"], r["newbalanceDest"])
+        t0 = time.perf_counter()
+        score = fraud_engine.predict_fraud(*args)
+        if old_prints:  # what every call used to print
+            print(f"\n--- 🛡️ AI Security Analysis ---")
+            print(f"Features Sent to Model: {fraud_engine.make_features(*args)}")
+            print(f"Risk Score: {score[1]:.4f} (model {score.version})")
+        samples.append(time.perf_counter() - t0)
+    return np.array(samples) * 1e6
+
+
+def shifted(records, seed=3):
+    """Same stream with half the senders' accounts emptied (what a fraud wave looks like)."""
+    rnd = np.random.default_rng(seed)
+    out = []
+    for r in records:
+        r = dict(r)
+        if rnd.random() < 0.5:
+            r["oldbalanceOrg"], r["newbalanceOrig"] = r["amount"], 0.0
+        out.append(r)
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=3000)
+    ap.add_argument("--rows", type=int, default=20000)
+    args = ap.parse_args()
+
+    records = make_records(args.calls, seed=21)
+    devnull = open(os.devnull, "w")
+    fraud_metrics.log.handlers[0].setStream(devnull)
+
+    print(f"{'per call':<30} {'p50 us':>8} {'p99 us':>8} {'mean us':>8}")
+    with contextlib.redirect_stdout(devnull):
+        single_calls(records[:300])  # warm caches
+        runs = []
+        for label, enabled, level, old in (("bare (no metrics, no logs)", False, logging.CRITICAL, False),
+                                           ("metrics + sampled log", True, logging.INFO, False),
+                                           ("old: print every call", False, logging.CRITICAL, True)):
+            fraud_metrics.ENABLED = enabled
+            fraud_metrics.log.setLevel(level)
+            runs.append((label, single_calls(records, old_prints=old)))
+    for label, us in runs:
+        print(f"{label:<30} {np.percentile(us, 50):>8.0f} {np.percentile(us, 99):>8.0f} {us.mean():>8.0f}")
+    fraud_metrics.ENABLED = True
+
+    # --- Drift: baseline, then a same-distribution window and a shifted one ---
+    base = make_records(args.rows, seed=31)
+    same = make_records(args.rows, seed=32)
+    for label, stream in (("same distribution", same), ("shifted stream", shifted(same))):
+        m = fraud_metrics.FraudMetrics(drift_window=args.rows, baseline_size=args.rows)
+        fraud_metrics.metrics, saved = m, fraud_metrics.metrics
+        fraud_engine.predict_fraud_batch(base)
+        fraud_engine.predict_fraud_batch(stream)
+        fraud_metrics.metrics = saved
+        d = m.drift()
+        per_type = ", ".join(f"{t} {v['psi']:.3f}" for t, v in d["by_type"].items())
+        print(f"{label:<18} PSI {d['psi']:.3f}  KS {d['ks']:.3f}  [{d['status']}]  by type: {per_type}")
+
+    t0 = time.perf_counter()
+    snap = m.snapshot()
+    print(f"snapshot(): {(time.perf_counter() - t0) * 1e3:.1f} ms "
+          f"({snap['drift']['baseline_rows'] + snap['drift']['window_rows']:,} drift rows)")
@@ -0,0 +1,82 @@
+"""
+Rules pre-filter: short-circuit rate and scoring time saved.
+
+    python benchmarks/bench_fraud_rules.py --rows 100000 --calls 3000
+
+Synthetic transactions (with random rule context: recipient_new,
+sent_count_1h, is_locked) are scored with fraud_engine.SHORT_CIRCUIT on
+and off. Reports the share of rows decided by rules, hits per rule,
+agreement with model-only decisions, and batch / per-call time.
+"""
+import os
+import io
+import sys
+import time
+import argparse
+import contextlib
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+with contextlib.redirect_stdout(io.StringIO()):
+    import fraud_engine
+    fraud_engine.warm_up(background=False)
+from bench_fraud_batch import make_records
+
+
+def add_context(records, seed=5):
+    rnd = np.random.default_rng(seed)
+    for r in records:
+        r["recipient_new"] = bool(rnd.random() < 0.3)
+        r["sent_count_1h"] = int(rnd.poisson(2))
+        r["is_locked"] = bool(rnd.random() < 0.001)
+    return records
+
+
+def single_calls(records):
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for r in records:
+            ctx = {k: r[k] for k in ("recipient_new", "sent_count_1h", "is_locked")}
+            t0 = time.perf_counter()
+            fraud_engine.predict_fraud(r["step"], r["type"], r["amount"], r["oldbalanceOrg"], r["newbalanceOrig"],
+                                       r["oldbalanceDest"], r["newbalanceDest"], context=ctx)
+            samples.append(time.perf_counter() - t0)
+    return np.array(samples) * 1e6
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100000)
+    ap.add_argument("--calls", type=int, default=3000)
+    args = ap.parse_args()
+
+    records = add_context(make_records(args.rows, seed=13))
+
+    fraud_engine.SHORT_CIRCUIT = False
+    t0 = time.perf_counter()
+    base = fraud_engine.predict_fraud_batch(records)
+    base_s = time.perf_counter() - t0
+    base_single = single_calls(records[:args.calls])
+
+    fraud_engine.SHORT_CIRCUIT = True
+    fraud_engine.rules.reset_stats()
+    t0 = time.perf_counter()
+    ruled = fraud_engine.predict_fraud_batch(records)
+    ruled_s = time.perf_counter() - t0
+    stats = fraud_engine.rules.stats()
+    ruled_single = single_calls(records[:args.calls])
+
+    print(f"short-circuit rate: {stats['short_circuit_rate']:.1%} of {stats['evaluated']:,} rows")
+    for name, hits in Counter(stats["hits"]).most_common():
+        print(f"  {name:<28} {hits:>8,}")
+    changed = int((base[0] != ruled[0]).sum())
+    print(f"decisions changed vs model only: {changed:,} ({changed / len(records):.3%})")
+    print(f"{'':>16} {'model only':>12} {'rules first':>12} {'saved':>8}")
+    print(f"{'batch (s)':>16} {base_s:>12.3f} {ruled_s:>12.3f} {1 - ruled_s / base_s:>8.0%}")
+    for label, q in (("single p50 (us)", 50), ("single p99 (us)", 99)):
+        a, b = np.percentile(base_single, q), np.percentile(ruled_single, q)
+        print(f"{label:>16} {a:>12,.0f} {b:>12,.0f} {1 - b / a:>8.0%}")
+    a, b = base_single.mean(), ruled_single.mean()
+    print(f"{'single mean (us)':>16} {a:>12,.0f} {b:>12,.0f} {1 - b / a:>8.0%}")
@@ -0,0 +1,69 @@
+"""
+Load generator for fraud_service: throughput and tail latency, coalescing on vs off.
+
+    python benchmarks/bench_fraud_service.py --clients 1 8 32 128 --seconds 3 --max-wait-ms 2
+
+Each client thread is a session scoring transactions back to back
+(closed loop). "off" scores every request on the caller's thread, like
+calling fe.predict_fraud directly; "on" scores a request inline when the
+service is idle and otherwise routes it through the micro-batching worker.
+"""
+import os
+import io
+import sys
+import time
+import argparse
+import threading
+import contextlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+with contextlib.redirect_stdout(io.StringIO()):
+    import fraud_service
+from bench_fraud_batch import make_records
+
+
+def run(service, clients, seconds, records):
+    latencies = [[] for _ in range(clients)]
+    stop = time.perf_counter() + seconds
+
+    def client(i):
+        out, k = latencies[i], i
+        while time.perf_counter() < stop:
+            r = records[k % len(records)]
+            k += clients
+            t0 = time.perf_counter()
+            service.score(r["step"], r["type"], r["amount"], r["oldbalanceOrg"], r["newbalanceOrig"],
+                          r["oldbalanceDest"], r["newbalanceDest"])
+            out.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    samples = np.concatenate([np.array(l) for l in latencies if l]) * 1e3
+    return len(samples) / elapsed, np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32, 128])
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--max-wait-ms", type=float, default=fraud_service.MAX_WAIT * 1e3)
+    ap.add_argument("--max-batch", type=int, default=fraud_service.MAX_BATCH)
+    args = ap.parse_args()
+
+    fraud_service.fe.warm_up(background=False)  # model load is not part of the measurement
+    records = make_records(10000)
+    print(f"{'clients':>8} {'coalesce':>9} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'avg batch':>10}")
+    for clients in args.clients:
+        for coalesce in (False, True):
+            service = fraud_service.ScoringService(max_wait=args.max_wait_ms / 1e3, max_batch=args.max_batch,
+                                                   coalesce=coalesce)
+            rps, p50, p99 = run(service, clients, args.seconds, records)
+            avg = service.requests / service.batches if service.batches else 0
+            print(f"{clients:>8} {'on' if coalesce else 'off':>9} {rps:>10,.0f} {p50:>8.2f} {p99:>8.2f} {avg:>10.1f}")
@@ -0,0 +1,170 @@
+"""
+Per-user history queries on the persisted column store, at ledger scale.
+
+    python benchmarks/bench_history.py --rows 10000000 --accounts 100000
+
+1. build: a ledger file of --rows rows (24 months, ledger = time order) is
+   written, then txn_columns.TxnColumns catches up with it from offset 0;
+   time, disk and peak RSS.
+2. cold start, in a fresh interpreter: open the ledger and the store (the
+   Ledger is never indexed), first query, then --append new ledger rows
+   and the query that writes them, then the page queries (full history,
+   last 3 months, transfers only) with p50/p99 and RSS.
+3. for comparison, what indexing the whole Ledger costs (storage_engine.Ledger.count(),
+   which the fraud feature views still need), also in its own interpreter.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import storage_engine as se
+import txn_columns
+
+TYPES = ["Deposit", "Transfer", "CASH_OUT", "Insurance"]
+START = 1704067200   # 2024-01-01
+SPAN = 24 * 30 * 86400
+
+
+def row(i, n_rows, n_accounts):
+    ts = START + i * SPAN // n_rows
+    return {
+        "date": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts)),
+        "type": TYPES[i % 4], "amount": float(i % 5000),
+        "sender": f"BOP-{i * 2654435761 % n_accounts}", "receiver_acc": f"BOP-{(i * 40503 + 7) % n_accounts}",
+        "receiver_name": "N/A", "status": "Success", "category": "General", "seq": i + 1,
+    }
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def pct(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+
+
+def disk(path):
+    total = files = 0
+    for dirpath, _, names in os.walk(path):
+        for n in names:
+            total += os.path.getsize(os.path.join(dirpath, n))
+            files += 1
+    return total, files
+
+
+def ledger_path(args):
+    return os.path.join(args.store, "transactions.txt")
+
+
+def build(args):
+    t0 = time.perf_counter()
+    with open(ledger_path(args), "wb") as f:
+        for i in range(args.rows):
+            f.write(se.dump_line(row(i, args.rows, args.accounts)))
+    written = time.perf_counter() - t0
+    cols = txn_columns.TxnColumns(se.Ledger(ledger_path(args)), os.path.join(args.store, "columns"))
+    t0 = time.perf_counter()
+    cols.catch_up()
+    secs = time.perf_counter() - t0
+    size, files = disk(os.path.join(args.store, "columns"))
+    print(f"ledger: {args.rows:,} rows written in {written:.0f}s ({os.path.getsize(ledger_path(args)) / 2**30:.2f} GiB)")
+    print(f"build: {args.rows:,} rows / {args.accounts:,} accounts in {secs:.0f}s ({args.rows / secs:,.0f} rows/s), "
+          f"{size / 2**30:.2f} GiB in {files:,} files, peak RSS {peak_mb():.0f} MB")
+
+
+def cold(args):
+    base = rss_mb()
+    t0 = time.perf_counter()
+    ledger = se.Ledger(ledger_path(args))
+    cols = txn_columns.TxnColumns(ledger, os.path.join(args.store, "columns"))
+    cols.query("BOP-0")
+    first_query = time.perf_counter() - t0
+
+    with open(ledger_path(args), "ab") as f:   # another process appended rows since
+        for i in range(args.rows, args.rows + args.append):
+            f.write(se.dump_line(row(i, args.rows, args.accounts)))
+    t0 = time.perf_counter()
+    cols.query("BOP-0")
+    catch_up = time.perf_counter() - t0
+
+    rnd = random.Random(5)
+    cases = {"full history": {}, "last 3 months": {"since": "2025-10-01"}, "transfers only": {"types": ["Transfer"]}}
+    results = {}
+    for name, kw in cases.items():
+        samples, rows = [], 0
+        for _ in range(args.queries):
+            acc = f"BOP-{rnd.randrange(args.accounts)}"
+            t = time.perf_counter()
+            rows += len(cols.query(acc, **kw))
+            samples.append(time.perf_counter() - t)
+        results[name] = (pct(samples, .5), pct(samples, .99), rows / args.queries)
+    assert not ledger._loaded
+    print(json.dumps({"first_query_ms": first_query * 1000, "catch_up_ms": catch_up * 1000,
+                      "rss_mb": rss_mb() - base, "strings": len(cols._strings), "results": results}))
+
+
+def ledger_cost(args):
+    """Runs in its own interpreter (--phase ledger) so the RSS delta is only the Ledger's."""
+    base = rss_mb()
+    t0 = time.perf_counter()
+    n = se.Ledger(ledger_path(args)).count()
+    print(json.dumps({"rows": n, "secs": time.perf_counter() - t0, "rss_mb": rss_mb() - base}))
+
+
+def phase(args, name):
+    out = subprocess.run([sys.executable, __file__, "--phase", name, "--store", args.store, "--rows", str(args.rows),
+                          "--accounts", str(args.accounts), "--queries", str(args.queries),
+                          "--append", str(args.append)],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1000000)
+    ap.add_argument("--accounts", type=int, default=10000)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--append", type=int, default=1000, help="ledger rows appended before the catch-up query")
+    ap.add_argument("--no-ledger", action="store_true", help="skip the full Ledger index comparison")
+    ap.add_argument("--store", default=None, help="work directory (default: a temp dir, removed afterwards)")
+    ap.add_argument("--phase", choices=["all", "cold", "ledger"], default="all")
+    args = ap.parse_args()
+
+    if args.phase != "all":
+        {"cold": cold, "ledger": ledger_cost}[args.phase](args)
+        sys.exit()
+
+    keep = args.store is not None
+    args.store = args.store or tempfile.mkdtemp()
+    build(args)
+    res = phase(args, "cold")
+    print(f"cold start (fresh process, Ledger not indexed): first query {res['first_query_ms']:.1f} ms, "
+          f"{args.append:,} new ledger rows caught up in {res['catch_up_ms']:.1f} ms, "
+          f"store RSS +{res['rss_mb']:.0f} MB ({res['strings']:,} dictionary strings)")
+    print(f"{'query':>16} {'p50 ms':>8} {'p99 ms':>8} {'rows':>6}")
+    for name, (p50, p99, rows) in res["results"].items():
+        print(f"{name:>16} {p50:>8.2f} {p99:>8.2f} {rows:>6.0f}")
+    if not args.no_ledger:
+        res = phase(args, "ledger")
+        print(f"full Ledger index (comparison, not on the history path): {res['rows']:,} rows in {res['secs']:.1f}s, "
+              f"+{res['rss_mb']:.0f} MB RSS")
+    if not keep:
+        shutil.rmtree(args.store)
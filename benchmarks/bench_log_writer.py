@@ -0,0 +1,71 @@
+"""
+Open-per-event logging vs. the batched background writer.
+
+    python benchmarks/bench_log_writer.py --sessions 100 --events 200
+
+Each simulated session is a thread logging activity lines. "open/event" is
+the old behaviour (open, write, close per call); the other rows go through
+log_writer.LogWriter in each durability mode.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import log_writer
+
+LINE = b'{"timestamp":"2025-12-30 02:18:37","account_no":"BOP-94875595","activity":"Visited Home Dashboard"}\n'
+
+
+def run_sessions(n_sessions, n_events, log_one):
+    def session():
+        for _ in range(n_events):
+            log_one()
+
+    threads = [threading.Thread(target=session) for _ in range(n_sessions)]
+    t0 = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=100)
+    ap.add_argument("--events", type=int, default=200)
+    ap.add_argument("--interval", type=float, default=0.005, help="writer flush interval (s)")
+    args = ap.parse_args()
+    total = args.sessions * args.events
+    tmp = tempfile.mkdtemp(prefix="bank_bench_")
+
+    def open_per_event(path, sync):
+        def log_one():
+            with open(path, "ab") as f:
+                f.write(LINE)
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        return log_one
+
+    print(f"{'mode':>22} {'events/sec':>12} {'batches':>9}")
+    for sync in (False, True):
+        path = os.path.join(tmp, f"plain_{sync}.txt")
+        elapsed = run_sessions(args.sessions, args.events, open_per_event(path, sync))
+        print(f"{'open/event' + (' + fsync' if sync else ''):>22} {total / elapsed:>12,.0f} {total:>9}")
+
+    for mode in ("none", "batch", "record"):
+        path = os.path.join(tmp, f"writer_{mode}.txt")
+        w = log_writer.LogWriter(flush_interval=args.interval, durability=mode)
+        t0 = time.perf_counter()
+        run_sessions(args.sessions, args.events, lambda: w.write(path, LINE))
+        w.flush(timeout=600)
+        elapsed = time.perf_counter() - t0
+        assert os.path.getsize(path) == total * len(LINE)
+        print(f"{'writer (' + mode + ')':>22} {total / elapsed:>12,.0f} {w.batches:>9}")
+
+    for name in os.listdir(tmp):
+        os.remove(os.path.join(tmp, name))
+    os.rmdir(tmp)
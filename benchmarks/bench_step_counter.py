@@ -0,0 +1,75 @@
+"""
+Fraud "step" feature: Ledger.last_seq() before the ledger is loaded vs a full load.
+
+    python benchmarks/bench_step_counter.py --rows 1000000 --steps 3
+
+last_seq() on a fresh Ledger only reads the tail of the file, so its cost
+must not grow with the ledger. Torn tails (a crash mid-write) are checked
+first: the backwards reader must skip them, never raise, and last_seq()
+must fall back to the last complete row.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import storage_engine as se
+from log_segments import iter_lines_reversed
+
+ROW = {"date": "2025-12-30 02:18:48", "type": "Transfer", "amount": 10.0, "sender": "BOP-10000000",
+       "receiver_acc": "BOP-10000001", "receiver_name": "N/A", "status": "Success", "category": "Transfer"}
+
+
+def write_ledger(path, n):
+    with open(path, "wb") as f:
+        for i in range(n):
+            f.write(se.dump_line(dict(ROW, seq=i + 1)))
+
+
+def check_torn_tails(work):
+    """Tails with no newline in the last block(s): only a torn line, a long torn line, good line + long torn line."""
+    path = os.path.join(work, "torn.txt")
+    good = se.dump_line(dict(ROW, seq=7))
+    cases = [("only a torn line", b'{"seq": 1', [], 0),
+             ("10000 bytes, no newline", b"x" * 10000, [], 0),
+             ("good line + 10000-byte torn tail", good + b"x" * 10000, [good.rstrip(b"\n")], 7)]
+    for label, data, lines, seq in cases:
+        with open(path, "wb") as f:
+            f.write(data)
+        got = list(iter_lines_reversed(path))
+        assert got == lines, (label, got[:1])
+        assert se.Ledger(path).last_seq() == seq, label
+        print(f"torn tail ok: {label}")
+
+
+def timed(fn, reps):
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        result = fn()
+    return result, (time.perf_counter() - t0) / reps * 1e3
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1000000)
+    ap.add_argument("--steps", type=int, default=3, help="number of 10x smaller sizes to also run")
+    ap.add_argument("--reps", type=int, default=200)
+    args = ap.parse_args()
+
+    work = tempfile.mkdtemp()
+    check_torn_tails(work)
+    print(f"{'rows':>10} {'last_seq cold ms':>17} {'full load s':>12}")
+    for k in reversed(range(args.steps + 1)):
+        n = args.rows // 10 ** k
+        path = os.path.join(work, f"ledger_{n}.txt")
+        write_ledger(path, n)
+        seq, cold_ms = timed(lambda: se.Ledger(path).last_seq(), args.reps)
+        assert seq == n
+        t0 = time.perf_counter()
+        se.Ledger(path).count()
+        print(f"{n:>10,} {cold_ms:>17.3f} {time.perf_counter() - t0:>12.2f}")
+        os.remove(path)
+    shutil.rmtree(work)
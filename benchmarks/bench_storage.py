@@ -0,0 +1,96 @@
+"""
+Storage engine benchmark: lookup/append latency vs. data size.
+
+    python benchmarks/bench_storage.py --users 1000000 --txns 10000000
+
+Synthetic files are written to a temp folder; the real bank files are never touched.
+Latency should stay flat as sizes grow (only the one-time cold load is O(N)).
+"load MB" is the RSS growth of the cold load: the user table plus the ledger's offset indexes.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import storage_engine as se
+
+
+def write_users(path, n):
+    with open(path, "wb") as f:
+        for i in range(n):
+            f.write(se.dump_line({
+                "f_name": "user", "l_name": str(i), "cnic": str(1000000000000 + i),
+                "phone": "03000000000", "email": f"user{i}@bank.com", "pin": "1234",
+                "failed_tries": 0, "is_locked": False, "balance": 1000.0,
+                "face_id": 101 + i, "account_no": f"BOP-{10000000 + i}",
+            }))
+
+
+def write_txns(path, n, n_users):
+    with open(path, "wb") as f:
+        for i in range(n):
+            f.write(se.dump_line({
+                "date": "2025-12-30 02:18:48", "type": "Transfer", "amount": 10.0,
+                "sender": f"BOP-{10000000 + i % n_users}",
+                "receiver_acc": f"BOP-{10000000 + (i * 7) % n_users}",
+                "receiver_name": "N/A", "status": "Success", "category": "Transfer",
+            }))
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def timed(fn, reps):
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - t0) / reps * 1e6
+
+
+def run(n_users, n_txns, reps=2000):
+    tmp = tempfile.mkdtemp(prefix="bank_bench_")
+    u_path, t_path = os.path.join(tmp, "users.txt"), os.path.join(tmp, "tx.txt")
+    write_users(u_path, n_users)
+    write_txns(t_path, n_txns, n_users)
+
+    users, ledger = se.UserTable(u_path), se.Ledger(t_path)
+    base = rss_mb()
+    t0 = time.perf_counter()
+    users.count(); ledger.count()
+    load_s = time.perf_counter() - t0
+    load_mb = rss_mb() - base
+
+    rnd = random.Random(1)
+    accs = [f"BOP-{10000000 + rnd.randrange(n_users)}" for _ in range(reps)]
+    it = iter(accs * 3)
+    by_acc = timed(lambda: users.get(account_no=next(it)), reps)
+    by_email = timed(lambda: users.get(email=f"user{rnd.randrange(n_users)}@bank.com"), reps)
+    history = timed(lambda: ledger.for_account(next(it)), reps)
+    append = timed(lambda: ledger.append({"sender": "BOP-10000000", "receiver_acc": "Self",
+                                          "type": "Deposit", "amount": 1.0}), reps)
+    print(f"{n_users:>10,} {n_txns:>12,} {load_s:>9.2f}s {load_mb:>8.0f} {by_acc:>9.1f} {by_email:>9.1f} "
+          f"{history:>11.1f} {append:>9.1f}")
+    for p in (u_path, t_path):
+        os.remove(p)
+    os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=100000)
+    ap.add_argument("--txns", type=int, default=1000000)
+    ap.add_argument("--steps", type=int, default=3, help="number of 10x smaller sizes to also run")
+    args = ap.parse_args()
+
+    print(f"{'users':>10} {'txns':>12} {'cold load':>10} {'load MB':>8} {'get(acc)':>9} {'get(mail)':>9} "
+          f"{'history(us)':>11} {'append':>9}   (latencies in microseconds)")
+    for k in reversed(range(args.steps)):
+        run(max(args.users // 10 ** k, 10), max(args.txns // 10 ** k, 10))
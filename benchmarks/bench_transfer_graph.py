@@ -0,0 +1,99 @@
+"""
+Transfer graph: incremental insertion and query cost at millions of edges.
+
+    python benchmarks/bench_transfer_graph.py --edges 2000000 --accounts 200000 --queries 2000
+
+Streams synthetic transfers (plus a few injected mule chains) into
+TransferGraph.add_edge, then times features() for random transfers and
+checks its answers against a brute-force scan of the edge list. The
+"rebuild per query" column is what building the CSR arrays from scratch
+for every query would cost instead.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import transfer_graph
+
+
+def make_edges(n, accounts, chains, seed=11):
+    """Random transfers, one every ~0.5 s, plus `chains` 4-hop pass-through chains (src, dst, ts, amount)."""
+    rnd = np.random.default_rng(seed)
+    src = rnd.integers(0, accounts, n)
+    dst = (src + rnd.integers(1, accounts, n)) % accounts
+    ts = 1.7e9 + np.cumsum(rnd.uniform(0, 1, n))
+    amount = np.round(rnd.lognormal(8, 1.5, n), 2)
+    edges = list(zip(src.tolist(), dst.tolist(), ts.tolist(), amount.tolist()))
+    mules = []
+    r = random.Random(seed)
+    for c in range(chains):
+        at = r.randrange(n // 2, n - 10)
+        hops = [accounts + 10 * c + k for k in range(5)]
+        t, a = edges[at][2], 250000.0
+        for k in range(4):
+            edges.insert(at + 2 * k, (hops[k], hops[k + 1], t + 300 * k, a))
+            a *= 0.97  # each mule keeps a commission
+        mules.append((hops[4], t + 1200, a * 0.97))
+    return edges, mules
+
+
+def brute_force(edges, u, v, now):
+    since = now - transfer_graph.WINDOW
+    fan_out = {d for s, d, t, _ in edges if s == u and since < t <= now}
+    fan_in = {s for s, d, t, _ in edges if d == v and since < t <= now}
+    reverse = any(s == v and d == u for s, d, _, _ in edges)
+    return len(fan_out), len(fan_in), reverse
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--edges", type=int, default=2000000)
+    ap.add_argument("--accounts", type=int, default=200000)
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--chains", type=int, default=50)
+    ap.add_argument("--check", type=int, default=20, help="queries verified by brute force")
+    args = ap.parse_args()
+
+    edges, mules = make_edges(args.edges, args.accounts, args.chains)
+    g = transfer_graph.TransferGraph()
+    t0 = time.perf_counter()
+    for s, d, t, a in edges:
+        g.add_edge(s, d, t, a)
+    elapsed = time.perf_counter() - t0
+    stats = g.stats()
+    print(f"inserted {len(edges):,} edges: {len(edges) / elapsed:,.0f} edges/s ({elapsed * 1e6 / len(edges):.1f} us/edge), "
+          f"{stats['merges']} CSR merges, {stats['delta_edges']:,} edges in delta")
+    print(f"memory: CSR {stats['csr_bytes'] / 2**20:.0f} MiB + edge list {stats['edge_bytes'] / 2**20:.0f} MiB "
+          f"for {stats['nodes']:,} accounts")
+
+    rnd = random.Random(3)
+    now = edges[-1][2]
+    picks = [edges[rnd.randrange(len(edges))] for _ in range(args.queries)]
+    samples = []
+    for s, d, t, a in picks:
+        q0 = time.perf_counter()
+        g.features(s, d, a, now=now)
+        samples.append(time.perf_counter() - q0)
+    us = np.array(samples) * 1e6
+    t0 = time.perf_counter()
+    n = len(edges)
+    transfer_graph.CSR(g._src[:n], g._dst[:n], g._ts[:n], g._amount[:n], stats["nodes"])
+    rebuild = (time.perf_counter() - t0) * 1e6
+    print(f"features(): p50 {np.percentile(us, 50):.0f} us, p99 {np.percentile(us, 99):.0f} us "
+          f"| rebuild per query: {rebuild:,.0f} us")
+
+    found = sum(g.pass_through_depth(acc, amount, now=t) >= 2 for acc, t, amount in mules)
+    noise = sum(g.features(s, d, a, now=t)["pass_through_depth"] >= 2 for s, d, t, a in picks)
+    print(f"pass-through depth >= 2: {found}/{len(mules)} injected chains, {noise}/{len(picks)} random transfers")
+
+    mismatches = 0
+    for s, d, t, a in picks[:args.check]:
+        f = g.features(s, d, a, now=now)
+        expect = brute_force(edges, s, d, now)
+        mismatches += (f["sender_fan_out_24h"], f["receiver_fan_in_24h"], f["reverse_edge"]) != expect
+    print(f"brute-force check: {args.check - mismatches}/{args.check} match")
@@ -0,0 +1,76 @@
+"""
+Transfer verification: time until the PIN gate can render, blocking vs background scoring.
+
+    python benchmarks/bench_transfer_verify.py --runs 200
+
+"blocking" is the old Verify Recipient handler: lookup, step, rule context
+and the fraud score one after another. "background" waits only for the
+recipient lookup (scoring continues in transfer_page's executor); the
+time until its score is ready is reported too. Uses the accounts in
+user_data.txt (read only).
+"""
+import os
+import io
+import sys
+import time
+import argparse
+import contextlib
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+with contextlib.redirect_stdout(io.StringIO()):
+    import data_manager as dm
+    import fraud_service as fs
+    import transfer_page
+    fs.fe.warm_up(background=False)
+
+
+def blocking(user, receiver_acc, amount):
+    recipient = dm.get_user(account_no=receiver_acc)
+    return transfer_page._score_transfer(user, receiver_acc, amount, _Done(recipient))
+
+
+class _Done:
+    def __init__(self, value):
+        self.value = value
+
+    def result(self, timeout=None):
+        return self.value
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=200)
+    args = ap.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        dm.init_db()
+        users = dm.get_users()
+    if len(users) < 2:
+        sys.exit("needs at least two accounts in user_data.txt")
+    sender, receiver = users[0], users[1]['account_no']
+
+    gate_block, gate_bg, ready_bg = [], [], []
+    for i in range(args.runs):
+        amount = 1000.0 + i
+        t0 = time.perf_counter()
+        blocking(sender, receiver, amount)
+        gate_block.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        lookup = transfer_page._executor.submit(dm.get_user, account_no=receiver)
+        score = transfer_page._executor.submit(transfer_page._score_transfer, dict(sender), receiver, amount + 0.5,
+                                               lookup)
+        lookup.result()
+        gate_bg.append(time.perf_counter() - t0)
+        score.result()
+        ready_bg.append(time.perf_counter() - t0)
+
+    print(f"{'':<28} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, xs in (("blocking: PIN gate", gate_block), ("background: PIN gate", gate_bg),
+                      ("background: score ready", ready_bg)):
+        ms = np.array(xs) * 1e3
+        print(f"{label:<28} {np.percentile(ms, 50):>8.2f} {np.percentile(ms, 99):>8.2f}")
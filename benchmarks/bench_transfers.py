@@ -0,0 +1,69 @@
+"""
+Transfers per second vs. number of accounts.
+
+    python benchmarks/bench_transfers.py --accounts 1000 10000 100000 1000000
+
+Each transfer is a debit + credit point update (two small fsync'd update
+records). The legacy column re-creates the old behaviour of rewriting the
+whole user file per balance change, and is skipped above --legacy-max.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import storage_engine as se
+from bench_storage import write_users
+
+
+def point_tps(path, n, seconds, durable):
+    se.DURABLE = durable
+    users = se.UserTable(path)
+    users.count()
+    rnd = random.Random(7)
+    done, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        a, b = rnd.randrange(n), rnd.randrange(n)
+        users.increment(f"BOP-{10000000 + a}", "balance", -1.0)
+        users.increment(f"BOP-{10000000 + b}", "balance", 1.0)
+        done += 1
+    return done / (time.perf_counter() - t0)
+
+
+def legacy_tps(path, n, seconds):
+    rnd = random.Random(7)
+    done, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        for acc, delta in ((rnd.randrange(n), -1.0), (rnd.randrange(n), 1.0)):
+            with open(path, "rb") as f:
+                rows = [se.parse_line(l) for l in f if l.strip()]
+            rows[acc]["balance"] += delta
+            with open(path, "wb") as f:
+                for r in rows:
+                    f.write(se.dump_line(r))
+        done += 1
+    return done / (time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--accounts", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--seconds", type=float, default=2.0)
+    ap.add_argument("--legacy-max", type=int, default=10000)
+    args = ap.parse_args()
+
+    print(f"{'accounts':>10} {'point+fsync':>12} {'point':>10} {'legacy':>10}   (transfers/sec)")
+    for n in args.accounts:
+        tmp = tempfile.mkdtemp(prefix="bank_bench_")
+        path = os.path.join(tmp, "users.txt")
+        write_users(path, n)
+        durable = point_tps(path, n, args.seconds, True)
+        fast = point_tps(path, n, args.seconds, False)
+        legacy = f"{legacy_tps(path, n, args.seconds):>10.1f}" if n <= args.legacy_max else f"{'-':>10}"
+        print(f"{n:>10,} {durable:>12.1f} {fast:>10.1f} {legacy}")
+        for name in os.listdir(tmp):
+            os.remove(os.path.join(tmp, name))
+        os.rmdir(tmp)
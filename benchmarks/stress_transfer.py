@@ -0,0 +1,74 @@
+"""
+Multi-threaded transfer stress test: total money must be conserved.
+
+    python benchmarks/stress_transfer.py --threads 32 --accounts 50 --transfers 200
+
+Runs data_manager.transfer() from many threads (like concurrent Streamlit
+sessions) against a temp copy of the bank, then checks that the sum of all
+balances is unchanged, that no balance went negative and that the ledger has
+exactly one line per successful transfer, both in memory and after a reload.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=32)
+    ap.add_argument("--accounts", type=int, default=50)
+    ap.add_argument("--transfers", type=int, default=200, help="per thread")
+    args = ap.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bank_stress_"))
+    import data_manager as dm
+    import storage_engine as se
+    se.DURABLE = False
+
+    accounts = []
+    for i in range(args.accounts):
+        ok, _ = dm.save_user({"f_name": "u", "l_name": str(i), "cnic": str(3000000000000 + i),
+                              "email": f"s{i}@bank.com", "pin": "1234"})
+        accounts.append(dm.get_user(cnic=str(3000000000000 + i))["account_no"])
+        dm.update_balance(accounts[-1], 1000)
+    start_total = sum(u["balance"] for u in dm.get_users())
+    start_rows = len(dm.get_transactions())
+
+    ok_count = [0] * args.threads
+
+    def worker(k):
+        rnd = random.Random(k)
+        for _ in range(args.transfers):
+            a, b = rnd.sample(accounts, 2)
+            ok, _ = dm.transfer(a, b, rnd.randint(1, 300))
+            ok_count[k] += ok
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(args.threads)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - t0
+
+    done = sum(ok_count)
+    attempted = args.threads * args.transfers
+    print(f"{done}/{attempted} transfers succeeded in {elapsed:.2f}s ({attempted / elapsed:.0f}/s)")
+
+    fresh = se.UserTable(dm.FILE)
+    for label, users in (("memory", dm.get_users()), ("reload", fresh.all())):
+        total = round(sum(u["balance"] for u in users), 2)
+        assert total == start_total, f"{label}: money not conserved {total} != {start_total}"
+        assert min(u["balance"] for u in users) >= 0, f"{label}: negative balance"
+    rows = len(se.Ledger(dm.TRANS_FILE).all()) - start_rows
+    assert rows == done, f"ledger has {rows} transfer rows, expected {done}"
+    print(f"OK: total Rs. {start_total:,.2f} conserved, ledger rows match")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,8 +16,7 @@ def show():
         return
 
     # 3. Refresh user data
-    all_users = dm.get_users()
-    current_user = next((u for u in all_users if u['account_no'] == user_data['account_no']), user_data)
+    current_user = dm.get_user(account_no=user_data['account_no']) or user_data
     st.session_state.logged_in_user = current_user 
 
     # --- AI CONTEXT TRIGGER ---
@@ -88,7 +87,7 @@ def show():
             data, _, _ = detector.detectAndDecode(opencv_img)
 
             if data:
-                target_user = next((u for u in dm.get_users() if u['account_no'] == data), None)
+                target_user = dm.get_user(account_no=data)
                 if target_user:
                     st.success("✅ Recipient Found")
                     st.table({
@@ -114,20 +113,18 @@ def show():
                     
                     if st.button("🚀 Confirm & Send Money", use_container_width=True):
                         if str(current_user['pin']) == str(pin):
-                            if user_balance >= amt and dm.update_balance(current_user['account_no'], amt, is_deposit=False):
-                                dm.update_balance(target_user['account_no'], amt, is_deposit=True)
-                                
-                                # Category "Transfer" added for EDA
-                                dm.record_transaction(
-                                    "QR Transfer", amt, current_user['account_no'], 
-                                    receiver_acc=target_user['account_no'], 
-                                    receiver_name=target_user.get('user_name', target_user.get('f_name')),
-                                    category="Transfer"
-                                )
+                            # Category "Transfer" added for EDA
+                            ok, t_msg = dm.transfer(
+                                current_user['account_no'], target_user['account_no'], amt,
+                                t_type="QR Transfer",
+                                receiver_name=target_user.get('user_name', target_user.get('f_name')),
+                                category="Transfer"
+                            )
+                            if ok:
                                 st.success(f"Successfully sent Rs.{amt} to {target_user.get('f_name')}")
                                 st.balloons()
                                 st.rerun()
-                            else: st.error("Transaction Failed! Low Balance or System Error.")
+                            else: st.error(f"Transaction Failed! {t_msg}")
                         else: st.error("Incorrect PIN!")
                 else:
                     st.error("❌ User does not exist in our records.")
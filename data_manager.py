@@ -1,7 +1,16 @@
 import os
-import ast
-import random
-from datetime import datetime
+import threading
+import uuid
+import zlib
+from collections import deque, OrderedDict
+from datetime import datetime, timedelta
+import storage_engine as se
+import log_segments
+from log_writer import writer as _log_writer
+import txn_columns
+import feature_store
+import transfer_graph
+import record_codec as codec
 
 # Filenames
 FILE = "user_data.txt"
@@ -9,6 +18,34 @@ TRANS_FILE = "transactions.txt"
 ACTIVITY_FILE = "activity_logs.txt"  
 SENTIMENT_FILE = "sentiment_logs.txt" 
 
+# Growing logs rotate into compressed segments (see log_segments.py)
+_ledger_segments = log_segments.SegmentedLog(TRANS_FILE, "date", ("sender", "receiver_acc"))
+_activity_log = log_segments.SegmentedLog(ACTIVITY_FILE, "timestamp", ("account_no",))
+_sentiment_log = log_segments.SegmentedLog(SENTIMENT_FILE, "timestamp", ("account_no",))
+
+# In-memory indexed views over the append-only files (see storage_engine.py)
+_users = se.UserTable(FILE)
+_ledger = se.Ledger(TRANS_FILE, segments=_ledger_segments)
+_columns = txn_columns.TxnColumns(_ledger)   # reads only the ledger tail after its watermark
+_features = feature_store.FeatureStore()
+_ledger.subscribe(_features.add, _features.reset)
+_graph = transfer_graph.TransferGraph()
+_ledger.subscribe(_graph.add, _graph.reset)
+
+# Per-account locks (striped so memory stays fixed); always taken in stripe order
+LOCK_STRIPES = 1024
+_account_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+_recovered = False
+# Ledger rows may be dated a little out of order (clock changes); recovery looks back this far
+RECOVERY_WINDOW = timedelta(days=1)
+
+# Recent activities per account (newest last), kept warm by log_activity
+RECENT_ACTIVITY_DEPTH = 10
+RECENT_ACTIVITY_ACCOUNTS = 10000
+_recent_activity = OrderedDict()
+_recent_activity_lock = threading.Lock()
+_recent_activity_loading = {}   # account_no -> Event while one reader loads it from the log
+
 def init_db():
     """Ensures necessary files exist."""
     if not os.path.exists(FILE):
@@ -21,13 +58,29 @@ def init_db():
         with open(SENTIMENT_FILE, "w") as f: pass
     if not os.path.exists("data"):
         os.makedirs("data")
+    _recover_transfers()
+
+def _recover_transfers():
+    """Redo: a transfer whose balances were written but whose ledger line was lost (crash) gets its line now."""
+    global _recovered
+    if _recovered: return
+    _recovered = True
+    pending = [b for b in _users.recent_batches() if 'entry' in b]
+    if not pending: return
+    # Sirf ledger ki tail parhi jati hai: sab se purani batch ki date se RECOVERY_WINDOW pehle tak
+    oldest = datetime.strptime(min(b['entry']['date'] for b in pending), "%Y-%m-%d %H:%M:%S")
+    found = _ledger.find_txns([b['txn_id'] for b in pending],
+                              since=(oldest - RECOVERY_WINDOW).strftime("%Y-%m-%d %H:%M:%S"))
+    for batch in pending:
+        if batch['txn_id'] not in found:
+            _ledger.append(batch['entry'])
 
 # --- FRAUD DETECTION SUPPORT ---
 
 def get_current_step():
-    """XGBoost step logic: Total transactions + 1."""
-    transactions = get_transactions()
-    return len(transactions) + 1
+    """XGBoost step logic: Total transactions + 1 (ledger sequence counter, no file scan)."""
+    init_db()
+    return _ledger.last_seq() + 1
 
 # --- SENTIMENT LOGGING ---
 
@@ -43,20 +96,14 @@ def log_sentiment(account_no, user_name, message, sentiment, confidence, importa
         "action": action
     }
     try:
-        with open(SENTIMENT_FILE, "a") as f:
-            f.write(str(entry) + "\n")
+        _log_writer.write(_sentiment_log, codec.encode(entry) + b"\n")
     except: pass
 
 def get_sentiment_logs():
-    logs = []
-    if not os.path.exists(SENTIMENT_FILE): return []
     try:
-        with open(SENTIMENT_FILE, "r") as f:
-            for line in f:
-                if line.strip():
-                    logs.append(ast.literal_eval(line.strip()))
-    except: pass
-    return logs
+        _log_writer.flush()
+        return list(_sentiment_log.iter_records())
+    except: return []
 
 # --- ACTIVITY LOGGING ---
 
@@ -66,104 +113,130 @@ def log_activity(account_no, activity_text):
         "account_no": account_no,
         "activity": activity_text
     }
-    try:
-        with open(ACTIVITY_FILE, "a") as f:
-            f.write(str(entry) + "\n")
-    except: pass
+    data = codec.encode(entry) + b"\n"
+    while True:
+        with _recent_activity_lock:
+            loading = _recent_activity_loading.get(account_no)
+            if loading is None:
+                # Enqueue aur buffer update ek saath, taake reader ka log read aur buffer kabhi alag na hon
+                try:
+                    _log_writer.write(_activity_log, data)
+                except: return
+                # Only warm buffers are extended; a cold account is loaded from the file on first read
+                if account_no in _recent_activity:
+                    _recent_activity[account_no].append(activity_text)
+                return
+        loading.wait()  # this account is being loaded from the log right now
 
 def get_recent_activities(account_no, limit=3):
+    """Newest-first activities of one account: ring buffer hit, or a backwards read of the log."""
+    while True:
+        with _recent_activity_lock:
+            buf = _recent_activity.get(account_no)
+            if buf is not None and limit <= RECENT_ACTIVITY_DEPTH:
+                _recent_activity.move_to_end(account_no)
+                return list(reversed(buf))[:limit]
+            loading = _recent_activity_loading.get(account_no)
+            if loading is None:
+                # Is account ke naye log_activity calls read khatam hone tak rukenge
+                loading = _recent_activity_loading[account_no] = threading.Event()
+                break
+        loading.wait()  # another session is loading it; then retry the buffer
     activities = []
     try:
-        if os.path.exists(ACTIVITY_FILE):
-            with open(ACTIVITY_FILE, "r") as f:
-                lines = f.readlines()
-                for line in reversed(lines):
-                    act = ast.literal_eval(line.strip())
-                    if act['account_no'] == account_no:
-                        activities.append(act['activity'])
-                    if len(activities) >= limit: break
-    except: pass
-    return activities
+        _log_writer.flush()
+        try:
+            # Newest first; sealed segments whose bloom filter lacks this account are skipped
+            for act in _activity_log.iter_records_reversed(key=account_no):
+                activities.append(act['activity'])
+                if len(activities) >= max(limit, RECENT_ACTIVITY_DEPTH): break
+        except: pass
+        with _recent_activity_lock:
+            _recent_activity[account_no] = deque(reversed(activities[:RECENT_ACTIVITY_DEPTH]), maxlen=RECENT_ACTIVITY_DEPTH)
+            _recent_activity.move_to_end(account_no)
+            while len(_recent_activity) > RECENT_ACTIVITY_ACCOUNTS:
+                _recent_activity.popitem(last=False)
+    finally:
+        with _recent_activity_lock:
+            del _recent_activity_loading[account_no]
+        loading.set()
+    return activities[:limit]
 
 # --- CHAT HISTORY ---
 
 def save_chat_message(account_no, role, message):
     history_file = f"data/chat_history_{account_no}.txt"
     entry = {"role": role, "content": message, "time": datetime.now().strftime("%H:%M")}
-    with open(history_file, "a") as f:
-        f.write(str(entry) + "\n")
+    _log_writer.write(history_file, codec.encode(entry) + b"\n")
 
 def get_chat_history(account_no, limit=10):
     history_file = f"data/chat_history_{account_no}.txt"
+    _log_writer.flush()
     if not os.path.exists(history_file): return []
     messages = []
-    with open(history_file, "r") as f:
+    with open(history_file, "rb") as f:   # bytes: binary-codec lines must not be decoded as text
         lines = f.readlines()
         for line in lines[-limit:]:
-            messages.append(ast.literal_eval(line.strip()))
+            messages.append(codec.decode(line))
     return messages
 
 # --- PURANA CODE (FIXED & UNCHANGED) ---
 
 def get_users():
     init_db()
-    users = []
     try:
-        with open(FILE, "r") as f:
-            for line in f:
-                if line.strip():
-                    user_dict = ast.literal_eval(line.strip())
-                    if 'balance' not in user_dict: user_dict['balance'] = 0.0
-                    if 'failed_tries' not in user_dict: user_dict['failed_tries'] = 0
-                    if 'is_locked' not in user_dict: user_dict['is_locked'] = False
-                    if 'face_id' not in user_dict: user_dict['face_id'] = None
-                    users.append(user_dict)
+        return _users.all()
     except Exception as e: 
         return []
-    return users
+
+def get_user(account_no=None, email=None, cnic=None):
+    """Indexed single-user lookup (account_no, email ya cnic). Returns None if not found."""
+    init_db()
+    return _users.get(account_no=account_no, email=email, cnic=cnic)
 
 def get_next_face_id():
-    users = get_users()
-    if not users: return 101
-    ids = [int(u['face_id']) for u in users if u.get('face_id') is not None]
-    if not ids: return 101
-    return max(ids) + 1
+    init_db()
+    return _users.next_face_id()
 
 def save_user(data):
-    users = get_users()
-    if any(str(u['cnic']) == str(data['cnic']) for u in users):
-        return False, "An account with this CNIC already exists."
-    if any(u['email'].lower() == data['email'].lower() for u in users):
-        return False, "This email is already registered."
-    data['account_no'] = generate_unique_account_no()
-    if 'face_id' not in data: data['face_id'] = get_next_face_id()
+    init_db()
     if 'balance' not in data: data['balance'] = 0.0 
     try:
-        with open(FILE, "a") as f:
-            f.write(str(data) + "\n")
-        log_activity(data['account_no'], "Account Created and Registered")
-        return True, f"Account Created! Your Account No is: {data['account_no']}"
+        # Uniqueness (CNIC/email) + account_no/face_id allocation happen in one indexed step
+        account_no, taken = _users.create(data)
+        if taken == 'cnic':
+            return False, "An account with this CNIC already exists."
+        if taken == 'email':
+            return False, "This email is already registered."
+        log_activity(account_no, "Account Created and Registered")
+        return True, f"Account Created! Your Account No is: {account_no}"
     except Exception as e:
         return False, f"Error: {str(e)}"
 
 def generate_unique_account_no():
-    users = get_users()
-    existing_nos = [u.get('account_no') for u in users]
-    while True:
-        new_no = f"BOP-{random.randint(10000000, 99999999)}"
-        if new_no not in existing_nos: return new_no
+    init_db()
+    return _users.new_account_no()
 
 # --- ✅ FINAL BULLET-PROOF UPDATE ---
 def record_transaction(t_type="Transaction", amount=0.0, sender_acc=None, **kwargs):
     """
     PURANA CODE UNCHANGED: Handles category for EDA analysis.
     """
+    log_entry = _make_entry(t_type, amount, sender_acc, **kwargs)
+    
+    init_db()
+    _ledger.append(log_entry)
+    
+    if log_entry['sender']:
+        log_activity(log_entry['sender'], f"{log_entry['status']} {log_entry['type']} of Rs.{log_entry['amount']}")
+
+def _make_entry(t_type="Transaction", amount=0.0, sender_acc=None, **kwargs):
     final_sender = kwargs.get('account_no', sender_acc)
     final_type = kwargs.get('t_type', t_type)
     final_amount = kwargs.get('amount', amount)
     
     # --- ADDED CATEGORY LOGIC HERE ---
-    log_entry = {
+    return {
         "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "type": final_type, 
         "amount": float(final_amount),
@@ -173,65 +246,107 @@ def record_transaction(t_type="Transaction", amount=0.0, sender_acc=None, **kwar
         "status": kwargs.get('status', "Success"),
         "category": kwargs.get('category', "General") # <--- Line added as requested
     }
-    
-    with open(TRANS_FILE, "a") as f:
-        f.write(str(log_entry) + "\n")
-    
-    if final_sender:
-        log_activity(final_sender, f"{log_entry['status']} {final_type} of Rs.{final_amount}")
 
-def get_transactions():
+def _locks_for(*account_nos):
+    stripes = sorted({zlib.crc32(str(acc).encode()) % LOCK_STRIPES for acc in account_nos})
+    return [_account_locks[i] for i in stripes]
+
+def transfer(sender, receiver, amount, t_type="Transfer", **meta):
+    """
+    Atomic debit + credit + ledger entry. Locks both accounts (fixed order, so no
+    deadlocks) and writes both balances as one log line. Returns (ok, message).
+    meta: receiver_name, category, status ... (same as record_transaction).
+    """
     init_db()
-    transactions = []
+    amount = round(float(amount), 2)
+    if amount <= 0:
+        return False, "Amount must be greater than 0."
+    if sender == receiver:
+        return False, "You cannot transfer to your own account."
+    locks = _locks_for(sender, receiver)
+    for lock in locks: lock.acquire()
     try:
-        with open(TRANS_FILE, "r") as f:
-            for line in f:
-                if line.strip():
-                    transactions.append(ast.literal_eval(line.strip()))
+        src = _users.get(account_no=sender)
+        dst = _users.get(account_no=receiver)
+        if src is None or dst is None:
+            return False, "Account not found."
+        if src.get('is_locked'):
+            return False, "ACCOUNT BLOCKED: Please reset your PIN."
+        if float(src['balance']) < amount:
+            return False, f"Insufficient Balance. Available: Rs. {float(src['balance']):,.2f}"
+        entry = _make_entry(t_type, amount, sender, receiver_acc=receiver, **meta)
+        entry['txn_id'] = uuid.uuid4().hex
+        updates = {
+            sender: {'balance': round(float(src['balance']) - amount, 2)},
+            receiver: {'balance': round(float(dst['balance']) + amount, 2)},
+        }
+        if not _users.update_many(updates, txn_id=entry['txn_id'], entry=entry):
+            return False, "Account not found."
+        _ledger.append(entry)
+        _users.confirm(entry['txn_id'])
+    finally:
+        for lock in reversed(locks): lock.release()
+    _users.maybe_compact()
+    log_activity(sender, f"{entry['status']} {entry['type']} of Rs.{amount}")
+    return True, f"Successfully transferred Rs. {amount}"
+
+def get_transactions(account_no=None):
+    """All transactions, or only those where account_no is sender/receiver (indexed)."""
+    init_db()
+    try:
+        if account_no is not None:
+            return _ledger.for_account(account_no)
+        return _ledger.all()
     except: return []
-    return transactions
+
+def get_account_transactions(account_no, since=None, until=None, types=None):
+    """One account's transactions as a DataFrame, read from its column file (see txn_columns.py)."""
+    init_db()
+    return _columns.query(account_no, since=since, until=until, types=types)
+
+def get_account_features(account_no, now=None):
+    """Rolling behavioural features for fraud scoring (1h/24h windows, fan-out, recency); O(1) per call."""
+    init_db()
+    _ledger.sync()
+    return _features.features(account_no, now=now)
+
+def get_fraud_context(account_no, receiver_acc=None, amount=None):
+    """
+    Inputs for fraud_engine.RULES: rolling features, lock state, whether the recipient is new
+    and transfer-graph features (fan-in/out, cycles, pass-through chains; see transfer_graph.py).
+    """
+    context = get_account_features(account_no)
+    user = _users.get(account_no=account_no) or {}
+    context['is_locked'] = bool(user.get('is_locked'))
+    if receiver_acc is not None:
+        context['recipient_new'] = not _features.has_sent_to(account_no, receiver_acc)
+    context.update(_graph.features(account_no, receiver_acc, amount))
+    return context
+
+def get_transfer_graph_stats():
+    init_db()
+    _ledger.sync()
+    return _graph.stats()
 
 def update_balance(account_no, amount, is_deposit=True):
-    users = get_users()
-    updated = False
-    for u in users:
-        if u['account_no'] == account_no:
-            if is_deposit:
-                u['balance'] = round(float(u['balance']) + float(amount), 2)
-            else:
-                u['balance'] = round(float(u['balance']) - float(amount), 2)
-            updated = True
-            break
-    if updated:
-        with open(FILE, "w") as f:
-            for u in users: f.write(str(u) + "\n")
-        return True
-    return False
+    init_db()
+    delta = float(amount) if is_deposit else -float(amount)
+    with _locks_for(account_no)[0]:
+        return _users.increment(account_no, 'balance', delta) is not None
 
 def update_security_status(email, tries, lock=False):
-    users = get_users()
-    for u in users:
-        if u['email'].lower() == email.lower():
-            u['failed_tries'] = tries
-            u['is_locked'] = lock
-            if lock: log_activity(u['account_no'], "Account Locked due to Security/Fraud Alert")
-            break
-    with open(FILE, "w") as f:
-        for u in users: f.write(str(u) + "\n")
+    init_db()
+    u = _users.get(email=email)
+    if u is None:
+        return
+    _users.update(u['account_no'], failed_tries=tries, is_locked=lock)
+    if lock: log_activity(u['account_no'], "Account Locked due to Security/Fraud Alert")
 
 def update_pin(cnic, new_pin):
-    users = get_users()
-    updated = False
-    for u in users:
-        if str(u['cnic']) == str(cnic):
-            u['pin'] = str(new_pin)
-            u['is_locked'] = False
-            u['failed_tries'] = 0
-            updated = True
-            log_activity(u['account_no'], "PIN Reset Successful")
-            break
-    if updated:
-        with open(FILE, "w") as f:
-            for u in users: f.write(str(u) + "\n")
-        return True
-    return False
\ No newline at end of file
+    init_db()
+    u = _users.get(cnic=cnic)
+    if u is None:
+        return False
+    _users.update(u['account_no'], pin=str(new_pin), is_locked=False, failed_tries=0)
+    log_activity(u['account_no'], "PIN Reset Successful")
+    return True
\ No newline at end of file
@@ -1,5 +1,6 @@
 import streamlit as st
 import data_manager as dm
+import fraud_metrics as fm
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -14,19 +15,16 @@ def show():
     st.header("📊 Financial & Sentiment Analytics")
     
     # Tabs for organization
-    tab1, tab2 = st.tabs(["💰 Financial EDA", "🤖 Sentiment Monitoring"])
+    tab1, tab2, tab3 = st.tabs(["💰 Financial EDA", "🤖 Sentiment Monitoring", "🛡️ Fraud Monitoring"])
 
     with tab1:
         # --- FINANCIAL EDA SECTION ---
-        all_trans = dm.get_transactions()
-        user_trans = [t for t in all_trans if t['sender'] == user['account_no'] or t['receiver_acc'] == user['account_no']]
+        # Columnar per-account partitions, already typed (date/amount)
+        df = dm.get_account_transactions(user['account_no'])
 
-        if not user_trans:
+        if df.empty:
             st.info("Insufficient data for financial analysis.")
         else:
-            df = pd.DataFrame(user_trans)
-            df['date'] = pd.to_datetime(df['date'])
-            df['amount'] = df['amount'].astype(float)
             df['day_name'] = df['date'].dt.day_name()
 
             # Top Metrics
@@ -155,6 +153,69 @@ def show():
                 st.write("**Sentiment Drift (Timeline)**")
                 st.line_chart(data=user_logs, x='timestamp', y='sentiment')
 
+    with tab3:
+        # --- FRAUD SCORING MONITOR (in-process fraud_metrics snapshot) ---
+        st.subheader("🛡️ Fraud Scoring Health")
+        snap = fm.metrics.snapshot()
+
+        if not snap['latency']:
+            st.info("No transactions scored since the app started.")
+        else:
+            totals = pd.DataFrame(snap['decisions']).T.reindex(columns=fm.OUTCOMES).fillna(0).astype(int)
+            scored = int(totals.values.sum())
+            flagged = int(totals['flagged'].sum() + totals['fraud_rule'].sum())
+            by_rules = int(totals['fraud_rule'].sum() + totals['safe_rule'].sum())
+            single = snap['latency'].get('single') or next(iter(snap['latency'].values()))
+
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("Scored", f"{scored:,}")
+            m2.metric("Flagged", f"{flagged / scored:.1%}" if scored else "-")
+            m3.metric("Decided by Rules", f"{by_rules / scored:.1%}" if scored else "-")
+            m4.metric("p99 Latency", f"{single['p99_us'] / 1000:,.1f} ms" if single['p99_us'] else "-")
+
+            st.divider()
+
+            # --- LATENCY HISTOGRAMS (per call path) ---
+            st.write("### ⏱️ Scoring Latency")
+            edges = [f"≤{b / 1000:g} ms" for b in fm.LATENCY_BUCKETS_US] + ["more"]
+            lat_df = pd.DataFrame({path: h['counts'] for path, h in snap['latency'].items()}, index=edges)
+            st.bar_chart(lat_df[(lat_df > 0).any(axis=1)])
+            st.table(pd.DataFrame({path: {k: h[k] for k in ('calls', 'rows', 'p50_us', 'p90_us', 'p99_us')}
+                                   for path, h in snap['latency'].items()}).T)
+
+            # --- SCORE HISTOGRAMS (model scores by transaction type) ---
+            st.write("### 🎯 Risk Score Distribution by Type")
+            if snap['score_histograms']:
+                bins = [f"{i / fm.SCORE_BINS:.2f}" for i in range(fm.SCORE_BINS)]
+                st.bar_chart(pd.DataFrame(snap['score_histograms'], index=bins))
+            st.write("**Decisions by Type**")
+            st.table(totals)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                # --- THRESHOLD HITS ---
+                st.write("**Threshold Hits**")
+                if snap['thresholds']:
+                    st.table(pd.DataFrame(snap['thresholds']).T.astype({'scored': int, 'hit': int}))
+            with col2:
+                # --- DRIFT (rolling window vs baseline) ---
+                drift = snap['drift']
+                st.write("**Score Drift (PSI / KS)**")
+                if drift.get('psi') is None:
+                    st.info(f"Collecting baseline: {drift['baseline_rows']:,} / {fm.BASELINE_SIZE:,} model scores, "
+                            f"window {drift['window_rows']:,}.")
+                else:
+                    if drift['status'] == "significant":
+                        st.error(f"PSI {drift['psi']:.3f}, KS {drift['ks']:.3f}: score distribution has shifted.")
+                    elif drift['status'] == "moderate":
+                        st.warning(f"PSI {drift['psi']:.3f}, KS {drift['ks']:.3f}: moderate drift.")
+                    else:
+                        st.success(f"PSI {drift['psi']:.3f}, KS {drift['ks']:.3f}: stable.")
+                    st.table(pd.DataFrame(drift['by_type']).T[['psi', 'ks', 'window_rows', 'status']])
+
+            st.caption(f"Model {snap['drift']['model_version']} · errors: {snap['errors']} · "
+                       f"exported to {fm.METRICS_FILE}")
+
     st.divider()
     if st.button("⬅️ Back to Dashboard"):
         st.session_state.page = "Dashboard"
@@ -0,0 +1,104 @@
+import os
+import math
+import threading
+
+import cv2
+import numpy as np
+
+# ========================================================
+# Face detection (shared by signup, face login and PIN reset)
+# ========================================================
+# Pehle har page har camera frame par haarcascade XML se naya
+# CascadeClassifier banata tha aur poori resolution par detectMultiScale
+# chalata tha. Ab detector process mein ek dafa load hota hai, frame ki
+# chhoti copy (DETECT_WIDTH) par detection hoti hai aur boxes wapas poori
+# resolution par map hote hain. MIN_FACE se chhote chehre detector ke andar
+# hi reject ho jate hain. Optional DNN backend (OpenCV FaceDetectorYN /
+# YuNet ONNX model) FACE_DETECTOR=dnn se; model file na mile to Haar.
+
+MIN_FACE = 80                      # px at full resolution; smaller faces are "too far"
+DETECT_WIDTH = 320                 # frames wider than this are downscaled for detection
+SCALE_FACTOR = 1.3
+MIN_NEIGHBORS = 5
+CASCADE_FILE = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+BACKEND = os.environ.get("FACE_DETECTOR", "haar")     # "haar" or "dnn"
+DNN_MODEL = os.environ.get("FACE_DNN_MODEL", os.path.join("models", "face_detection_yunet_2023mar.onnx"))
+DNN_SCORE = 0.8
+
+_detectors = {}
+_lock = threading.Lock()
+
+
+class HaarDetector:
+    name = "haar"
+
+    def __init__(self, path=CASCADE_FILE):
+        self.cascade = cv2.CascadeClassifier(path)
+        if self.cascade.empty():
+            raise ValueError(f"could not load cascade {path}")
+        self._lock = threading.Lock()   # detectMultiScale keeps per-call state in the classifier
+
+    def detect(self, gray, min_size):
+        with self._lock:
+            faces = self.cascade.detectMultiScale(gray, SCALE_FACTOR, MIN_NEIGHBORS, minSize=(min_size, min_size))
+        return np.asarray(faces, dtype=np.float64).reshape(-1, 4)
+
+
+class DnnDetector:
+    name = "dnn"
+
+    def __init__(self, path=DNN_MODEL, score=DNN_SCORE):
+        self.net = cv2.FaceDetectorYN.create(path, "", (DETECT_WIDTH, DETECT_WIDTH), score)
+        self._lock = threading.Lock()
+
+    def detect(self, gray, min_size):
+        bgr = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+        with self._lock:
+            self.net.setInputSize((bgr.shape[1], bgr.shape[0]))
+            _, faces = self.net.detect(bgr)
+        if faces is None:
+            return np.zeros((0, 4))
+        boxes = faces[:, :4].astype(np.float64)
+        return boxes[(boxes[:, 2] >= min_size) & (boxes[:, 3] >= min_size)]
+
+
+def get_detector(backend=None):
+    """The process-wide detector for backend (default BACKEND); dnn falls back to haar without its model."""
+    backend = backend or BACKEND
+    with _lock:
+        det = _detectors.get(backend)
+        if det is None:
+            if backend == "dnn" and os.path.exists(DNN_MODEL):
+                try:
+                    det = DnnDetector()
+                except cv2.error:
+                    det = None
+            if det is None:
+                det = _detectors.get("haar") or HaarDetector()
+                _detectors["haar"] = det
+            _detectors[backend] = det
+        return det
+
+
+def detect_faces(gray, min_size=MIN_FACE, detect_width=DETECT_WIDTH, backend=None):
+    """
+    Face boxes (x, y, w, h) in full-resolution pixels, largest first. Detection runs on a copy
+    downscaled to detect_width (None: full resolution); boxes under min_size are dropped.
+    """
+    gray = np.asarray(gray, dtype=np.uint8)
+    rows, cols = gray.shape[:2]
+    scale = 1.0
+    small = gray
+    if detect_width and cols > detect_width:
+        scale = detect_width / cols
+        small = cv2.resize(gray, (detect_width, max(1, round(rows * scale))), interpolation=cv2.INTER_AREA)
+    boxes = get_detector(backend).detect(small, max(1, math.floor(min_size * scale)))
+
+    faces = []
+    for x, y, w, h in boxes / scale:
+        x0, y0 = max(0, int(round(x))), max(0, int(round(y)))
+        x1, y1 = min(cols, int(round(x + w))), min(rows, int(round(y + h)))
+        if x1 - x0 >= min_size and y1 - y0 >= min_size:
+            faces.append((x0, y0, x1 - x0, y1 - y0))
+    faces.sort(key=lambda f: f[2] * f[3], reverse=True)
+    return faces
@@ -0,0 +1,140 @@
+import numpy as np
+
+# ========================================================
+# LBPH face matching with NumPy (precomputed histogram templates)
+# ========================================================
+# cv2.face.LBPHFaceRecognizer har stored sample ke histogram se probe ko
+# ek ek kar ke compare karta hai. Yahan wahi LBP (radius 1, 8 neighbours,
+# 8x8 grid, OpenCV wali bilinear interpolation) NumPy mein hai; user ke
+# saare histograms ek contiguous float32 matrix (.npy, mmap ho sakti hai)
+# ke columns hain aur chi-square distance ek hi vectorized operation mein nikalta hai.
+# predict() ka jawab (label, distance) LBPH ke predict() jaisa hai, is liye
+# pages ki "confidence < 35" shart wahi rehti hai.
+
+RADIUS = 1
+NEIGHBORS = 8
+GRID_X = 8
+GRID_Y = 8
+N_PATTERNS = 2 ** NEIGHBORS
+HIST_SIZE = GRID_X * GRID_Y * N_PATTERNS
+
+_EPS = np.finfo(np.float32).eps
+
+
+def _offsets():
+    """
+    Bilinear sample terms (dy, dx, weight) per neighbour, exactly as OpenCV's elbp computes them
+    (float32). Zero-weight terms are dropped: adding 0 * pixel never changes a float sum.
+    """
+    points = []
+    one = np.float32(1)
+    for n in range(NEIGHBORS):
+        x = np.float32(RADIUS * np.cos(2.0 * np.pi * n / np.float32(NEIGHBORS)))
+        y = np.float32(-RADIUS * np.sin(2.0 * np.pi * n / np.float32(NEIGHBORS)))
+        fx, fy = int(np.floor(x)), int(np.floor(y))
+        cx, cy = int(np.ceil(x)), int(np.ceil(y))
+        ty, tx = np.float32(y - fy), np.float32(x - fx)
+        terms = ((fy, fx, (one - tx) * (one - ty)), (fy, cx, tx * (one - ty)),
+                 (cy, fx, (one - tx) * ty), (cy, cx, tx * ty))
+        points.append([(dy, dx, w) for dy, dx, w in terms if w != 0])
+    return points
+
+
+_POINTS = _offsets()
+
+
+def lbp(gray):
+    """Extended LBP codes of a uint8 image (border of RADIUS pixels dropped), as int32."""
+    src = np.asarray(gray, dtype=np.uint8)
+    rows, cols = src.shape
+    r = RADIUS
+    if rows <= 2 * r or cols <= 2 * r:
+        return np.zeros((0, 0), dtype=np.int32)
+    srcf = src.astype(np.float32)
+    center = srcf[r:rows - r, r:cols - r]
+    codes = np.zeros(center.shape, dtype=np.int32)
+
+    def at(dy, dx):
+        return srcf[r + dy:rows - r + dy, r + dx:cols - r + dx]
+
+    for n, terms in enumerate(_POINTS):
+        (dy, dx, w), rest = terms[0], terms[1:]
+        t = at(dy, dx) if w == 1 else w * at(dy, dx)
+        for dy, dx, w in rest:
+            t = t + w * at(dy, dx)
+        codes |= ((t > center) | (np.abs(t - center) < _EPS)).astype(np.int32) << n
+    return codes
+
+
+def histogram(gray):
+    """Spatial LBP histogram (GRID_Y x GRID_X cells, each normalized by its pixel count), float32[HIST_SIZE]."""
+    codes = lbp(gray)
+    rows, cols = codes.shape
+    height, width = rows // GRID_Y, cols // GRID_X
+    if height == 0 or width == 0:
+        return np.zeros(HIST_SIZE, dtype=np.float32)
+    # Cells are the top-left GRID_Y*height x GRID_X*width block (leftover rows/cols are ignored)
+    cells = codes[:GRID_Y * height, :GRID_X * width].reshape(GRID_Y, height, GRID_X, width)
+    cell_index = (np.arange(GRID_Y)[:, None, None, None] * GRID_X + np.arange(GRID_X)[None, None, :, None])
+    flat = (np.broadcast_to(cell_index, cells.shape) * N_PATTERNS + cells).ravel()
+    counts = np.bincount(flat, minlength=GRID_Y * GRID_X * N_PATTERNS)
+    return counts.astype(np.float32) * np.float32(1.0 / (height * width))  # OpenCV scales by the reciprocal
+
+
+def chi_square(columns, query, row_sums=None):
+    """
+    OpenCV HISTCMP_CHISQR_ALT (2 * sum((t-q)^2 / (t+q))) of every template against query.
+    columns: HIST_SIZE x N matrix, one template per column. Uses (t-q)^2/(t+q) = t + q - 4tq/(t+q),
+    so only the rows where the query is non-zero are read; row_sums are the per-template sums.
+    """
+    q = np.asarray(query, dtype=np.float32)
+    if row_sums is None:
+        row_sums = np.asarray(columns).sum(axis=0, dtype=np.float64)
+    idx = np.flatnonzero(q)
+    qk = q[idx][:, None]
+    t = np.asarray(columns[idx], dtype=np.float32)
+    shared = (t * qk / (t + qk)).sum(axis=0, dtype=np.float64)
+    return 2.0 * (row_sums + q.sum(dtype=np.float64) - 4.0 * shared)
+
+
+class Templates:
+    """
+    One user's LBP histograms as a contiguous float32 matrix (HIST_SIZE x samples: one column
+    per enrollment sample, so a probe's non-zero bins are whole contiguous rows) and their label.
+    """
+
+    def __init__(self, columns, label):
+        self.columns = columns
+        self.label = int(label)
+        self.row_sums = np.asarray(columns).sum(axis=0, dtype=np.float64)
+
+    @classmethod
+    def from_samples(cls, samples, label):
+        columns = np.empty((HIST_SIZE, len(samples)), dtype=np.float32)
+        for i, sample in enumerate(samples):
+            columns[:, i] = histogram(sample)
+        return cls(columns, label)
+
+    @classmethod
+    def load(cls, path, label, mmap=True):
+        return cls(np.load(path, mmap_mode="r" if mmap else None), label)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.save(f, np.ascontiguousarray(self.columns, dtype=np.float32))
+
+    def __len__(self):
+        return self.columns.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.columns.nbytes
+
+    def distances(self, probe):
+        return chi_square(self.columns, histogram(probe), self.row_sums)
+
+    def predict(self, probe):
+        """(label, distance) like LBPHFaceRecognizer.predict; (-1, inf) with no templates."""
+        if len(self) == 0:
+            return -1, float("inf")
+        return self.label, float(self.distances(probe).min())
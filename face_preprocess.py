@@ -0,0 +1,98 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# ========================================================
+# Face image preprocessing (decode -> gray -> resize -> equalize)
+# ========================================================
+# Signup, face login aur PIN reset teeno camera frame ko apne apne tareeqe se
+# gray karte the, aur samples ek ek kar ke decode hote the. Ab sab yahan hai.
+# Batch wala kaam thread pool mein chalta hai (PIL ka JPEG decode aur
+# OpenCV ke resize/equalize GIL chhor dete hain) aur har image seedha pehle
+# se allocate ki hui N x FACE_SIZE x FACE_SIZE uint8 array ki apni row mein
+# likhi jati hai.
+#
+# EQUALIZE band hai: LBPH ki "confidence < 35" shart un samples par calibrate
+# hai jo equalize nahi hue. Chalu karne se pehle saari archives dobara banayein
+# aur threshold dobara tay karein (probe aur samples dono equalize hone chahiye).
+
+FACE_SIZE = 240      # canonical face crop (webcam crops are ~240 px already)
+EQUALIZE = False
+WORKERS = min(8, os.cpu_count() or 1)
+
+_executors = {}      # workers -> ThreadPoolExecutor, shared by every page / session
+_lock = threading.Lock()
+
+
+def _executor(workers):
+    with _lock:
+        pool = _executors.get(workers)
+        if pool is None:
+            pool = _executors[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="face-preprocess")
+        return pool
+
+
+def to_gray(source):
+    """
+    uint8 grayscale image from a file path (PIL, as enrollment samples were always read),
+    a camera frame (st.camera_input / UploadedFile, bytes) or an array (BGR or already gray).
+    """
+    if isinstance(source, np.ndarray):
+        return source if source.ndim == 2 else cv2.cvtColor(source, cv2.COLOR_BGR2GRAY)
+    if isinstance(source, (str, os.PathLike)):
+        return np.array(Image.open(source).convert('L'), 'uint8')
+    data = source if isinstance(source, (bytes, bytearray, memoryview)) else source.getvalue()
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("could not decode image")
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def normalize(gray, size=FACE_SIZE, equalize=None, out=None):
+    """Gray crop -> size x size uint8 (written into out when given), histogram-equalized if equalize."""
+    equalize = EQUALIZE if equalize is None else equalize
+    gray = np.asarray(gray, dtype=np.uint8)
+    if out is None:
+        out = np.empty((size, size), dtype=np.uint8)
+    if gray.shape == (size, size):
+        out[...] = gray
+    else:
+        interp = cv2.INTER_AREA if min(gray.shape) > size else cv2.INTER_LINEAR
+        cv2.resize(gray, (size, size), dst=out, interpolation=interp)
+    if equalize:
+        cv2.equalizeHist(out, dst=out)
+    return out
+
+
+def _map(fn, items, workers):
+    workers = WORKERS if workers is None else workers
+    if workers <= 1 or len(items) <= 1:
+        return [fn(i) for i in items]
+    return list(_executor(workers).map(fn, items))
+
+
+def load_gray(sources, workers=None):
+    """to_gray of every source, decoded in the thread pool; original sizes kept, order preserved."""
+    return _map(to_gray, list(sources), workers)
+
+
+def preprocess_batch(sources, size=FACE_SIZE, equalize=None, workers=None, out=None):
+    """
+    Decode, gray, resize and (optionally) equalize every source straight into one
+    preallocated N x size x size uint8 batch (out, or a new array). Returns the batch.
+    """
+    sources = list(sources)
+    if out is None:
+        out = np.empty((len(sources), size, size), dtype=np.uint8)
+    elif out.shape != (len(sources), size, size) or out.dtype != np.uint8:
+        raise ValueError(f"out must be uint8 {(len(sources), size, size)}, got {out.dtype} {out.shape}")
+
+    def work(i):
+        normalize(to_gray(sources[i]), size, equalize, out[i])
+
+    _map(work, range(len(sources)), workers)
+    return out
@@ -0,0 +1,135 @@
+import os
+import sys
+import hashlib
+import argparse
+
+import numpy as np
+
+import face_preprocess
+
+# ========================================================
+# Packed biometric sample archive (one file per user)
+# ========================================================
+# Pehle signup har user ke liye data/<account_no>/ mein 100 alag JPEG likhta
+# tha (har click par wahi crop 10 dafa). Ab har user ki ek file hai:
+# data/<account_no>.faces.npy, jis mein saare face crops SAMPLE_SIZE x
+# SAMPLE_SIZE grayscale uint8 tensor (N x H x W) ki shakal mein hain.
+# Byte-identical samples sirf ek dafa rakhe jate hain (nearest-neighbour
+# matching mein duplicate se koi farq nahi parta). .npy hai is liye training
+# ke liye mmap ho sakti hai. Purane folders ke liye migration:
+#
+#   python face_samples.py [--data data] [--account BOP-94875595 ...] [--remove]
+
+DATA_DIR = "data"
+SAMPLE_SIZE = face_preprocess.FACE_SIZE   # crops are resized to this square
+ARCHIVE_SUFFIX = ".faces.npy"
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def archive_path(account_no, data_dir=DATA_DIR):
+    return os.path.join(data_dir, f"{account_no}{ARCHIVE_SUFFIX}")
+
+
+def normalize(gray):
+    """Grayscale face crop -> SAMPLE_SIZE x SAMPLE_SIZE uint8 (face_preprocess.normalize)."""
+    return face_preprocess.normalize(gray, SAMPLE_SIZE)
+
+
+def crop(gray, box):
+    """The detector box (x, y, w, h) of a frame, normalized like the stored samples (login / reset probes)."""
+    x, y, w, h = box
+    return normalize(gray[y:y+h, x:x+w])
+
+
+def _digest(sample):
+    return hashlib.sha1(np.ascontiguousarray(sample).tobytes()).digest()
+
+
+def dedup(samples, seen=None):
+    """Drops byte-identical samples (first one kept, order preserved). Returns (N x H x W array, dropped)."""
+    seen = set() if seen is None else seen
+    kept = []
+    for s in samples:
+        d = _digest(s)
+        if d not in seen:
+            seen.add(d)
+            kept.append(s)
+    dropped = len(samples) - len(kept)
+    if not kept:
+        return np.empty((0, SAMPLE_SIZE, SAMPLE_SIZE), dtype=np.uint8), dropped
+    return np.stack(kept).astype(np.uint8, copy=False), dropped
+
+
+def read(path, mmap=True):
+    """The archive's N x H x W uint8 samples (read-only mmap by default); None when there is no archive."""
+    try:
+        samples = np.load(path, mmap_mode="r" if mmap else None)
+    except FileNotFoundError:
+        return None
+    if samples.dtype != np.uint8 or samples.ndim != 3:
+        raise ValueError(f"{path}: not a face sample archive")
+    return samples
+
+
+def write(path, samples):
+    """Atomically replaces the archive (tmp file + rename, so a reader never sees half a file)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.ascontiguousarray(samples, dtype=np.uint8))
+    os.replace(tmp_path, path)
+
+
+def append(path, crops):
+    """Normalizes the crops and adds those not already in the archive. Returns (total samples, added)."""
+    existing = read(path, mmap=False)
+    if existing is None:
+        existing = np.empty((0, SAMPLE_SIZE, SAMPLE_SIZE), dtype=np.uint8)
+    seen = {_digest(s) for s in existing}
+    new, _ = dedup([normalize(c) for c in crops], seen)
+    if len(new):
+        write(path, np.concatenate([existing, new]))
+    return len(existing) + len(new), len(new)
+
+
+def folder_images(folder):
+    return sorted(n for n in os.listdir(folder) if n.lower().endswith(IMAGE_EXTS))
+
+
+def pack_folder(folder, path, remove=False):
+    """
+    Migration: every image in an old per-user sample folder -> normalized, deduped archive at path.
+    With remove=True the images (and the folder, if then empty) are deleted after the archive is written.
+    Returns (samples kept, duplicates dropped).
+    """
+    names = folder_images(folder)
+    crops = face_preprocess.preprocess_batch([os.path.join(folder, n) for n in names], SAMPLE_SIZE)
+    samples, dropped = dedup(crops)
+    write(path, samples)
+    if remove:
+        for n in names:
+            os.remove(os.path.join(folder, n))
+        if not os.listdir(folder):
+            os.rmdir(folder)
+    return len(samples), dropped
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Pack per-user JPEG sample folders into face sample archives.")
+    ap.add_argument("--data", default=DATA_DIR)
+    ap.add_argument("--account", nargs="*", help="account numbers (default: every sample folder under --data)")
+    ap.add_argument("--remove", action="store_true", help="delete the JPEG files once the archive is written")
+    args = ap.parse_args()
+
+    accounts = args.account or sorted(n for n in os.listdir(args.data)
+                                      if not n.startswith("_") and os.path.isdir(os.path.join(args.data, n)))
+    for acc in accounts:
+        folder = os.path.join(args.data, acc)
+        if not os.path.isdir(folder) or not folder_images(folder):
+            print(f"{acc}: no sample folder, skipped", file=sys.stderr)
+            continue
+        path = archive_path(acc, args.data)
+        before = sum(os.path.getsize(os.path.join(folder, n)) for n in folder_images(folder))
+        kept, dropped = pack_folder(folder, path, args.remove)
+        print(f"{acc}: {kept} samples ({dropped} duplicates dropped), "
+              f"{before / 2**20:.1f} MiB of images -> {os.path.getsize(path) / 2**20:.1f} MiB {path}")
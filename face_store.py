@@ -0,0 +1,188 @@
+import os
+import glob
+import hashlib
+import threading
+from collections import OrderedDict
+
+import face_match
+import face_samples
+import face_preprocess
+
+# ========================================================
+# Biometric template store (per-user face_match templates)
+# ========================================================
+# Pehle har face-login aur PIN-reset par user ke 100 JPEG decode ho kar
+# naya LBPH model train hota tha. Ab user ke face_match histogram templates
+# ek dafa ban kar disk par .npy likhe jate hain, naam mein samples ka
+# fingerprint (version) hota hai. Login par file mmap hoti hai, aur memory
+# mein LRU cache hai (MAX_CACHE_BYTES tak). Samples badlein to version
+# badalta hai aur templates dobara bante hain; warna kabhi nahi. (cv2 LBPH
+# model ab store nahi hota: templates usi ke histograms/distances dete hain,
+# benchmarks/bench_face_match.py dekhein.)
+# Samples face_samples ki packed archive (data/<account_no>.faces.npy) se
+# aate hain; purane users jinka folder abhi migrate nahi hua, un ke JPEG.
+# Dono surat mein samples SAMPLE_SIZE par normalize hote hain, aur login /
+# reset ka probe bhi (face_samples.crop), taake dono taraf ek hi preprocessing ho.
+
+DATA_DIR = "data"
+MODEL_DIR = os.path.join(DATA_DIR, "_models")   # <account_no>.<version>.npy
+MAX_CACHE_BYTES = 128 * 2**20                    # histograms kept in memory (~6.5 MB per 100-sample user)
+
+_cache = OrderedDict()   # account_no -> (version, templates, nbytes)
+_cache_bytes = 0
+_lock = threading.Lock()
+_train_locks = {}        # account_no -> lock, so two sessions don't build the same templates at once
+stats = {"hits": 0, "loads": 0, "trains": 0, "evictions": 0}
+
+
+def sample_dir(account_no):
+    return os.path.join(DATA_DIR, str(account_no))
+
+
+def samples_version(face_id, account_no):
+    """
+    Fingerprint of the enrollment samples, face id and sample size: the archive's size and mtime,
+    else the folder's file names, sizes and mtimes. None when there are none.
+    """
+    h = hashlib.sha256(f"{int(face_id)}\0{face_samples.SAMPLE_SIZE}".encode())
+    try:
+        st = os.stat(face_samples.archive_path(account_no, DATA_DIR))
+        h.update(f"archive\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        return h.hexdigest()[:12]
+    except FileNotFoundError:
+        pass
+    path = sample_dir(account_no)
+    try:
+        entries = sorted(os.scandir(path), key=lambda e: e.name)
+    except FileNotFoundError:
+        return None
+    if not entries:
+        return None
+    for e in entries:
+        st = e.stat()
+        h.update(f"{e.name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()[:12]
+
+
+def load_samples(account_no):
+    """
+    SAMPLE_SIZE x SAMPLE_SIZE grayscale samples: rows of the mmap'd archive, or the images of the
+    user's old sample folder (normalized the same way) when it has not been migrated yet.
+    """
+    archive = face_samples.read(face_samples.archive_path(account_no, DATA_DIR))
+    if archive is not None:
+        return list(archive)
+    path = sample_dir(account_no)
+    names = face_samples.folder_images(path)
+    return list(face_preprocess.preprocess_batch([os.path.join(path, n) for n in names], face_samples.SAMPLE_SIZE))
+
+
+def build(face_id, samples):
+    return face_match.Templates.from_samples(samples, face_id)
+
+
+def model_path(account_no, version):
+    return os.path.join(MODEL_DIR, f"{account_no}.{version}.npy")
+
+
+def _stored(account_no):
+    pattern = os.path.join(MODEL_DIR, f"{glob.escape(str(account_no))}.*.npy")
+    return [p for p in glob.glob(pattern) if ".tmp." not in os.path.basename(p)]
+
+
+def _save(templates, account_no, version):
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    path = model_path(account_no, version)
+    tmp_path = os.path.join(MODEL_DIR, f"{account_no}.{version}.tmp.npy")
+    templates.save(tmp_path)
+    os.replace(tmp_path, path)
+    for old in _stored(account_no):
+        if old != path:
+            os.remove(old)  # superseded versions
+    return path
+
+
+def _remember(account_no, version, templates):
+    global _cache_bytes
+    nbytes = templates.nbytes
+    with _lock:
+        old = _cache.pop(account_no, None)
+        if old is not None:
+            _cache_bytes -= old[2]
+        _cache[account_no] = (version, templates, nbytes)
+        _cache_bytes += nbytes
+        while _cache_bytes > MAX_CACHE_BYTES and len(_cache) > 1:
+            _, (_, _, freed) = _cache.popitem(last=False)
+            _cache_bytes -= freed
+            stats["evictions"] += 1
+
+
+def _build(face_id, account_no, samples=None):
+    version = samples_version(face_id, account_no)
+    if version is None:
+        return None
+    try:
+        templates = build(face_id, samples if samples is not None else load_samples(account_no))
+    except Exception:
+        return None
+    stats["trains"] += 1
+    try:
+        _save(templates, account_no, version)
+    except OSError:
+        pass  # still usable from memory; next process builds it again
+    _remember(account_no, version, templates)
+    return templates
+
+
+def train_user(face_id, account_no):
+    """Enrollment: builds and writes the histogram templates for the current samples. Returns them or None."""
+    return _build(face_id, account_no)
+
+
+def get_templates(face_id, account_no):
+    """
+    face_match.Templates for this user: memory cache, else the mmap'd .npy for the current samples,
+    else built now (and written). None when the user has no samples.
+    """
+    version = samples_version(face_id, account_no)
+    if version is None:
+        return None
+    with _lock:
+        cached = _cache.get(account_no)
+        if cached is not None and cached[0] == version:
+            _cache.move_to_end(account_no)
+            stats["hits"] += 1
+            return cached[1]
+        build_lock = _train_locks.setdefault(account_no, threading.Lock())
+
+    with build_lock:
+        with _lock:  # another session may have finished while we waited
+            cached = _cache.get(account_no)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        path = model_path(account_no, version)
+        if os.path.exists(path):
+            try:
+                templates = face_match.Templates.load(path, face_id)
+                stats["loads"] += 1
+                _remember(account_no, version, templates)
+                return templates
+            except (OSError, ValueError):
+                pass  # unreadable file: rebuild below
+        return _build(face_id, account_no)
+
+
+def invalidate(account_no):
+    """Drops the cached and stored templates (e.g. samples deleted by hand); the next login rebuilds."""
+    global _cache_bytes
+    with _lock:
+        old = _cache.pop(account_no, None)
+        if old is not None:
+            _cache_bytes -= old[2]
+    for path in _stored(account_no):
+        os.remove(path)
+
+
+def cache_info():
+    with _lock:
+        return {"users": len(_cache), "bytes": _cache_bytes, "max_bytes": MAX_CACHE_BYTES, **stats}
@@ -0,0 +1,179 @@
+import threading
+from collections import deque
+from datetime import datetime
+
+# ========================================================
+# Streaming per-account behavioural features
+# ========================================================
+# Ledger ki har nayi line (record_transaction / transfer) yahan account ke
+# rolling windows update karti hai. Har window ek deque + running sums hai:
+# nayi entry right par aati hai, purani left se nikalti hai, is liye har
+# update aur har query O(1) (amortized) hai; history dobara scan nahi hoti.
+
+WINDOWS = {"1h": 3600, "24h": 86400}
+
+# Ledger rows that move money (Insurance estimates, failed/blocked attempts don't)
+MONEY_STATUSES = ("Success",)
+CREDIT_TYPES = ("Deposit",)
+NON_ACCOUNTS = (None, "", "N/A", "Self")
+
+
+def _ts(value):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)  # already epoch seconds
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+def money_flow(record):
+    """
+    (sender, receiver or None, amount, is_credit) for a ledger row that moves money, else None.
+    is_credit: a Deposit into the sender's own account; otherwise the sender is debited
+    and the receiver (when it is an account) credited.
+    """
+    if record.get("status") not in MONEY_STATUSES:
+        return None
+    try:
+        amount = float(record.get("amount") or 0.0)
+    except (TypeError, ValueError):
+        return None
+    sender, receiver = record.get("sender"), record.get("receiver_acc")
+    if sender in NON_ACCOUNTS:
+        return None
+    if receiver in NON_ACCOUNTS or receiver == sender:
+        receiver = None
+    return sender, receiver, amount, receiver is None and record.get("type") in CREDIT_TYPES
+
+
+class SlidingWindow:
+    """Count, sum and distinct counterparties of the events in the last `span` seconds."""
+
+    __slots__ = ("span", "events", "count", "total", "parties")
+
+    def __init__(self, span):
+        self.span = span
+        self.events = deque()  # (ts, amount, party)
+        self.count = 0
+        self.total = 0.0
+        self.parties = {}      # party -> events in window
+
+    def add(self, ts, amount, party=None):
+        self.events.append((ts, amount, party))
+        self.count += 1
+        self.total += amount
+        if party is not None:
+            self.parties[party] = self.parties.get(party, 0) + 1
+        self.evict(ts)
+
+    def evict(self, now):
+        cutoff = now - self.span
+        events = self.events
+        while events and events[0][0] <= cutoff:
+            _, amount, party = events.popleft()
+            self.count -= 1
+            self.total -= amount
+            if party is not None:
+                left = self.parties[party] - 1
+                if left:
+                    self.parties[party] = left
+                else:
+                    del self.parties[party]
+        if not events:
+            self.total = 0.0  # drop float drift once the window is empty
+
+
+class AccountFeatures:
+    """State for one account: outgoing/incoming windows, last activity, recipients, net ledger flow."""
+
+    __slots__ = ("sent", "received", "last_ts", "txn_count", "recipients", "net_flow")
+
+    def __init__(self):
+        self.sent = {name: SlidingWindow(span) for name, span in WINDOWS.items()}
+        self.received = {name: SlidingWindow(span) for name, span in WINDOWS.items()}
+        self.last_ts = None
+        self.txn_count = 0
+        self.recipients = set()
+        self.net_flow = 0.0   # credits - debits in the ledger; not the balance (see FeatureStore)
+
+
+class FeatureStore:
+    """
+    Fed by the Ledger (see storage_engine.Ledger.subscribe).
+    net_ledger_flow is the net of successful ledger flows, not the account balance: opening
+    balances set at signup are not in the ledger. The balance itself is in UserTable.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._accounts = {}
+
+    def _account(self, account_no):
+        state = self._accounts.get(account_no)
+        if state is None:
+            state = self._accounts[account_no] = AccountFeatures()
+        return state
+
+    def add(self, record):
+        flow = money_flow(record)
+        ts = _ts(record.get("date")) if flow is not None else None
+        if ts is None:
+            return
+        sender, receiver, amount, is_credit = flow
+
+        with self._lock:
+            src = self._account(sender)
+            if is_credit:
+                src.net_flow += amount
+                for w in src.received.values():
+                    w.add(ts, amount)
+            else:
+                src.net_flow -= amount
+                for w in src.sent.values():
+                    w.add(ts, amount, receiver)
+                if receiver is not None:
+                    src.recipients.add(receiver)
+            src.txn_count += 1
+            src.last_ts = ts if src.last_ts is None else max(src.last_ts, ts)
+
+            if receiver is not None:
+                dst = self._account(receiver)
+                dst.net_flow += amount
+                for w in dst.received.values():
+                    w.add(ts, amount, sender)
+
+    def has_sent_to(self, account_no, receiver):
+        with self._lock:
+            state = self._accounts.get(account_no)
+            return state is not None and receiver in state.recipients
+
+    def features(self, account_no, now=None):
+        """Feature dict for one account as of now (defaults to the current time)."""
+        now = _ts(now) if now is not None else datetime.now().timestamp()
+        with self._lock:
+            state = self._accounts.get(account_no)
+            if state is None:
+                state = AccountFeatures()
+            out = {
+                "txn_count": state.txn_count,  # ledger rows this account initiated
+                "seconds_since_last": (now - state.last_ts) if state.last_ts is not None else None,
+                "fanout_total": len(state.recipients),
+                "net_ledger_flow": round(state.net_flow, 2),
+            }
+            for name, span in WINDOWS.items():
+                sent, received = state.sent[name], state.received[name]
+                sent.evict(now)
+                received.evict(now)
+                out[f"sent_count_{name}"] = sent.count
+                out[f"sent_amount_{name}"] = round(sent.total, 2)
+                out[f"received_count_{name}"] = received.count
+                out[f"received_amount_{name}"] = round(received.total, 2)
+                out[f"fanout_{name}"] = len(sent.parties)
+                out[f"velocity_{name}"] = round(sent.total * 3600.0 / span, 2)  # Rs. sent per hour
+        return out
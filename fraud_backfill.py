@@ -0,0 +1,353 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import multiprocessing as mp
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import log_segments
+import record_codec
+import feature_store
+
+# ========================================================
+# Offline fraud backfill (rescore the whole ledger)
+# ========================================================
+# Model retrain hone ke baad poori transactions history dobara score karni
+# hoti hai. Ledger (segments + active file) chunks mein stream hota hai,
+# main process har row ke waqt ke balances dobara banata hai (ye kaam
+# sequential hai), aur chunks process pool ko jate hain jahan har worker
+# ke paas model ki apni copy hai. Har chunk ki output alag columnar file
+# mein. Checkpoint (har CHECKPOINT_SECONDS) mein ledger ka stream offset
+# aur us waqt ke saare account balances hote hain, is liye resume wahin se
+# ledger parhta hai: pichle chunks dobara nahi bante.
+#
+#   python fraud_backfill.py [--ledger transactions.txt] [--out fraud_scores]
+#                            [--workers N] [--chunk-rows 100000] [--format npz|parquet]
+#                            [--opening current|zero] [--restart]
+
+LEDGER_FILE = "transactions.txt"
+USER_FILE = "user_data.txt"
+OUT_DIR = "fraud_scores"
+CHUNK_ROWS = 100000
+CHECKPOINT_FILE = "checkpoint.json"
+CHECKPOINT_SECONDS = 30.0   # at most one balances snapshot per interval (and one at the end)
+
+# Ledger 'type' -> PaySim type the model was trained on (anything else is upper-cased as is)
+TYPE_MAP = {"Transfer": "TRANSFER", "QR Transfer": "TRANSFER", "CASH_OUT": "CASH_OUT", "Deposit": "CASH_IN",
+            "Insurance": "PAYMENT"}
+
+FEATURES = ['step', 'type', 'amount', 'oldbalanceOrg', 'newbalanceOrig', 'oldbalanceDest', 'newbalanceDest']
+META = ['row', 'date', 'ledger_type', 'sender', 'receiver_acc', 'status', 'txn_id']
+
+
+def iter_ledger(path, offset=0):
+    """
+    (end offset, record) for every ledger row from a stream offset, oldest first: sealed
+    segments, then the active file (streamed). end offset is where the next row starts.
+    """
+    log = log_segments.SegmentedLog(path, "date", ("sender", "receiver_acc"))
+    log.recover()
+    for start, line in log.iter_lines_from(offset):
+        try:
+            record = record_codec.decode(line)
+        except ValueError:
+            continue
+        yield start + len(line) + 1, record
+
+
+def opening_balances(ledger_path, user_file):
+    """Balance of each account before the first ledger row: current balance minus its net ledger flow."""
+    import storage_engine as se
+
+    net = {}
+    for _, record in iter_ledger(ledger_path):
+        flow = feature_store.money_flow(record)
+        if flow is None:
+            continue
+        sender, receiver, amount, is_credit = flow
+        net[sender] = net.get(sender, 0.0) + (amount if is_credit else -amount)
+        if receiver is not None:
+            net[receiver] = net.get(receiver, 0.0) + amount
+    opening = {}
+    for user in se.UserTable(user_file).all():
+        try:
+            opening[user['account_no']] = float(user.get('balance', 0.0)) - net.get(user['account_no'], 0.0)
+        except (TypeError, ValueError):
+            continue
+    return opening
+
+
+def build_chunk(records, balances, first_row, changed=None):
+    """
+    Model features for each row as the pages would have sent them at the time:
+    sender/receiver balances before and after. balances is advanced in place
+    (only by rows that actually moved money, see feature_store.money_flow);
+    changed, if given, gets the new balance of every account the chunk moved.
+    """
+    n = len(records)
+    num = {c: np.empty(n, dtype=np.float64) for c in FEATURES if c != 'type'}
+    types, meta = [], {c: [] for c in META if c != 'row'}
+    for i, r in enumerate(records):
+        try:
+            amount = float(r.get('amount') or 0.0)
+        except (TypeError, ValueError):
+            amount = 0.0
+        sender, receiver = r.get('sender'), r.get('receiver_acc')
+        dest = receiver if receiver not in feature_store.NON_ACCOUNTS and receiver != sender else None
+        credit = dest is None and r.get('type') in feature_store.CREDIT_TYPES
+
+        old_org = balances.get(sender, 0.0)
+        new_org = old_org + amount if credit else old_org - amount
+        if dest is not None:
+            old_dest = balances.get(dest, 0.0)
+            new_dest = old_dest + amount
+        else:
+            old_dest, new_dest = 0.0, amount  # same defaults the ATM page sends
+        if feature_store.money_flow(r) is not None:
+            balances[sender] = new_org
+            if dest is not None:
+                balances[dest] = new_dest
+            if changed is not None:
+                changed[sender] = new_org
+                if dest is not None:
+                    changed[dest] = new_dest
+
+        num['step'][i] = r.get('seq') or first_row + i + 1
+        num['amount'][i] = amount
+        num['oldbalanceOrg'][i] = old_org
+        num['newbalanceOrig'][i] = new_org
+        num['oldbalanceDest'][i] = old_dest
+        num['newbalanceDest'][i] = new_dest
+        types.append(TYPE_MAP.get(r.get('type'), str(r.get('type')).upper()))
+        meta['date'].append(str(r.get('date', '')))
+        meta['ledger_type'].append(str(r.get('type', '')))
+        meta['sender'].append(str(sender))
+        meta['receiver_acc'].append(str(receiver))
+        meta['status'].append(str(r.get('status', '')))
+        meta['txn_id'].append(str(r.get('txn_id', '')))
+
+    frame = pd.DataFrame(num)
+    frame['step'] = frame['step'].astype(np.int64)
+    frame['type'] = types
+    frame['row'] = np.arange(first_row, first_row + n, dtype=np.int64)
+    for c, values in meta.items():
+        frame[c] = values
+    return frame
+
+
+# --- Worker side (one loaded model per process) ---
+
+_engine = None
+
+
+def _load_engine():
+    """fraud_engine with its model loaded (quietly)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        import fraud_engine
+        fraud_engine.get_model()
+    return fraud_engine
+
+
+def _init_worker():
+    global _engine
+    _engine = _load_engine()  # already loaded in the parent when the pool forks: pages are shared
+    # One process per core already; keep XGBoost single-threaded inside each
+    model = _engine.get_model()
+    if model.fast_scorer is not None:
+        model.fast_scorer.booster.set_param({"nthread": 1})
+    elif model.get_pipeline() is not None:
+        model.get_pipeline().steps[-1][1].set_params(n_jobs=1)
+
+
+def _score(features):
+    scores = _engine.predict_fraud_batch(features)
+    rule = np.array(["" if r is None else r for r in scores.rule], dtype=str)
+    return scores[0], scores[1].astype(np.float32), scores.version, rule
+
+
+# --- Output + checkpoints ---
+
+def _write_part(out_dir, index, frame, fmt):
+    path = os.path.join(out_dir, f"part-{index:06d}.{fmt}")
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        arrays = {}
+        for c in frame.columns:
+            values = frame[c].to_numpy()
+            arrays[c] = values.astype(str) if values.dtype == object else values  # fixed-width str: no pickle
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _read_checkpoint(out_dir):
+    try:
+        with open(os.path.join(out_dir, CHECKPOINT_FILE), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_balances(out_dir, index, balances):
+    """Balances as of the start of chunk index; the checkpoint names the file, so it is written first."""
+    name = f"balances-{index:06d}.npz"
+    path = os.path.join(out_dir, name)
+    with open(path + ".tmp", "wb") as f:
+        np.savez(f, accounts=np.array(list(balances), dtype=str),
+                 balances=np.fromiter(balances.values(), dtype=np.float64, count=len(balances)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+    return name
+
+
+def _read_balances(out_dir, name):
+    with np.load(os.path.join(out_dir, name)) as data:
+        return dict(zip(data["accounts"].tolist(), data["balances"].tolist()))
+
+
+def _write_checkpoint(out_dir, state):
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def run(ledger=LEDGER_FILE, out_dir=OUT_DIR, workers=None, chunk_rows=CHUNK_ROWS, fmt="npz",
+        opening="current", user_file=USER_FILE, restart=False, log=print, checkpoint_every=CHECKPOINT_SECONDS):
+    """
+    Rescores the whole ledger; resumes from out_dir's checkpoint unless restart. Returns the final state.
+    A resumed run reads the ledger from the checkpoint's offset with the balances saved with it.
+    """
+    workers = workers or os.cpu_count() or 1
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401  (pandas' parquet engine)
+        except ImportError:
+            raise ValueError("parquet output needs pyarrow (pip install pyarrow), or use --format npz")
+    os.makedirs(out_dir, exist_ok=True)
+    model = _load_engine().get_model()
+    if not model.loaded:
+        raise ValueError("fraud model could not be loaded")
+    params = {"ledger": os.path.abspath(ledger), "chunk_rows": chunk_rows, "format": fmt, "opening": opening,
+              "model_version": model.version}
+    state = None if restart else _read_checkpoint(out_dir)
+    if state is not None and state.get("params") != params:
+        raise ValueError(f"checkpoint in {out_dir} was made with {state.get('params')}; use --restart")
+    if state is not None and "offset" not in state:
+        raise ValueError(f"checkpoint in {out_dir} has no ledger offset / balances (older version); use --restart")
+    if state is None:
+        state = {"params": params, "chunks_done": 0, "rows_done": 0, "flagged": 0, "offset": 0, "balances": None}
+        for name in os.listdir(out_dir):
+            if name.startswith(("part-", "balances-")):
+                os.remove(os.path.join(out_dir, name))  # leftovers of an earlier run
+        balances = opening_balances(ledger, user_file) if opening == "current" else {}
+    else:
+        balances = _read_balances(out_dir, state["balances"]) if state["balances"] else {}
+        log(f"resuming at chunk {state['chunks_done']} (row {state['rows_done']:,})")
+    committed = dict(balances)  # as of the last finished chunk; balances runs ahead with the chunks in flight
+    done = dict(state)          # chunks_done / rows_done / offset / flagged of the finished chunks
+    last_save = time.perf_counter()
+
+    def save():
+        nonlocal last_save
+        name = _write_balances(out_dir, done["chunks_done"], committed)
+        state.update(done, balances=name)
+        _write_checkpoint(out_dir, state)
+        for old in os.listdir(out_dir):
+            if old.startswith("balances-") and old != name:
+                os.remove(os.path.join(out_dir, old))
+        last_save = time.perf_counter()
+
+    started, scored = time.perf_counter(), 0
+    ctx = mp.get_context()
+    with ctx.Pool(workers, initializer=_init_worker) as pool:
+        inflight = deque()
+
+        def finish(item):
+            nonlocal scored
+            index, frame, result, changed, end = item
+            flags, probs, version, rule = result.get()
+            frame['fraud_probability'] = probs
+            frame['is_fraud'] = flags
+            frame['rule'] = rule  # deciding / threshold rule, "" when the model decided alone
+            frame['model_version'] = version
+            _write_part(out_dir, index, frame, fmt)
+            committed.update(changed)
+            done["chunks_done"] = index + 1
+            done["rows_done"] = int(frame['row'].iloc[-1]) + 1
+            done["offset"] = end
+            done["flagged"] += int(flags.sum())
+            if time.perf_counter() - last_save >= checkpoint_every:
+                save()
+            scored += len(frame)
+            rate = scored / (time.perf_counter() - started)
+            log(f"chunk {index}: {done['rows_done']:,} rows done, {rate:,.0f} rows/s")
+
+        def submit(index, batch, row, end):
+            changed = {}
+            frame = build_chunk(batch, balances, row, changed)
+            inflight.append((index, frame, pool.apply_async(_score, (frame[FEATURES],)), changed, end))
+            while len(inflight) > 2 * workers:  # bounded memory: wait for the oldest chunk
+                finish(inflight.popleft())
+
+        index, batch, row, end = state["chunks_done"], [], state["rows_done"], state["offset"]
+        for end, record in iter_ledger(ledger, state["offset"]):
+            batch.append(record)
+            if len(batch) < chunk_rows:
+                continue
+            submit(index, batch, row, end)
+            index, batch, row = index + 1, [], row + len(batch)
+        if batch:
+            submit(index, batch, row, end)
+        while inflight:
+            finish(inflight.popleft())
+        if done["chunks_done"] != state["chunks_done"] or state["balances"] is None:
+            save()
+
+    elapsed = time.perf_counter() - started
+    log(f"done: {state['rows_done']:,} rows ({scored:,} scored this run in {elapsed:.1f}s, "
+        f"{scored / elapsed if elapsed else 0:,.0f} rows/s), {state['flagged']:,} flagged -> {out_dir}")
+    return state
+
+
+def load_scores(out_dir=OUT_DIR):
+    """All written parts as one DataFrame (row order)."""
+    parts = sorted(p for p in os.listdir(out_dir) if p.startswith("part-") and not p.endswith(".tmp"))
+    frames = []
+    for name in parts:
+        path = os.path.join(out_dir, name)
+        if name.endswith(".parquet"):
+            frames.append(pd.read_parquet(path))
+        else:
+            with np.load(path) as data:
+                frames.append(pd.DataFrame({k: data[k] for k in data.files}))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Rescore the whole ledger with the current fraud model.")
+    ap.add_argument("--ledger", default=LEDGER_FILE)
+    ap.add_argument("--users", default=USER_FILE)
+    ap.add_argument("--out", default=OUT_DIR)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--format", choices=["npz", "parquet"], default="npz")
+    ap.add_argument("--opening", choices=["current", "zero"], default="current",
+                    help="opening balances: current balance minus ledger flow, or zero")
+    ap.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = ap.parse_args()
+    try:
+        run(args.ledger, args.out, args.workers, args.chunk_rows, args.format, args.opening, args.users, args.restart)
+    except ValueError as e:
+        sys.exit(str(e))
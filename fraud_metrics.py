@@ -0,0 +1,354 @@
+import os
+import sys
+import json
+import time
+import bisect
+import random
+import logging
+import threading
+from collections import Counter, deque
+
+import numpy as np
+
+# ========================================================
+# Fraud scoring instrumentation (latency, scores, drift)
+# ========================================================
+# predict_fraud har call par features stdout par print karta tha: mehnga
+# bhi, aur kuch dikhata bhi nahi. Ab har call ka latency aur score fixed
+# histograms mein jata hai (type ke hisaab se), threshold hits gine jate
+# hain, aur model scores ki rolling window ko baseline se PSI / KS ke zariye
+# compare kiya jata hai. snapshot() sab kuch ek dict mein deta hai: JSON file,
+# local HTTP endpoint aur eda_page ka tab isi ko dikhate hain. Logging
+# structured (JSON lines) aur sampled hai.
+
+ENABLED = True
+
+# Latency bucket upper bounds in microseconds (1-2-5 steps, 10 us .. 10 s); last bucket is open
+LATENCY_BUCKETS_US = [m * 10 ** e for e in range(1, 7) for m in (1, 2, 5)] + [10 ** 7]
+SCORE_BINS = 20          # equal-width bins over [0, 1]
+TYPES = ['CASH_IN', 'CASH_OUT', 'DEBIT', 'PAYMENT', 'TRANSFER']  # anything else counts as OTHER
+
+DRIFT_WINDOW = 5000      # most recent model scores compared against the baseline
+BASELINE_SIZE = 5000     # first model scores after start (or a model change) become the baseline
+PSI_WARN, PSI_ALERT = 0.1, 0.25
+DRIFT_MIN_ROWS = 500     # fewer scores than this (per type) give no drift status: PSI is too noisy
+
+LOG_SAMPLE_RATE = 0.01   # share of scoring calls logged; flagged ones always are (LOG_FLAGGED)
+LOG_FLAGGED = True
+
+METRICS_FILE = "fraud_metrics.json"
+EXPORT_INTERVAL = 10.0   # seconds between file exports
+METRICS_PORT = int(os.environ.get("FRAUD_METRICS_PORT", "0"))  # 0: no HTTP endpoint
+
+log = logging.getLogger("fraud")
+if not log.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+# Per-row outcome: model scored it (clear / flagged) or a rule decided it
+OUTCOMES = ['clear', 'flagged', 'fraud_rule', 'safe_rule']
+CLEAR, FLAGGED, FRAUD_RULE, SAFE_RULE = range(len(OUTCOMES))
+
+_TYPE_INDEX = {t: i for i, t in enumerate(TYPES)}
+_ALL_TYPES = TYPES + ['OTHER']
+
+
+def _type_index(trans_type):
+    return _TYPE_INDEX.get(trans_type, len(TYPES))
+
+
+def _percentile(counts, q):
+    """q-th percentile (us) from latency bucket counts: upper bound of the bucket it falls in."""
+    total = sum(counts)
+    if not total:
+        return None
+    target, seen = q / 100.0 * total, 0
+    for bound, count in zip(LATENCY_BUCKETS_US + [float('inf')], counts):
+        seen += count
+        if seen >= target:
+            return bound
+    return None
+
+
+def psi(expected, actual, eps=1e-4):
+    """Population stability index between two histograms (counts over the same bins)."""
+    e = np.asarray(expected, dtype=np.float64)
+    a = np.asarray(actual, dtype=np.float64)
+    if e.sum() == 0 or a.sum() == 0:
+        return None
+    e = np.clip(e / e.sum(), eps, None)
+    a = np.clip(a / a.sum(), eps, None)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def ks(expected, actual):
+    """Two-sample Kolmogorov-Smirnov statistic (max distance between the empirical CDFs)."""
+    e, a = np.sort(np.asarray(expected)), np.sort(np.asarray(actual))
+    if len(e) == 0 or len(a) == 0:
+        return None
+    grid = np.concatenate([e, a])
+    cdf_e = np.searchsorted(e, grid, side="right") / len(e)
+    cdf_a = np.searchsorted(a, grid, side="right") / len(a)
+    return float(np.max(np.abs(cdf_e - cdf_a)))
+
+
+class FraudMetrics:
+    """
+    Thread-safe counters and histograms. observe_one() / observe() record one scoring call
+    (single row / batch); snapshot() returns everything as plain JSON-able values.
+    """
+
+    def __init__(self, drift_window=None, baseline_size=None):
+        self.drift_window = drift_window or DRIFT_WINDOW
+        self.baseline_size = baseline_size or BASELINE_SIZE
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.latency = {}                                   # path -> bucket counts
+            self.rows = Counter()                               # path -> rows scored
+            self.scores = np.zeros((len(_ALL_TYPES), SCORE_BINS), dtype=np.int64)    # model scores only
+            self.decisions = np.zeros((len(_ALL_TYPES), len(OUTCOMES)), dtype=np.int64)
+            self.thresholds = {}                                # threshold -> [scored, hit]
+            self.errors = 0
+            self._reset_drift(None)
+
+    def _reset_drift(self, version):
+        self.version = version
+        self.baseline = []                                      # (type index, prob)
+        self.window = deque(maxlen=self.drift_window)           # (type index, prob)
+
+    def _latency(self, path, seconds, n):
+        counts = self.latency.get(path)
+        if counts is None:
+            counts = self.latency[path] = [0] * (len(LATENCY_BUCKETS_US) + 1)
+        counts[bisect.bisect_left(LATENCY_BUCKETS_US, seconds * 1e6)] += 1
+        self.rows[path] += n
+
+    def _drift_rows(self, pairs):
+        room = self.baseline_size - len(self.baseline)
+        if room > 0:
+            self.baseline.extend(pairs[:room])
+            pairs = pairs[room:]
+        self.window.extend(pairs)
+
+    # --- Recording ---
+
+    def observe_one(self, path, seconds, trans_type, prob, is_fraud, outcome, threshold, version=None):
+        """One single-row scoring call; outcome is an index into OUTCOMES."""
+        if not ENABLED:
+            return
+        ti = _type_index(trans_type)
+        with self._lock:
+            self._latency(path, seconds, 1)
+            self.decisions[ti, outcome] += 1
+            if outcome > FLAGGED:
+                return
+            if version != self.version:
+                self._reset_drift(version)  # scores of another model are not comparable
+            self.scores[ti, min(int(prob * SCORE_BINS), SCORE_BINS - 1)] += 1
+            hit = self.thresholds.setdefault(float(threshold), [0, 0])
+            hit[0] += 1
+            hit[1] += bool(is_fraud)
+            self._drift_rows([(ti, float(prob))])
+
+    def observe(self, path, seconds, types, probs, flags, outcomes, thresholds, version=None):
+        """One batch scoring call; per-row arrays, outcomes as OUTCOMES indices."""
+        if not ENABLED:
+            return
+        n = len(probs)
+        ti = np.fromiter((_TYPE_INDEX.get(t, len(TYPES)) for t in types), dtype=np.int64, count=n)
+        outcomes = np.asarray(outcomes, dtype=np.int64)
+        probs = np.asarray(probs, dtype=np.float64)
+        model = outcomes <= FLAGGED
+        decisions = np.bincount(ti * len(OUTCOMES) + outcomes, minlength=self.decisions.size)
+        bins = np.minimum((probs[model] * SCORE_BINS).astype(np.int64), SCORE_BINS - 1)
+        scores = np.bincount(ti[model] * SCORE_BINS + bins, minlength=self.scores.size)
+        th, hits = np.asarray(thresholds, dtype=np.float64)[model], np.asarray(flags, dtype=bool)[model]
+        with self._lock:
+            self._latency(path, seconds, n)
+            self.decisions += decisions.reshape(self.decisions.shape)
+            if not model.any():
+                return
+            if version != self.version:
+                self._reset_drift(version)
+            self.scores += scores.reshape(self.scores.shape)
+            for value in np.unique(th):
+                at = th == value
+                hit = self.thresholds.setdefault(float(value), [0, 0])
+                hit[0] += int(at.sum())
+                hit[1] += int(hits[at].sum())
+            self._drift_rows(list(zip(ti[model].tolist(), probs[model].tolist())))
+
+    def observe_latency(self, path, seconds, n=1):
+        """Latency only (e.g. fraud_service end-to-end time; scores are recorded by the engine)."""
+        if not ENABLED:
+            return
+        with self._lock:
+            self._latency(path, seconds, n)
+
+    def error(self):
+        with self._lock:
+            self.errors += 1
+
+    def set_baseline(self, types, probs, version=None):
+        """Use these model scores (e.g. a backfill or the training set) as the drift baseline."""
+        with self._lock:
+            self._reset_drift(version if version is not None else self.version)
+            self.baseline = [(_type_index(t), float(p)) for t, p in zip(types, probs)]
+
+    # --- Reading ---
+
+    def drift(self):
+        """PSI and KS of the rolling window against the baseline, overall and per type."""
+        with self._lock:
+            base, window = list(self.baseline), list(self.window)
+            version = self.version
+        out = {"model_version": version, "baseline_rows": len(base), "window_rows": len(window), "by_type": {}}
+        if not base or not window:
+            return out
+        base_t, base_p = np.array([b[0] for b in base]), np.array([b[1] for b in base])
+        win_t, win_p = np.array([w[0] for w in window]), np.array([w[1] for w in window])
+
+        def stats(bp, wp):
+            bins = np.linspace(0.0, 1.0, SCORE_BINS + 1)
+            value = psi(np.histogram(bp, bins)[0], np.histogram(wp, bins)[0])
+            status = _drift_status(value) if min(len(bp), len(wp)) >= DRIFT_MIN_ROWS else "few rows"
+            return {"psi": value, "ks": ks(bp, wp), "baseline_rows": len(bp), "window_rows": len(wp),
+                    "status": status}
+
+        out.update(stats(base_p, win_p))
+        for ti, name in enumerate(_ALL_TYPES):
+            bm, wm = base_t == ti, win_t == ti
+            if bm.any() and wm.any():
+                out["by_type"][name] = stats(base_p[bm], win_p[wm])
+        return out
+
+    def snapshot(self):
+        with self._lock:
+            latency = {}
+            for path, counts in self.latency.items():
+                latency[path] = {"calls": sum(counts), "rows": self.rows[path], "buckets_us": LATENCY_BUCKETS_US,
+                                 "counts": list(counts), "p50_us": _percentile(counts, 50),
+                                 "p90_us": _percentile(counts, 90), "p99_us": _percentile(counts, 99)}
+            scores = {t: self.scores[i].tolist() for i, t in enumerate(_ALL_TYPES) if self.scores[i].any()}
+            decisions = {t: dict(zip(OUTCOMES, self.decisions[i].tolist()))
+                         for i, t in enumerate(_ALL_TYPES) if self.decisions[i].any()}
+            thresholds = {str(th): {"scored": s, "hit": h, "hit_rate": h / s if s else 0.0}
+                          for th, (s, h) in sorted(self.thresholds.items())}
+            snap = {"time": time.time(), "since": self.started, "errors": self.errors, "latency": latency,
+                    "score_bins": SCORE_BINS, "score_histograms": scores, "decisions": decisions,
+                    "thresholds": thresholds}
+        snap["drift"] = self.drift()
+        return snap
+
+
+def _drift_status(value):
+    if value is None:
+        return "n/a"
+    return "stable" if value < PSI_WARN else ("moderate" if value < PSI_ALERT else "significant")
+
+
+metrics = FraudMetrics()
+
+# ========================================================
+# Sampled structured logging
+# ========================================================
+
+def log_score(event, flagged, **fields):
+    """One JSON log line per sampled scoring call (always for flagged ones when LOG_FLAGGED)."""
+    if not ((flagged and LOG_FLAGGED) or random.random() < LOG_SAMPLE_RATE):
+        return
+    if log.isEnabledFor(logging.INFO):
+        log.info(json.dumps(dict(event=event, ts=round(time.time(), 3), **fields), default=str))
+
+
+def log_scores(event, flags, fields):
+    """log_score() for the rows of a batch; fields(i) -> dict for row i (only built for logged rows)."""
+    flags = np.asarray(flags, dtype=bool)
+    sampled = np.random.random(len(flags)) < LOG_SAMPLE_RATE
+    if LOG_FLAGGED:
+        sampled |= flags
+    if sampled.any() and log.isEnabledFor(logging.INFO):
+        ts = round(time.time(), 3)
+        for i in np.flatnonzero(sampled):
+            log.info(json.dumps(dict(event=event, ts=ts, **fields(i)), default=str))
+
+
+def log_error(where, error):
+    metrics.error()
+    log.warning(json.dumps({"event": "error", "ts": round(time.time(), 3), "where": where, "error": str(error)}))
+
+# ========================================================
+# Export (JSON file + optional local endpoint)
+# ========================================================
+
+def export(path=METRICS_FILE):
+    """Writes snapshot() atomically to path; returns the path."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(metrics.snapshot(), f)
+    os.replace(tmp_path, path)
+    return path
+
+
+_exporter = None
+_server = None
+_start_lock = threading.Lock()
+
+
+def start_exporter(path=METRICS_FILE, interval=None, port=None):
+    """
+    Background thread writing the metrics file every EXPORT_INTERVAL seconds, plus an HTTP
+    endpoint on 127.0.0.1:port (GET /metrics -> JSON) when port (or FRAUD_METRICS_PORT) is set.
+    Safe to call on every Streamlit rerun.
+    """
+    global _exporter, _server
+    interval = interval or EXPORT_INTERVAL
+    port = METRICS_PORT if port is None else port
+    with _start_lock:
+        if _exporter is None:
+            def loop():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        export(path)
+                    except OSError:
+                        pass  # metrics must never break a banking page
+            _exporter = threading.Thread(target=loop, name="fraud-metrics", daemon=True)
+            _exporter.start()
+        if port and _server is None:
+            _server = _serve(port)
+    return _server
+
+
+def _serve(port):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("/metrics", ""):
+                self.send_error(404)
+                return
+            body = json.dumps(metrics.snapshot()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    except OSError as e:
+        log_error("metrics endpoint", e)  # port taken (e.g. another Streamlit process)
+        return None
+    threading.Thread(target=server.serve_forever, name="fraud-metrics-http", daemon=True).start()
+    return server
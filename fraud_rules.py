@@ -0,0 +1,164 @@
+import math
+import operator
+import threading
+from collections import Counter
+
+import numpy as np
+
+# ========================================================
+# Declarative fraud rules, compiled to vectorized predicates
+# ========================================================
+# Har rule ek dict hai: {"name", "when": {field: {op: value}}, "action"}.
+# Rules ek dafa compile hote hain (NumPy comparisons), phir poore batch par
+# ek saath chalte hain. "fraud" / "safe" wali rule match ho to model call
+# hi nahi hota; "threshold" rule sirf us row ki decision threshold badalti hai.
+# Pehli matching fraud/safe rule jeetti hai (list ka order = priority).
+
+ACTIONS = ("fraud", "safe", "threshold")
+
+# Decision codes returned by RuleSet.evaluate
+MODEL, FRAUD, SAFE = 0, 1, 2
+
+_OPS = {
+    "==": np.equal, "!=": np.not_equal,
+    "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+    "in": lambda col, values: np.isin(col, values),
+    "not in": lambda col, values: ~np.isin(col, values),
+}
+
+# Same operators on plain Python values (single-row path: no NumPy overhead)
+_SCALAR_OPS = {
+    "==": operator.eq, "!=": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+    "in": lambda value, values: value in values,
+    "not in": lambda value, values: value not in values,
+}
+
+
+class Rule:
+    """One compiled rule: a list of (field, op function, operand) ANDed together."""
+
+    def __init__(self, spec):
+        self.name = spec["name"]
+        self.action = spec["action"]
+        if self.action not in ACTIONS:
+            raise ValueError(f"rule {self.name!r}: unknown action {self.action!r}")
+        if self.action == "threshold" and "threshold" not in spec:
+            raise ValueError(f"rule {self.name!r}: threshold action needs a 'threshold'")
+        self.threshold = spec.get("threshold")
+        if not spec.get("when"):
+            raise ValueError(f"rule {self.name!r}: empty 'when'")
+        self.conditions, self.scalar_conditions = [], []
+        for field, tests in spec["when"].items():
+            for op, operand in tests.items():
+                if op not in _OPS:
+                    raise ValueError(f"rule {self.name!r}: unknown operator {op!r}")
+                if op in ("in", "not in"):
+                    self.conditions.append((field, _OPS[op], np.array(list(operand), dtype=object)))
+                    self.scalar_conditions.append((field, _SCALAR_OPS[op], frozenset(operand)))
+                else:
+                    self.conditions.append((field, _OPS[op], operand))
+                    self.scalar_conditions.append((field, _SCALAR_OPS[op], operand))
+        self.fields = {field for field, _, _ in self.conditions}
+
+    def mask(self, columns, n):
+        """Rows matching every condition; a field missing from columns never matches."""
+        result = np.ones(n, dtype=bool)
+        for field, op, operand in self.conditions:
+            col = columns.get(field)
+            if col is None:
+                return np.zeros(n, dtype=bool)
+            with np.errstate(invalid="ignore"):
+                result &= op(col, operand)
+        return result
+
+    def matches(self, row):
+        """Single-row form of mask(); row is a dict. Missing / None / NaN values never match."""
+        for field, op, operand in self.scalar_conditions:
+            value = row.get(field)
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                return False
+            if not op(value, operand):
+                return False
+        return True
+
+
+class RuleSet:
+    """
+    Compiled rule list. evaluate() returns, per row: decision (MODEL/FRAUD/SAFE),
+    index of the deciding rule (-1 if none) and the probability threshold to use.
+    """
+
+    def __init__(self, rules, default_threshold):
+        self.rules = [Rule(spec) for spec in rules]
+        self.default_threshold = default_threshold
+        self.fields = set().union(*(r.fields for r in self.rules)) if self.rules else set()
+        self._lock = threading.Lock()
+        self.evaluated = 0
+        self.hits = Counter()
+
+    def names(self):
+        return [r.name for r in self.rules]
+
+    def evaluate(self, columns, n, short_circuit=True):
+        decision = np.full(n, MODEL, dtype=np.int8)
+        rule_idx = np.full(n, -1, dtype=np.int16)
+        threshold = np.full(n, self.default_threshold, dtype=np.float64)
+        pending = np.ones(n, dtype=bool)      # no fraud/safe rule has fired yet
+        unthresholded = np.ones(n, dtype=bool)
+
+        for i, rule in enumerate(self.rules):
+            if rule.action == "threshold":
+                m = rule.mask(columns, n) & unthresholded
+                threshold[m] = rule.threshold
+                unthresholded &= ~m
+                rule_idx[m & pending] = i
+            elif short_circuit:
+                m = rule.mask(columns, n) & pending
+                decision[m] = FRAUD if rule.action == "fraud" else SAFE
+                rule_idx[m] = i
+                pending &= ~m
+
+        # A threshold rule only counts as a hit on rows no fraud/safe rule took over
+        counts = np.bincount(rule_idx + 1, minlength=len(self.rules) + 1)[1:]
+        with self._lock:
+            self.evaluated += n
+            for rule, count in zip(self.rules, counts):
+                if count:
+                    self.hits[rule.name] += int(count)
+        return decision, rule_idx, threshold
+
+    def evaluate_row(self, row, short_circuit=True):
+        """evaluate() for one row dict: (decision, rule index or -1, threshold)."""
+        decision, idx, threshold, thresholded = MODEL, -1, self.default_threshold, False
+        for i, rule in enumerate(self.rules):
+            if rule.action == "threshold":
+                if not thresholded and rule.matches(row):
+                    threshold, thresholded = rule.threshold, True
+                    idx = i
+            elif short_circuit and rule.matches(row):
+                decision, idx = (FRAUD if rule.action == "fraud" else SAFE), i
+                break
+        with self._lock:
+            self.evaluated += 1
+            if idx >= 0:
+                self.hits[self.rules[idx].name] += 1
+        return decision, idx, threshold
+
+    def stats(self):
+        """Rows evaluated, rows short-circuited (fraud/safe rules) and hits per rule."""
+        with self._lock:
+            short = sum(self.hits[r.name] for r in self.rules if r.action != "threshold")
+            return {"evaluated": self.evaluated, "short_circuited": short,
+                    "short_circuit_rate": short / self.evaluated if self.evaluated else 0.0,
+                    "hits": dict(self.hits)}
+
+    def reset_stats(self):
+        with self._lock:
+            self.evaluated = 0
+            self.hits = Counter()
+
+
+def column(values):
+    """Context values (numbers / bools / None) as a float array; None -> NaN so it never matches."""
+    return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
@@ -0,0 +1,122 @@
+import time
+import threading
+from concurrent.futures import Future
+
+import fraud_engine as fe
+import fraud_metrics as fm
+
+# ========================================================
+# Micro-batching fraud scoring service
+# ========================================================
+# Har Streamlit session alag se model call karta tha (aik row per call).
+# Ab requests queue mein aati hain; worker thread MAX_WAIT ke andar aane
+# wali sab requests ko aik batch bana kar aik hi model call mein score
+# karta hai, aur har caller ko uska Future mil jata hai. Jab koi aur request
+# queue mein ya scoring mein na ho (Streamlit ka aam haal: aik waqt mein aik
+# request), request caller ke thread par foran score hoti hai; MAX_WAIT ka
+# intezar sirf contention mein hota hai.
+
+MAX_WAIT = 0.002   # seconds the first request of a batch may wait for company
+MAX_BATCH = 256
+COALESCE = True    # False: score on the caller's thread, one row at a time (old behaviour)
+
+
+class ScoringService:
+    """
+    submit(...) takes predict_fraud's arguments and returns a Future of fe.Score (is_fraud, prob; .version).
+    score(...) is the blocking form.
+    """
+
+    def __init__(self, max_wait=None, max_batch=None, coalesce=None):
+        self.max_wait = MAX_WAIT if max_wait is None else max_wait
+        self.max_batch = max_batch or MAX_BATCH
+        self.coalesce = COALESCE if coalesce is None else coalesce
+        self._cond = threading.Condition()
+        self._queue = []
+        self._thread = None
+        self._inflight = 0   # batches being scored right now (inline or by the worker)
+        self.batches = 0
+        self.requests = 0
+        self.inline = 0
+
+    def submit(self, step, trans_type, amount, oldbalanceOrg, newbalanceOrig, oldbalanceDest=0.0, newbalanceDest=None,
+               context=None):
+        future = Future()
+        t = time.perf_counter()
+        try:
+            features = fe.make_features(step, trans_type, amount, oldbalanceOrg, newbalanceOrig,
+                                        oldbalanceDest, newbalanceDest)
+        except Exception as e:
+            fm.log_error("fraud_service.submit", e)
+            future.set_result(fe.Score(False, 0.0))
+            return future
+
+        if not self.coalesce:
+            self._score([(features, context, future, t)])
+            return future
+
+        with self._cond:
+            idle = not self._queue and self._inflight == 0
+            if idle:
+                self._inflight += 1
+                self.inline += 1
+            else:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="fraud-scorer", daemon=True)
+                    self._thread.start()
+                self._queue.append((features, context, future, t))
+                self._cond.notify_all()
+        if idle:  # nobody to batch with: no coalescing wait
+            self._score_inflight([(features, context, future, t)])
+        return future
+
+    def score(self, *args, timeout=None, **kwargs):
+        return self.submit(*args, **kwargs).result(timeout=timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue)
+                # Wait until the oldest request has waited max_wait, or the batch is full
+                deadline = self._queue[0][3] + self.max_wait
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+                self._inflight += 1
+            self._score_inflight(batch)
+
+    def _score_inflight(self, batch):
+        try:
+            self._score(batch)
+        finally:
+            with self._cond:
+                self._inflight -= 1
+
+    def _score(self, batch):
+        try:
+            scores = fe.predict_features([item[0] for item in batch], [item[1] for item in batch])
+            results = [fe.Score(bool(f), float(p), scores.version, rule)
+                       for f, p, rule in zip(scores[0], scores[1], scores.rule)]
+        except Exception as e:
+            fm.log_error("fraud_service", e)
+            results = [fe.Score(False, 0.0)] * len(batch)
+        self.batches += 1
+        self.requests += len(batch)
+        done = time.perf_counter()
+        for (_, _, future, t), result in zip(batch, results):
+            fm.metrics.observe_latency("service_request", done - t)  # queue wait + batch scoring
+            future.set_result(result)
+
+
+service = ScoringService()
+
+
+def submit(*args, **kwargs):
+    return service.submit(*args, **kwargs)
+
+
+def score(*args, **kwargs):
+    return service.score(*args, **kwargs)
@@ -13,14 +13,10 @@ def show():
     st.write("Review your recent account activity, AI insurance estimates, and security logs.")
 
     # 1. Fetch Data
-    all_transactions = dm.get_transactions()
-    # Filter only for this user (either as sender or receiver)
-    user_history = [
-        t for t in all_transactions 
-        if t['sender'] == user['account_no'] or t['receiver_acc'] == user['account_no']
-    ]
+    # Only this user's rows (as sender or receiver), from the per-account column partitions
+    user_history = dm.get_account_transactions(user['account_no'])
 
-    if not user_history:
+    if user_history.empty:
         st.info("No transactions found yet. Start by making a deposit or checking insurance!")
         if st.button("Back to Dashboard"):
             st.session_state.page = "Dashboard"
@@ -39,16 +35,21 @@ def show():
         if st.button("Clear Filters", use_container_width=True):
             st.rerun()
 
-    # Apply Filtering Logic
-    filtered_data = user_history
+    # Apply Filtering Logic (vectorized on the columns)
+    df = user_history
     if search:
-        filtered_data = [t for t in filtered_data if search.lower() in t.get('receiver_name', '').lower() or search.lower() in t.get('receiver_acc', '').lower()]
+        needle = search.lower()
+        df = df[df['receiver_name'].fillna('').str.lower().str.contains(needle, regex=False)
+                | df['receiver_acc'].fillna('').str.lower().str.contains(needle, regex=False)]
     
     if t_filter != "All":
         if t_filter == "Security Alert":
-            filtered_data = [t for t in filtered_data if t.get('status') != "Success" and t.get('status') != "AI_Estimated"]
+            df = df[~df['status'].isin(["Success", "AI_Estimated"])]
         else:
-            filtered_data = [t for t in filtered_data if t['type'] == t_filter]
+            df = df[df['type'] == t_filter]
+
+    df = df.assign(date=df['date'].dt.strftime("%Y-%m-%d %H:%M:%S"))
+    filtered_data = df.to_dict('records')
 
     # 3. Display Data in a Professional Table
     st.divider()
@@ -0,0 +1,463 @@
+import os
+import gzip
+import json
+import hashlib
+from bisect import bisect_right
+from itertools import accumulate
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process locks apply
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+import record_codec
+
+# ========================================================
+# Segmented logs: rotation, compression, manifest
+# ========================================================
+# Active file (e.g. activity_logs.txt) ek hadd tak barhti hai, phir usay
+# "seal" karke compressed segment bana diya jata hai. Manifest mein har
+# segment ke min/max timestamp aur accounts ka bloom filter hota hai, taake
+# readers un segments ko chhor dein jin mein unka data ho hi nahi sakta.
+#
+# Segments ke (uncompressed) bytes aur un ke baad active file mil kar ek hi
+# stream hain. Kisi line ka is stream mein offset seal ke baad bhi wahi rehta
+# hai, is liye indexes rows ki jagah sirf offsets rakh sakte hain.
+
+SEGMENT_DIR = "log_segments"
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+BLOOM_BITS_PER_KEY = 10
+BLOOM_HASHES = 4
+SEGMENT_CACHE = 2           # decompressed segments kept for offset reads
+READ_BLOCK = 1024 * 1024
+
+
+@contextmanager
+def open_for_append(path):
+    """
+    Opens path for appending under an exclusive flock. If the file was swapped
+    out (rotation/compaction) while we waited for the lock, reopens the new one.
+    """
+    while True:
+        f = open(path, "ab")
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            same = os.fstat(f.fileno()).st_ino == os.stat(path).st_ino
+        except FileNotFoundError:
+            same = False
+        if same:
+            break
+        f.close()
+    try:
+        yield f
+    finally:
+        f.close()
+
+
+def iter_lines_reversed(path, block_size=8192):
+    """Yields complete lines from the end of a file backwards, reading fixed-size blocks."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b""
+        first = True
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + tail
+            lines = buf.split(b"\n")
+            tail = lines.pop(0)  # may continue in the previous block: carried over
+            if first and lines:
+                lines.pop()  # text after the last newline: empty, or a torn line
+                first = False
+            for line in reversed(lines):
+                if line.strip():
+                    yield line
+        if tail.strip() and not first:
+            yield tail
+
+
+def _file_lines(f, start=0, shift=0):
+    """(shift + position, line) for every complete line of an open file from start on."""
+    f.seek(start)
+    pos, rest = start, b""
+    while True:
+        block = f.read(READ_BLOCK)
+        if not block:
+            return  # rest: a line still being written (or torn)
+        buf = rest + block
+        end = buf.rfind(b"\n")
+        if end < 0:
+            rest = buf
+            continue
+        for line in buf[:end].split(b"\n"):
+            if line.strip():
+                yield shift + pos, line
+            pos += len(line) + 1
+        rest = buf[end + 1:]
+
+
+def iter_lines_from(path, offset=0):
+    """(offset, line) for every complete line of a plain file at or after offset."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        yield from _file_lines(f, offset)
+
+
+def read_lines(path, offsets):
+    """The lines starting at the given byte offsets of a plain file."""
+    with open(path, "rb") as f:
+        out = []
+        for offset in offsets:
+            f.seek(offset)
+            out.append(f.readline().rstrip(b"\n"))
+        return out
+
+
+class BloomFilter:
+    """Small fixed-size bloom filter over string keys (stored hex-encoded in the manifest)."""
+
+    def __init__(self, n_bits, bits=None):
+        self.n_bits = n_bits
+        self.bits = bits if bits is not None else bytearray((n_bits + 7) // 8)
+
+    @classmethod
+    def for_keys(cls, keys):
+        keys = set(keys)
+        bloom = cls(max(64, len(keys) * BLOOM_BITS_PER_KEY))
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=4 * BLOOM_HASHES).digest()
+        for i in range(BLOOM_HASHES):
+            yield int.from_bytes(digest[4 * i:4 * i + 4], "little") % self.n_bits
+
+    def add(self, key):
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def to_hex(self):
+        return self.bits.hex()
+
+    @classmethod
+    def from_hex(cls, n_bits, text):
+        return cls(n_bits, bytearray.fromhex(text))
+
+
+def _compress(data):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), ".zst"
+    return gzip.compress(data, compresslevel=6), ".gz"
+
+
+def _decompress(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".zst"):
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class SegmentedLog:
+    """
+    One growing line file plus its sealed, compressed segments.
+    time_field: record key used for min/max pruning; key_fields: record keys put in the bloom filter.
+    """
+
+    def __init__(self, path, time_field, key_fields, max_bytes=None, segment_dir=None):
+        self.path = path
+        self.time_field = time_field
+        self.key_fields = tuple(key_fields)
+        self.max_bytes = max_bytes or SEGMENT_MAX_BYTES
+        self.segment_dir = segment_dir or SEGMENT_DIR
+        self.stem = os.path.splitext(os.path.basename(path))[0]
+        self._manifest = None
+        self._manifest_mtime = None
+        self._blooms = {}
+        self._segment_cache = OrderedDict()
+
+    # --- Manifest ---
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.segment_dir, f"{self.stem}.manifest.json")
+
+    def manifest(self):
+        """List of sealed segments, oldest first (re-read only when the file changes)."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if mtime != self._manifest_mtime:
+            with open(self.manifest_path, "r") as f:
+                self._manifest = json.load(f)
+            self._manifest_mtime = mtime
+            self._blooms = {}
+        return self._manifest
+
+    def _write_manifest(self, entries):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def _bloom(self, entry):
+        if entry["file"] not in self._blooms:
+            self._blooms[entry["file"]] = BloomFilter.from_hex(entry["bloom_bits"], entry["bloom"])
+        return self._blooms[entry["file"]]
+
+    def _may_match(self, entry, key=None, since=None, until=None):
+        if since is not None and entry["max_ts"] and entry["max_ts"] < since:
+            return False
+        if until is not None and entry["min_ts"] and entry["min_ts"] > until:
+            return False
+        return key is None or key in self._bloom(entry)
+
+    # --- Writing ---
+
+    def append(self, data, sync=False):
+        """Appends already-encoded line bytes; seals the file once it is large enough."""
+        with open_for_append(self.path) as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        if self.should_rotate():
+            self.seal()
+
+    def should_rotate(self):
+        try:
+            return os.path.getsize(self.path) >= self.max_bytes
+        except FileNotFoundError:
+            return False
+
+    def seal(self, before_cut=None):
+        """
+        Moves every complete line of the active file into a new compressed segment.
+        before_cut() runs while appenders are blocked (lets an in-memory reader catch up).
+        Order: segment file, manifest, then the active file is swapped for the leftover tail.
+        """
+        os.makedirs(self.segment_dir, exist_ok=True)
+        with open_for_append(self.path) as active:
+            entries = list(self.manifest())
+            if self._finish_cut(entries, os.fstat(active.fileno()).st_ino):
+                return False  # the file was swapped under us; seal the new one next time
+            if os.fstat(active.fileno()).st_size < self.max_bytes:
+                return False  # another writer sealed it while we waited for the lock
+            if before_cut is not None:
+                before_cut()
+            with open(self.path, "rb") as f:
+                data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end == 0:
+                return False
+
+            times, keys, last_seq, count = [], set(), None, 0
+            for line in data[:end].split(b"\n"):
+                if not line.strip():
+                    continue
+                try:
+                    record = record_codec.decode(line)
+                except ValueError:
+                    continue
+                count += 1
+                if record.get(self.time_field):
+                    times.append(str(record[self.time_field]))
+                for field in self.key_fields:
+                    if record.get(field) is not None:
+                        keys.add(str(record[field]))
+                last_seq = record.get("seq", last_seq)
+
+            blob, ext = _compress(data[:end])
+            name = f"{self.stem}.{len(entries) + 1:06d}.txt{ext}"
+            seg_path = os.path.join(self.segment_dir, name)
+            with open(seg_path + ".tmp", "wb") as f:
+                f.write(blob)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(seg_path + ".tmp", seg_path)
+
+            bloom = BloomFilter.for_keys(keys)
+            entries.append({
+                "file": name, "count": count, "bytes": end,
+                "min_ts": min(times) if times else None, "max_ts": max(times) if times else None,
+                "last_seq": last_seq, "bloom_bits": bloom.n_bits, "bloom": bloom.to_hex(),
+                "active_inode": os.fstat(active.fileno()).st_ino,
+            })
+            self._write_manifest(entries)
+            self._finish_cut(entries, entries[-1]["active_inode"])
+        return True
+
+    def _finish_cut(self, entries, active_inode):
+        """Drops the sealed prefix from the active file (also completes a cut a crash interrupted)."""
+        if not entries or entries[-1].get("active_inode") != active_inode:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(entries[-1]["bytes"])
+            leftover = f.read()
+        tmp_path = self.path + ".cut"
+        with open(tmp_path, "wb") as f:
+            f.write(leftover)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        entries[-1]["active_inode"] = None
+        self._write_manifest(entries)
+        return True
+
+    def recover(self):
+        """Completes an interrupted seal, if any. Cheap when there is nothing to do."""
+        entries = self.manifest()
+        if entries and entries[-1].get("active_inode") is not None:
+            try:
+                inode = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                return
+            if inode == entries[-1]["active_inode"]:
+                with open_for_append(self.path):
+                    self._finish_cut(list(entries), inode)
+
+    # --- Offsets (one stream: sealed segments, then the active file) ---
+
+    def _open_active(self):
+        """(active file or None, its offset in the stream, manifest) as one snapshot, never mid-cut."""
+        while True:
+            self.recover()
+            entries = self.manifest()
+            try:
+                f = open(self.path, "rb")
+                inode = os.fstat(f.fileno()).st_ino
+            except FileNotFoundError:
+                f, inode = None, None
+            cut_pending = bool(entries) and entries[-1].get("active_inode") == inode
+            if len(self.manifest()) == len(entries) and not cut_pending:
+                return f, sum(e["bytes"] for e in entries), entries
+            if f is not None:
+                f.close()   # sealed while we opened it: take a fresh snapshot
+
+    def _segment_bytes(self, entry):
+        data = self._segment_cache.pop(entry["file"], None)
+        if data is None:
+            data = _decompress(os.path.join(self.segment_dir, entry["file"]))
+        self._segment_cache[entry["file"]] = data
+        while len(self._segment_cache) > SEGMENT_CACHE:
+            self._segment_cache.popitem(last=False)
+        return data
+
+    def end(self):
+        """(stream size, active file inode, number of sealed segments)."""
+        f, base, entries = self._open_active()
+        if f is None:
+            return base, None, len(entries)
+        with f:
+            st = os.fstat(f.fileno())
+            return base + st.st_size, st.st_ino, len(entries)
+
+    def iter_lines_from(self, offset=0):
+        """(offset, line) for every complete line at or after offset: sealed segments, then the active file."""
+        f, base, entries = self._open_active()
+        try:
+            start = 0
+            for entry in entries:
+                if offset < start + entry["bytes"]:
+                    data = self._segment_bytes(entry)
+                    pos = max(offset - start, 0)
+                    for line in data[pos:].split(b"\n"):
+                        if line.strip():
+                            yield start + pos, line
+                        pos += len(line) + 1
+                start += entry["bytes"]
+            if f is not None:
+                yield from _file_lines(f, max(offset - base, 0), base)
+        finally:
+            if f is not None:
+                f.close()
+
+    def read_lines(self, offsets):
+        """The lines starting at the given stream offsets (sorted, so each segment is decompressed once)."""
+        f, base, entries = self._open_active()
+        try:
+            starts = [0] + list(accumulate(e["bytes"] for e in entries))
+            out = []
+            for offset in offsets:
+                if offset >= base:
+                    f.seek(offset - base)
+                    out.append(f.readline().rstrip(b"\n"))
+                else:
+                    i = bisect_right(starts, offset) - 1
+                    data, pos = self._segment_bytes(entries[i]), offset - starts[i]
+                    out.append(data[pos:data.index(b"\n", pos)])
+            return out
+        finally:
+            if f is not None:
+                f.close()
+
+    # --- Reading ---
+
+    def _segment_records(self, entry):
+        for line in _decompress(os.path.join(self.segment_dir, entry["file"])).split(b"\n"):
+            if line.strip():
+                try:
+                    yield record_codec.decode(line)
+                except ValueError:
+                    continue
+
+    def _match(self, record, key, since, until):
+        if key is not None and not any(str(record.get(f)) == key for f in self.key_fields):
+            return False
+        ts = record.get(self.time_field)
+        if since is not None and (ts is None or str(ts) < since):
+            return False
+        return until is None or (ts is not None and str(ts) <= until)
+
+    def iter_records(self, key=None, since=None, until=None):
+        """Oldest-first records, skipping segments the manifest rules out."""
+        self.recover()
+        key = str(key) if key is not None else None
+        for entry in self.manifest():
+            if self._may_match(entry, key, since, until):
+                for record in self._segment_records(entry):
+                    if self._match(record, key, since, until):
+                        yield record
+        for record in record_codec.iter_file(self.path):
+            if self._match(record, key, since, until):
+                yield record
+
+    def iter_records_reversed(self, key=None):
+        """Newest-first records; the active file is read backwards in blocks, then segments."""
+        self.recover()
+        key = str(key) if key is not None else None
+        for line in iter_lines_reversed(self.path):
+            try:
+                record = record_codec.decode(line)
+            except ValueError:
+                continue
+            if self._match(record, key, None, None):
+                yield record
+        for entry in reversed(self.manifest()):
+            if self._may_match(entry, key):
+                for record in reversed(list(self._segment_records(entry))):
+                    if self._match(record, key, None, None):
+                        yield record
@@ -0,0 +1,144 @@
+import os
+import atexit
+import threading
+from collections import defaultdict
+
+from log_segments import open_for_append
+
+# ========================================================
+# Background log writer (group commit)
+# ========================================================
+# Activity, sentiment aur chat logs har call par file open/close nahi karte.
+# Records queue mein jate hain; background thread har FLUSH_INTERVAL mein
+# sab sessions ke records ikathe aik hi write (aur aik fsync) mein likhta hai.
+
+FLUSH_INTERVAL = 0.05  # seconds a record may wait to be grouped with others
+
+# "batch": one fsync per group, "record": fsync after every record, "none": leave it to the OS
+DURABILITY = "batch"
+
+
+class LogWriter:
+    """
+    Queue + daemon thread. write(target, data) returns immediately; target is a file
+    path or any object with append(data, sync=False) (e.g. log_segments.SegmentedLog).
+    """
+
+    def __init__(self, flush_interval=None, durability=None):
+        self.flush_interval = FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.durability = durability or DURABILITY
+        self._cond = threading.Condition()
+        self._queue = []
+        self._enqueued = 0
+        self._written = 0
+        self._thread = None
+        self.batches = 0
+        self.records = 0
+
+    def write(self, target, data):
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+            self._queue.append((target, data))
+            self._enqueued += 1
+            self._cond.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Blocks until everything queued before this call is written (readers call this first)."""
+        with self._cond:
+            upto = self._enqueued
+            self._cond.wait_for(lambda: self._written >= upto, timeout=timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue)
+            # Let other sessions' records join this group
+            if self.flush_interval:
+                threading.Event().wait(self.flush_interval)
+            with self._cond:
+                batch, self._queue = self._queue, []
+            try:
+                self._commit(batch)
+            except Exception:
+                pass  # logging must never break a banking page
+            with self._cond:
+                self._written += len(batch)
+                self._cond.notify_all()
+
+    def _commit(self, batch):
+        grouped = defaultdict(list)
+        for target, data in batch:
+            grouped[target].append(data)
+        for target, chunks in grouped.items():
+            if self.durability == "record":
+                for data in chunks:
+                    _append(target, data, sync=True)
+            else:
+                _append(target, b"".join(chunks), sync=self.durability == "batch")
+        self.batches += 1
+        self.records += len(batch)
+
+
+def _append(target, data, sync):
+    if isinstance(target, str):
+        with open_for_append(target) as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+    else:
+        target.append(data, sync=sync)
+
+
+class FsyncGroup:
+    """
+    Group commit for synchronous writers: callers that need durability call sync();
+    whoever arrives while an fsync is running waits for the next one, which then
+    covers all of them with a single fsync.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._requested = 0
+        self._done = 0
+        self._syncing = False
+
+    def sync(self, path):
+        with self._cond:
+            self._requested += 1
+            ticket = self._requested
+            while self._done < ticket:
+                if self._syncing:
+                    self._cond.wait()
+                    continue
+                self._syncing = True
+                covered = self._requested
+                self._cond.release()
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                finally:
+                    self._cond.acquire()
+                    self._syncing = False
+                    self._done = covered
+                    self._cond.notify_all()
+
+
+_fsync_groups = defaultdict(FsyncGroup)
+_fsync_groups_lock = threading.Lock()
+
+
+def group_fsync(path):
+    """Durably flushes path, sharing the fsync with concurrent callers on the same file."""
+    with _fsync_groups_lock:
+        group = _fsync_groups[path]
+    group.sync(path)
+
+
+writer = LogWriter()
+atexit.register(writer.flush)
@@ -18,8 +18,7 @@ def show():
                 return
 
             # --- STEP B: BACKEND SEARCH ---
-            users = dm.get_users()
-            user = next((u for u in users if u['email'].lower() == email), None)
+            user = dm.get_user(email=email)
 
             if not user:
                 st.error("❌ Invalid Credentials: User not found.")
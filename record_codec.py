@@ -0,0 +1,166 @@
+import os
+import ast
+import sys
+import glob
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# ========================================================
+# Record codecs for the line-per-record .txt files
+# ========================================================
+# Purani files har line par str(dict) likhti thi (parse: ast.literal_eval,
+# bohat slow). Ab nayi lines JSON mein likhi jati hain; read karte waqt har
+# line ka format khud pehchana jata hai, is liye purani aur nayi lines aik
+# hi file mein chal sakti hain.
+#
+# Binary codec (msgpack) bhi line-per-record hai: files ka tail read aur
+# torn-line recovery newline par chalte hain, is liye record ke andar ke
+# b"\n" / b"\r" bytes escape hote hain. msgpack map ka pehla byte >= 0x80
+# hai, JSON / repr lines "{" se shuru hoti hain: detect pehle byte se.
+
+
+class LiteralCodec:
+    """Legacy format: Python repr of the dict."""
+
+    name = "literal"
+
+    def encode(self, record):
+        return str(record).encode("utf-8")
+
+    def decode(self, line):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        return ast.literal_eval(line.strip())
+
+
+class JsonCodec:
+    """JSON Lines; uses orjson when installed, stdlib json otherwise."""
+
+    name = "json"
+
+    def encode(self, record):
+        if orjson is not None:
+            return orjson.dumps(record)
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, line):
+        if orjson is not None:
+            return orjson.loads(line)
+        return json.loads(line)
+
+
+class BinaryCodec:
+    """msgpack, with newline bytes escaped so every record stays on one line. Needs msgpack."""
+
+    name = "binary"
+    ESCAPES = ((b"\xdb", b"\xdb\xdd"), (b"\n", b"\xdb\xdc"), (b"\r", b"\xdb\xde"))  # escape byte first
+
+    def encode(self, record):
+        if msgpack is None:
+            raise RuntimeError("the binary codec needs msgpack (pip install msgpack)")
+        data = msgpack.packb(record, use_bin_type=True)
+        for raw, escaped in self.ESCAPES:
+            data = data.replace(raw, escaped)
+        return data
+
+    def decode(self, line):
+        if msgpack is None:
+            raise RuntimeError("binary record found but msgpack is not installed")  # loud: not a bad line
+        if line.endswith(b"\n"):
+            line = line[:-1]  # not strip(): trailing whitespace bytes can be part of the record
+        if b"\xdb" in line:
+            for raw, escaped in reversed(self.ESCAPES):
+                line = line.replace(escaped, raw)
+        try:
+            return msgpack.unpackb(line, raw=False, strict_map_key=False)
+        except msgpack.UnpackException as e:   # torn line: data ends mid-record
+            raise ValueError(e)
+
+
+CODECS = {c.name: c for c in (LiteralCodec(), JsonCodec(), BinaryCodec())}
+
+# Format used for every new line written (RECORD_CODEC=binary needs msgpack)
+WRITE_CODEC = CODECS[os.environ.get("RECORD_CODEC", "json")]
+
+
+def detect(line):
+    """JSON objects start with {" , Python dict reprs with {' , msgpack maps with a byte >= 0x80."""
+    if isinstance(line, bytes) and line[:1] >= b"\x80":
+        return CODECS["binary"]
+    head = line.lstrip()[:2]
+    if head in (b'{"', '{"', b"{}", "{}"):
+        return CODECS["json"]
+    return CODECS["literal"]
+
+
+def decode(line):
+    """Parses one line in whichever format it was written. Raises ValueError on garbage."""
+    try:
+        return detect(line).decode(line)
+    except (ValueError, SyntaxError, TypeError) as e:
+        raise ValueError(f"Unreadable record: {e}")
+
+
+def encode(record):
+    """Encodes one record with WRITE_CODEC (no trailing newline)."""
+    return WRITE_CODEC.encode(record)
+
+
+def iter_file(path):
+    """Streams the records of a line file (bad lines skipped)."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                try:
+                    yield decode(line)
+                except ValueError:
+                    continue
+
+
+def read_file(path):
+    """All records of a line file (bad lines skipped)."""
+    return list(iter_file(path))
+
+
+# ========================================================
+# One-shot migration: rewrite existing files in a codec
+# ========================================================
+
+DEFAULT_FILES = ["user_data.txt", "transactions.txt", "activity_logs.txt", "sentiment_logs.txt"]
+
+
+def migrate_file(path, codec_name="json"):
+    """Rewrites a file with every line in codec_name; atomic (tmp file + rename). Returns line count."""
+    codec = CODECS[codec_name]
+    records = read_file(path)
+    tmp_path = path + ".migrate"
+    with open(tmp_path, "wb") as f:
+        for record in records:
+            f.write(codec.encode(record) + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+if __name__ == "__main__":
+    # python record_codec.py [--to json|literal|binary] [files...]
+    args = sys.argv[1:]
+    target = "json"
+    if args[:1] == ["--to"]:
+        target, args = args[1], args[2:]
+    files = args or DEFAULT_FILES + sorted(glob.glob("data/chat_history_*.txt"))
+    for path in files:
+        if os.path.exists(path):
+            print(f"{path}: {migrate_file(path, target)} records -> {target}")
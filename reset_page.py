@@ -1,36 +1,12 @@
 import streamlit as st
-import cv2
-import numpy as np
-import os
-from PIL import Image
 import data_manager as dm
+import face_store
+import face_preprocess
+import face_detect
+import face_samples
 import rules as val 
 import time
 
-def train_specific_user(face_id, account_no):
-    """Specific user ke folder se FRESH training (Zero Memory Logic)."""
-    recognizer = cv2.face.LBPHFaceRecognizer_create()
-    path = f"data/{account_no}"
-    
-    if not os.path.exists(path) or len(os.listdir(path)) == 0:
-        return None
-
-    face_samples = []
-    ids = []
-    
-    try:
-        for img_name in os.listdir(path):
-            img_path = os.path.join(path, img_name)
-            gray_img = Image.open(img_path).convert('L')
-            img_numpy = np.array(gray_img, 'uint8')
-            face_samples.append(img_numpy)
-            ids.append(int(face_id))
-            
-        recognizer.train(face_samples, np.array(ids))
-        return recognizer
-    except:
-        return None
-
 def show():
     st.header("🔄 Advanced PIN Recovery")
     
@@ -55,12 +31,9 @@ def show():
                     st.error(f"{m_cnic if not v_cnic else m_phone}")
                     return
 
-                users = dm.get_users()
-                user = next((u for u in users if u['email'] == r_email and 
-                             str(u['cnic']) == str(r_cnic) and 
-                             str(u['phone']) == str(r_phone)), None)
+                user = dm.get_user(cnic=r_cnic)
                 
-                if user:
+                if user and user['email'] == r_email and str(user['phone']) == str(r_phone):
                     st.session_state.reset_user_data = user
                     st.session_state.reset_step = 2
                     st.rerun()
@@ -93,24 +66,20 @@ def show():
 
         if img_file:
             with st.spinner("Verifying Biometrics..."):
-                recognizer = train_specific_user(user['face_id'], user['account_no'])
+                matcher = face_store.get_templates(user['face_id'], user['account_no'])
                 
-                if recognizer is None:
+                if matcher is None:
                     st.error("🚨 Biometric data not found!")
                     return
 
                 # Convert image for processing
-                image = Image.open(img_file)
-                img_array = np.array(image)
-                cv2_img = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-                gray = cv2.cvtColor(cv2_img, cv2.COLOR_BGR2GRAY)
+                gray = face_preprocess.to_gray(img_file)
                 
-                face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-                faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+                faces = face_detect.detect_faces(gray)
 
                 if len(faces) > 0:
                     for (x, y, w, h) in faces:
-                        detected_id, confidence = recognizer.predict(gray[y:y+h, x:x+w])
+                        detected_id, confidence = matcher.predict(face_samples.crop(gray, (x, y, w, h)))
                         
                         # Strict Security Logic
                         if detected_id == int(user['face_id']) and confidence < 35:
@@ -1,11 +1,15 @@
 import streamlit as st
 import data_manager as dm
+import face_store
+import face_preprocess
+import face_detect
+import face_samples
 import rules as val 
-import cv2
-import os
 import time
-import numpy as np
-from PIL import Image
+
+# Har snapshot ka face crop ek dafa user ki sample archive mein jata hai
+# (pehle wahi crop 10 JPEG files ban kar likha jata tha)
+SAMPLES_REQUIRED = 10
 
 def show():
     st.header("🏦 BOP Biometric Account Opening")
@@ -64,50 +68,44 @@ def show():
 
         acc_no = st.session_state.final_account_no
         clean_acc_no = acc_no.split(":")[-1].strip() if ":" in acc_no else acc_no
-        folder_name = f"data/{clean_acc_no}" 
-        
-        if not os.path.exists(folder_name):
-            os.makedirs(folder_name)
+        archive = face_samples.archive_path(clean_acc_no)
 
         if 'capture_count' not in st.session_state:
             st.session_state.capture_count = 0
 
         # --- Progress Bar for Visual ---
-        progress = st.session_state.capture_count / 100
+        progress = st.session_state.capture_count / SAMPLES_REQUIRED
         st.progress(progress)
-        st.warning(f"Account: {clean_acc_no} | Progress: {st.session_state.capture_count}/100 Samples")
+        st.warning(f"Account: {clean_acc_no} | Progress: {st.session_state.capture_count}/{SAMPLES_REQUIRED} Samples")
         
         # Streamlit Camera Input
-        img_file = st.camera_input("Take a snapshot (System will auto-generate 10 samples per click)")
+        img_file = st.camera_input("Take a snapshot (one sample per click)")
 
-        # Loop Control: Sirf tab chale jab 100 se kam hon aur image click ho
-        if img_file and st.session_state.capture_count < 100:
-            image = Image.open(img_file)
-            img_array = np.array(image)
-            cv2_img = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            gray = cv2.cvtColor(cv2_img, cv2.COLOR_BGR2GRAY)
+        # Loop Control: Sirf tab chale jab SAMPLES_REQUIRED se kam hon aur image click ho
+        if img_file and st.session_state.capture_count < SAMPLES_REQUIRED:
+            gray = face_preprocess.to_gray(img_file)
             
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-            faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+            faces = face_detect.detect_faces(gray)
 
             if len(faces) > 0:
-                # 10 Samples generate karein har click par
-                for i in range(10):
-                    if st.session_state.capture_count < 100:
-                        st.session_state.capture_count += 1
-                        c = st.session_state.capture_count
-                        # Image slice aur save
-                        face_img = gray[faces[0][1]:faces[0][1]+faces[0][3], faces[0][0]:faces[0][0]+faces[0][2]]
-                        cv2.imwrite(f"{folder_name}/{clean_acc_no}.{c}.jpg", face_img)
-                
-                st.success(f"Added 10 samples! Total: {st.session_state.capture_count}/100")
+                # Image slice aur archive mein save (same snapshot dobara aaye to duplicate drop)
+                x, y, w, h = faces[0]
+                total, added = face_samples.append(archive, [gray[y:y+h, x:x+w]])
+                st.session_state.capture_count = total
+                if added:
+                    st.success(f"Sample added! Total: {total}/{SAMPLES_REQUIRED}")
+                else:
+                    st.info("Same snapshot as before, please take a new one.")
                 time.sleep(1) # Chota pause taake user dekh sake
                 st.rerun() # Refresh taake camera reset ho agle click ke liye
             else:
                 st.error("No face detected! Please adjust your position.")
 
         # --- Completion Logic ---
-        if st.session_state.capture_count >= 100:
+        if st.session_state.capture_count >= SAMPLES_REQUIRED:
+            # Biometric model train karke save (login par sirf load hoga)
+            with st.spinner("Building your biometric model..."):
+                face_store.train_user(user_info['face_id'], clean_acc_no)
             st.success(f"✅ Signup Successful! Account No: {clean_acc_no}")
             st.balloons()
             time.sleep(3)
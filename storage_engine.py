@@ -0,0 +1,516 @@
+import os
+import random
+import threading
+from array import array
+from collections import deque
+import record_codec
+import log_writer
+import log_segments
+from log_segments import iter_lines_reversed, open_for_append
+
+# ========================================================
+# Append-only record logs with in-memory indexes
+# ========================================================
+# user_data.txt aur transactions.txt dono line-per-record logs hain.
+# File sirf append hoti hai; memory mein indexes rakhe jate hain taake
+# lookups O(1) hon aur har call par poori file parse na karni pare.
+# Ledger ke indexes rows nahi, sirf un ke byte offsets rakhte hain; rows
+# zaroorat par disk se parhi jati hain.
+
+# User log is rewritten once it holds this many times more lines than live users
+COMPACT_RATIO = 2
+COMPACT_MIN_LINES = 1000
+
+# Writers return only after their line is fsync'd; concurrent writers share one fsync (group commit)
+DURABLE = True
+
+# How many recent multi-account batches are remembered for ledger redo after a crash
+RECENT_BATCHES = 1000
+
+# Account numbers: BOP-<8 digits>
+ACCOUNT_NO_MIN, ACCOUNT_NO_MAX = 10000000, 99999999
+ACCOUNT_NO_RANDOM_TRIES = 32
+FIRST_FACE_ID = 101
+
+USER_DEFAULTS = {"balance": 0.0, "failed_tries": 0, "is_locked": False, "face_id": None}
+
+
+def parse_line(line):
+    return record_codec.decode(line)
+
+
+def dump_line(record):
+    return record_codec.encode(record) + b"\n"
+
+
+class RecordLog:
+    """
+    Base class: tracks how far the file has been read and applies new lines.
+    Reads pick up appends made by other processes by reading only the tail.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._offset = 0
+        self._inode = None
+        self._lines = 0
+        self._torn = False
+
+    def _reset(self):
+        raise NotImplementedError
+
+    def _apply(self, record):
+        raise NotImplementedError
+
+    def sync(self):
+        """Applies anything appended to the file since the last read."""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        """Brings the in-memory state up to date with the file on disk."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            if self._offset:
+                self._reset()
+                self._offset, self._inode, self._lines = 0, None, 0
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # File was replaced (compaction) or truncated: rebuild from scratch
+            self._reset()
+            self._offset, self._inode, self._lines = 0, st.st_ino, 0
+        if st.st_size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(st.st_size - self._offset)
+        end = chunk.rfind(b"\n")
+        # Bytes after the last newline are a half-written (or crash-torn) line
+        self._torn = end != len(chunk) - 1
+        if end < 0:
+            return
+        for line in chunk[:end].split(b"\n"):
+            if line.strip():
+                try:
+                    self._apply(parse_line(line))
+                except ValueError:
+                    continue
+                self._lines += 1
+        self._offset += end + 1
+
+    def _append(self, record):
+        with open_for_append(self.path) as f:
+            self._refresh()
+            line = dump_line(record)
+            if self._torn:
+                # Seal off a torn tail so it cannot swallow this record
+                line = b"\n" + line
+            f.write(line)
+        self._refresh()
+
+    def _sync(self):
+        """Called by writers after releasing the lock, so waiting writers can share the fsync."""
+        if DURABLE:
+            log_writer.group_fsync(self.path)
+
+
+class UserTable(RecordLog):
+    """
+    Users keyed by account_no with unique indexes on email, cnic and face_id.
+    New users append a full record; field changes append a small update record
+    ({"__op__": "update", "account_no": ..., "fields": {...}}) for that account only.
+    Multi-account changes are one {"__op__": "batch", "updates": {acc: fields}} line,
+    so a crash leaves either all of them or none.
+    The uniqueness indexes (account_no, email, cnic, face_id) are in memory only: built
+    in the same pass that loads the records at start, then kept current by every append.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._reset()
+
+    def _reset(self):
+        self._by_acc = {}
+        self._by_email = {}
+        self._by_cnic = {}
+        self._by_face_id = {}
+        self._max_face_id = FIRST_FACE_ID - 1
+        self._recent_batches = deque(maxlen=RECENT_BATCHES)
+        self._inflight = {}
+
+    def _apply(self, record):
+        if record.get("__op__") == "batch":
+            for acc, fields in record["updates"].items():
+                self._apply({"__op__": "update", "account_no": acc, "fields": fields})
+            self._recent_batches.append(record)
+            return
+        if record.get("__op__") == "update":
+            current = self._by_acc.get(record.get("account_no"))
+            if current is None:
+                return
+            record = dict(current, **record["fields"])
+        for key, default in USER_DEFAULTS.items():
+            if key not in record:
+                record[key] = default
+        acc = record.get("account_no")
+        old = self._by_acc.get(acc)
+        if old is not None:
+            self._by_email.pop(str(old.get("email", "")).lower(), None)
+            self._by_cnic.pop(str(old.get("cnic", "")), None)
+            self._by_face_id.pop(old.get("face_id"), None)
+        self._by_acc[acc] = record
+        self._by_email[str(record.get("email", "")).lower()] = acc
+        self._by_cnic[str(record.get("cnic", ""))] = acc
+        face_id = record.get("face_id")
+        if face_id is not None:
+            try:
+                face_id = int(face_id)
+            except (TypeError, ValueError):
+                return
+            self._by_face_id[face_id] = acc
+            self._max_face_id = max(self._max_face_id, face_id)
+
+    def all(self):
+        with self._lock:
+            self._refresh()
+            return [dict(u) for u in self._by_acc.values()]
+
+    def count(self):
+        with self._lock:
+            self._refresh()
+            return len(self._by_acc)
+
+    def get(self, account_no=None, email=None, cnic=None):
+        """O(1) lookup by any one of the indexed keys. Returns a copy or None."""
+        with self._lock:
+            self._refresh()
+            if account_no is None and email is not None:
+                account_no = self._by_email.get(str(email).lower())
+            if account_no is None and cnic is not None:
+                account_no = self._by_cnic.get(str(cnic))
+            user = self._by_acc.get(account_no)
+            return dict(user) if user is not None else None
+
+    def exists(self, account_no=None, email=None, cnic=None):
+        with self._lock:
+            self._refresh()
+            return ((account_no is not None and account_no in self._by_acc)
+                    or (email is not None and str(email).lower() in self._by_email)
+                    or (cnic is not None and str(cnic) in self._by_cnic))
+
+    def next_face_id(self):
+        """Next free face_id without scanning users (highest ever seen + 1)."""
+        with self._lock:
+            self._refresh()
+            return self._max_face_id + 1
+
+    def _new_account_no(self):
+        # Random probes first; once the space is crowded, walk from a random start to the next gap
+        for _ in range(ACCOUNT_NO_RANDOM_TRIES):
+            candidate = f"BOP-{random.randint(ACCOUNT_NO_MIN, ACCOUNT_NO_MAX)}"
+            if candidate not in self._by_acc:
+                return candidate
+        span = ACCOUNT_NO_MAX - ACCOUNT_NO_MIN + 1
+        start = random.randrange(span)
+        for step in range(span):
+            candidate = f"BOP-{ACCOUNT_NO_MIN + (start + step) % span}"
+            if candidate not in self._by_acc:
+                return candidate
+        raise RuntimeError("Account number space exhausted.")
+
+    def new_account_no(self):
+        with self._lock:
+            self._refresh()
+            return self._new_account_no()
+
+    def create(self, record):
+        """
+        Inserts a new user: checks cnic/email uniqueness, allocates account_no and
+        (if missing or taken) face_id, all under one lock so concurrent signups
+        cannot collide. Returns (account_no, None) or (None, "cnic" | "email").
+        """
+        with self._lock:
+            self._refresh()
+            if str(record.get("cnic", "")) in self._by_cnic:
+                return None, "cnic"
+            if str(record.get("email", "")).lower() in self._by_email:
+                return None, "email"
+            record["account_no"] = self._new_account_no()
+            if record.get("face_id") is None or int(record["face_id"]) in self._by_face_id:
+                record["face_id"] = self._max_face_id + 1
+            self._append(dict(record))
+            self.maybe_compact()
+        self._sync()
+        return record["account_no"], None
+
+    def put(self, record):
+        """Appends a full user record (insert or replace)."""
+        with self._lock:
+            self._append(dict(record))
+            self.maybe_compact()
+        self._sync()
+
+    def update(self, account_no, **fields):
+        """Point update of some fields of one account. Returns False if unknown."""
+        with self._lock:
+            self._refresh()
+            if account_no not in self._by_acc:
+                return False
+            self._append({"__op__": "update", "account_no": account_no, "fields": fields})
+            self.maybe_compact()
+        self._sync()
+        return True
+
+    def update_many(self, updates, **extra):
+        """
+        Writes {account_no: {field: value}} for several accounts as ONE log line.
+        Extra keys (e.g. txn_id, entry) are stored with it for recovery.
+        Does not compact: the caller compacts once its follow-up writes are done.
+        """
+        with self._lock:
+            self._refresh()
+            if any(acc not in self._by_acc for acc in updates):
+                return False
+            record = dict(extra, __op__="batch", updates=updates)
+            self._append(record)
+            if "txn_id" in extra:
+                self._inflight[extra["txn_id"]] = record
+        self._sync()
+        return True
+
+    def confirm(self, txn_id):
+        """Marks a batch's follow-up (ledger) write as done so compaction may drop it."""
+        with self._lock:
+            self._inflight.pop(txn_id, None)
+
+    def recent_batches(self):
+        with self._lock:
+            self._refresh()
+            return list(self._recent_batches)
+
+    def increment(self, account_no, field, amount, ndigits=2):
+        """Atomic (in-process) read-modify-write of a numeric field. Returns the new value or None."""
+        with self._lock:
+            self._refresh()
+            user = self._by_acc.get(account_no)
+            if user is None:
+                return None
+            value = round(float(user.get(field) or 0.0) + float(amount), ndigits)
+            self._append({"__op__": "update", "account_no": account_no, "fields": {field: value}})
+            self.maybe_compact()
+        self._sync()
+        return value
+
+    def maybe_compact(self):
+        live = len(self._by_acc)
+        if self._lines >= COMPACT_MIN_LINES and self._lines > COMPACT_RATIO * live:
+            self.compact()
+
+    def compact(self):
+        """Rewrites the log with one line per live user, then swaps it in atomically."""
+        with self._lock:
+            self._refresh()
+            tmp_path = self.path + ".compact"
+            with open(tmp_path, "wb") as f:
+                for user in self._by_acc.values():
+                    f.write(dump_line(user))
+                # Unconfirmed batches survive as data-less markers for recovery
+                for record in self._inflight.values():
+                    f.write(dump_line(dict(record, updates={})))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            st = os.stat(self.path)
+            self._offset, self._inode = st.st_size, st.st_ino
+            self._lines = len(self._by_acc) + len(self._inflight)
+            self._recent_batches = deque(self._inflight.values(), maxlen=RECENT_BATCHES)
+
+
+class Ledger(RecordLog):
+    """
+    Append-only transaction log with secondary indexes on sender and receiver.
+    Every new row gets a monotonically increasing "seq" (legacy rows count by position).
+    The indexes hold each row's offset in the log stream (see log_segments), not the
+    row: rows are read back on demand. Nothing is indexed until a method needs it;
+    last_seq(), append() and find_txns() only read the tail.
+    """
+
+    def __init__(self, path, segments=None):
+        super().__init__(path)
+        self.segments = segments
+        self._listeners = []
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        for _, on_reset in self._listeners:
+            on_reset()
+        self._count = 0
+        self._seq = 0
+        self._offset = 0            # stream offset indexed up to
+        self._sealed = 0
+        self._by_sender = {}        # account -> array of row offsets
+        self._by_receiver = {}
+
+    # --- Stream (sealed segments + active file, or the plain file) ---
+
+    def _end(self):
+        if self.segments is not None:
+            return self.segments.end()
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return 0, None, 0
+        return st.st_size, st.st_ino, 0
+
+    def end_offset(self):
+        """Stream offset just past the last byte written (stats the files, reads nothing)."""
+        return self._end()[0]
+
+    def iter_lines_from(self, offset=0):
+        """(offset, line) for every complete ledger line at or after a stream offset."""
+        if self.segments is not None:
+            return self.segments.iter_lines_from(offset)
+        return log_segments.iter_lines_from(self.path, offset)
+
+    def _read(self, offsets):
+        if self.segments is not None:
+            return self.segments.read_lines(offsets)
+        return log_segments.read_lines(self.path, offsets)
+
+    def _records(self, until):
+        for offset, line in self.iter_lines_from(0):
+            if offset >= until:
+                return
+            try:
+                yield parse_line(line)
+            except ValueError:
+                continue
+
+    def _refresh(self):
+        """Indexes every complete line appended since the last read (all of them on first use)."""
+        size, inode, sealed = self._end()
+        if self._loaded and (size < self._offset or (inode != self._inode and sealed == self._sealed)):
+            self._reset()   # truncated or replaced (a seal changes the inode but adds a segment)
+        self._inode, self._sealed, self._loaded = inode, sealed, True
+        if size == self._offset:
+            return
+        for offset, line in self.iter_lines_from(self._offset):
+            try:
+                self._apply(offset, parse_line(line))
+            except ValueError:
+                pass
+            self._offset = offset + len(line) + 1
+
+    def _apply(self, offset, record):
+        self._count += 1
+        self._seq = record.get("seq", self._seq + 1)
+        sender, receiver = record.get("sender"), record.get("receiver_acc")
+        self._by_sender.setdefault(sender, array("q")).append(offset)
+        if receiver != sender:
+            self._by_receiver.setdefault(receiver, array("q")).append(offset)
+        for on_record, _ in self._listeners:
+            on_record(record)
+
+    def subscribe(self, on_record, on_reset):
+        """Derived views (e.g. rolling features) get every row already indexed and every new one."""
+        with self._lock:
+            self._listeners.append((on_record, on_reset))
+            if self._loaded:
+                for record in self._records(self._offset):
+                    on_record(record)
+
+    def all(self):
+        with self._lock:
+            self._refresh()
+            return list(self._records(self._offset))
+
+    def count(self):
+        with self._lock:
+            self._refresh()
+            return self._count
+
+    def for_account(self, account_no):
+        """Transactions where the account is sender or receiver, in ledger order."""
+        with self._lock:
+            self._refresh()
+            offsets = sorted(set(self._by_sender.get(account_no, ()))
+                             | set(self._by_receiver.get(account_no, ())))
+            return [parse_line(line) for line in self._read(offsets)]
+
+    def _tail_seq(self):
+        """Seq of the last row, from the tail only; None if that row has none (legacy ledger)."""
+        for line in iter_lines_reversed(self.path):
+            try:
+                record = parse_line(line)
+            except ValueError:
+                continue
+            return record.get("seq")
+        # Empty active file (fresh after a rotation): the manifest knows the last seq
+        sealed = self.segments.manifest() if self.segments is not None else []
+        if sealed:
+            return sealed[-1].get("last_seq")
+        return 0
+
+    def last_seq(self):
+        """
+        Highest sequence number written. Before the ledger is indexed this only
+        reads the last line of the file, so it is O(1) in ledger size.
+        """
+        with self._lock:
+            if not self._loaded:
+                seq = self._tail_seq()
+                if seq is not None:
+                    return seq
+            self._refresh()
+            return self._seq
+
+    def _iter_reversed(self):
+        if self.segments is not None:
+            yield from self.segments.iter_records_reversed()
+            return
+        for line in iter_lines_reversed(self.path):
+            try:
+                yield parse_line(line)
+            except ValueError:
+                continue
+
+    def find_txns(self, txn_ids, since=None):
+        """
+        Which of txn_ids are in the ledger. Reads backwards from the tail and stops once
+        all are found or rows are dated before since, so the ledger is never loaded.
+        """
+        wanted, found = set(txn_ids), set()
+        with self._lock:
+            for record in self._iter_reversed():
+                if len(found) == len(wanted):
+                    break
+                if record.get("txn_id") in wanted:
+                    found.add(record["txn_id"])
+                elif since is not None and record.get("date") and str(record["date"]) < since:
+                    break
+        return found
+
+    def _append(self, record):
+        with open_for_append(self.path) as f:
+            # Under the file lock the tail is final: the next seq comes from it (or the index)
+            record["seq"] = self.last_seq() + 1
+            line = dump_line(record)
+            if f.tell():
+                with open(self.path, "rb") as tail:
+                    tail.seek(-1, os.SEEK_END)
+                    if tail.read(1) != b"\n":
+                        # Seal off a torn tail so it cannot swallow this record
+                        line = b"\n" + line
+            f.write(line)
+        if self._loaded:
+            self._refresh()
+        if self.segments is not None and self.segments.should_rotate():
+            self.segments.seal()   # indexed offsets stay valid across a seal
+
+    def append(self, record):
+        with self._lock:
+            self._append(dict(record))
+        self._sync()
@@ -0,0 +1,258 @@
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from feature_store import money_flow, _ts
+
+# ========================================================
+# Incremental transfer graph (mule-account signals)
+# ========================================================
+# Har successful account-to-account transfer ek edge hai: sender -> receiver
+# (waqt aur amount ke saath). Edges CSR arrays mein hain (out aur in dono
+# taraf): ek node ke saare edges ek contiguous slice hain, is liye fan-in /
+# fan-out aur chain walk ke liye poora ledger nahi dekhna parta. Nayi edges
+# pehle chhote per-node "delta" mein jati hain; delta base ka MERGE_FRACTION
+# ho jaye to CSR dobara banta hai (geometric growth, amortized O(log E) per edge).
+
+WINDOW = 86400               # seconds for the *_24h fan-in / fan-out features
+PASS_THROUGH_WINDOW = 3600   # money must leave within this many seconds of arriving
+PASS_THROUGH_RATIO = 0.8     # received and forwarded amounts within this ratio of each other
+MAX_CHAIN = 4                # deepest pass-through chain followed backwards
+MAX_BRANCH = 8               # incoming edges tried per hop (most recent first)
+
+MERGE_MIN = 4096             # delta edges before the first CSR build
+MERGE_FRACTION = 0.25        # rebuild once delta > this share of the CSR edges
+
+
+class CSR:
+    """Compressed adjacency: neighbours of node u are nbr[indptr[u]:indptr[u+1]] (insertion order)."""
+
+    __slots__ = ("indptr", "nbr", "ts", "amount")
+
+    def __init__(self, key, other, ts, amount, n_nodes):
+        order = np.argsort(key, kind="stable")
+        self.indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(key, minlength=n_nodes), out=self.indptr[1:])
+        self.nbr = other[order]
+        self.ts = ts[order]
+        self.amount = amount[order]
+
+    def edges(self, u):
+        if u + 1 >= len(self.indptr):
+            return None
+        lo, hi = self.indptr[u], self.indptr[u + 1]
+        return self.nbr[lo:hi], self.ts[lo:hi], self.amount[lo:hi]
+
+    def nbytes(self):
+        return self.indptr.nbytes + self.nbr.nbytes + self.ts.nbytes + self.amount.nbytes
+
+
+class TransferGraph:
+    """
+    Fed by the Ledger (see storage_engine.Ledger.subscribe), like feature_store.FeatureStore.
+    Only rows that move money between two accounts (feature_store.money_flow) become edges.
+    """
+
+    def __init__(self, merge_min=None, merge_fraction=None):
+        self.merge_min = merge_min or MERGE_MIN
+        self.merge_fraction = MERGE_FRACTION if merge_fraction is None else merge_fraction
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._ids = {}                 # account_no -> node id
+        self._names = []
+        cap = 1024
+        self._src = np.empty(cap, dtype=np.int32)
+        self._dst = np.empty(cap, dtype=np.int32)
+        self._ts = np.empty(cap, dtype=np.float64)
+        self._amount = np.empty(cap, dtype=np.float64)
+        self._n = 0                    # edges stored
+        self._merged = 0               # edges in the CSR arrays
+        self._out = self._in = None
+        self._out_delta, self._in_delta = {}, {}   # node -> [(neighbour, ts, amount)]
+        self.merges = 0
+
+    # --- Insertion ---
+
+    def add(self, record):
+        flow = money_flow(record)
+        if flow is None or flow[1] is None or flow[3]:
+            return
+        ts = _ts(record.get("date"))
+        if ts is not None:
+            self.add_edge(flow[0], flow[1], ts, flow[2])
+
+    def add_edge(self, sender, receiver, ts, amount):
+        with self._lock:
+            u, v = self._node(sender), self._node(receiver)
+            if self._n == len(self._src):
+                self._grow()
+            i = self._n
+            self._src[i], self._dst[i], self._ts[i], self._amount[i] = u, v, ts, amount
+            self._n += 1
+            self._out_delta.setdefault(u, []).append((v, ts, amount))
+            self._in_delta.setdefault(v, []).append((u, ts, amount))
+            if self._n - self._merged >= max(self.merge_min, self._merged * self.merge_fraction):
+                self._merge()
+
+    def _node(self, account_no):
+        u = self._ids.get(account_no)
+        if u is None:
+            u = self._ids[account_no] = len(self._names)
+            self._names.append(account_no)
+        return u
+
+    def _grow(self):
+        cap = 2 * len(self._src)
+        for name in ("_src", "_dst", "_ts", "_amount"):
+            old = getattr(self, name)
+            new = np.empty(cap, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+
+    def _merge(self):
+        n, nodes = self._n, len(self._names)
+        src, dst, ts, amount = self._src[:n], self._dst[:n], self._ts[:n], self._amount[:n]
+        self._out = CSR(src, dst, ts, amount, nodes)
+        self._in = CSR(dst, src, ts, amount, nodes)
+        self._merged = n
+        self._out_delta, self._in_delta = {}, {}
+        self.merges += 1
+
+    # --- Queries (caller holds the lock) ---
+
+    def _edges(self, csr, delta, u):
+        """(neighbours, ts, amounts) of node u: CSR slice plus edges not merged yet."""
+        base = csr.edges(u) if csr is not None else None
+        extra = delta.get(u)
+        if not extra:
+            if base is None:
+                return np.zeros(0, dtype=np.int32), np.zeros(0), np.zeros(0)
+            return base
+        nbr = np.fromiter((e[0] for e in extra), dtype=np.int32, count=len(extra))
+        ts = np.fromiter((e[1] for e in extra), dtype=np.float64, count=len(extra))
+        amount = np.fromiter((e[2] for e in extra), dtype=np.float64, count=len(extra))
+        if base is None:
+            return nbr, ts, amount
+        return np.concatenate([base[0], nbr]), np.concatenate([base[1], ts]), np.concatenate([base[2], amount])
+
+    def _out_edges(self, u):
+        return self._edges(self._out, self._out_delta, u)
+
+    def _in_edges(self, u):
+        return self._edges(self._in, self._in_delta, u)
+
+    @staticmethod
+    def _window(edges, since, until):
+        nbr, ts, amount = edges
+        m = (ts > since) & (ts <= until)
+        return nbr[m], ts[m], amount[m]
+
+    def _pass_through(self, u, t_out, amount_out, depth, path):
+        """Longest chain of accounts that received ~amount_out shortly before forwarding it to u's transfer."""
+        if depth >= MAX_CHAIN:
+            return 0
+        nbr, ts, amount = self._window(self._in_edges(u), t_out - PASS_THROUGH_WINDOW, t_out)
+        m = (amount >= amount_out * PASS_THROUGH_RATIO) & (amount * PASS_THROUGH_RATIO <= amount_out)
+        if not m.any():
+            return 0
+        nbr, ts, amount = nbr[m], ts[m], amount[m]
+        best = 1
+        for k in np.argsort(ts)[::-1][:MAX_BRANCH]:
+            v = int(nbr[k])
+            if v in path:
+                continue
+            path.add(v)
+            best = max(best, 1 + self._pass_through(v, ts[k], amount[k], depth + 1, path))
+            path.discard(v)
+            if best + depth >= MAX_CHAIN:
+                break
+        return best
+
+    # --- Public queries ---
+
+    def fan_out(self, account_no, now=None, window=WINDOW):
+        """Distinct accounts this one sent money to (in the last `window` seconds, or ever if now is None)."""
+        return self._fan(account_no, now, window, outgoing=True)
+
+    def fan_in(self, account_no, now=None, window=WINDOW):
+        return self._fan(account_no, now, window, outgoing=False)
+
+    def _fan(self, account_no, now, window, outgoing):
+        with self._lock:
+            u = self._ids.get(account_no)
+            if u is None:
+                return 0
+            edges = self._out_edges(u) if outgoing else self._in_edges(u)
+            if now is not None:
+                edges = self._window(edges, _ts(now) - window, _ts(now))
+            return len(np.unique(edges[0]))
+
+    def has_edge(self, sender, receiver):
+        with self._lock:
+            u, v = self._ids.get(sender), self._ids.get(receiver)
+            if u is None or v is None:
+                return False
+            return bool((self._out_edges(u)[0] == v).any())
+
+    def cycles_2hop(self, account_no):
+        """Counterparties v with money flowing both ways (u -> v -> u)."""
+        with self._lock:
+            u = self._ids.get(account_no)
+            if u is None:
+                return 0
+            return len(np.intersect1d(self._out_edges(u)[0], self._in_edges(u)[0]))
+
+    def pass_through_depth(self, account_no, amount, now=None):
+        """
+        How many hops of "received about this amount within PASS_THROUGH_WINDOW, then sent it on"
+        lead up to account_no sending `amount` now (0: the money did not just arrive).
+        """
+        now = _ts(now) if now is not None else _now()
+        with self._lock:
+            u = self._ids.get(account_no)
+            if u is None or not amount:
+                return 0
+            return self._pass_through(u, now, float(amount), 0, {u})
+
+    def features(self, sender, receiver=None, amount=None, now=None):
+        """Graph features of a (proposed) transfer; fields are fraud_engine.RULES context inputs."""
+        now = _ts(now) if now is not None else _now()
+        since = now - WINDOW
+        with self._lock:
+            u = self._ids.get(sender)
+            v = self._ids.get(receiver) if receiver is not None else None
+            out = {"sender_fan_in_24h": 0, "sender_fan_out_24h": 0, "sender_cycles": 0, "pass_through_depth": 0}
+            if u is not None:
+                sent, received = self._out_edges(u), self._in_edges(u)
+                out["sender_fan_out_24h"] = len(np.unique(self._window(sent, since, now)[0]))
+                out["sender_fan_in_24h"] = len(np.unique(self._window(received, since, now)[0]))
+                out["sender_cycles"] = len(np.intersect1d(sent[0], received[0]))
+                if amount:
+                    out["pass_through_depth"] = self._pass_through(u, now, float(amount), 0, {u})
+            if receiver is not None:
+                out.update(receiver_fan_in_24h=0, receiver_fan_out_24h=0, receiver_forward_ratio_24h=0.0,
+                           reverse_edge=False)
+                if v is not None:
+                    nbr_in, _, amt_in = self._window(self._in_edges(v), since, now)
+                    nbr_out, _, amt_out = self._window(self._out_edges(v), since, now)
+                    out["receiver_fan_in_24h"] = len(np.unique(nbr_in))
+                    out["receiver_fan_out_24h"] = len(np.unique(nbr_out))
+                    if amt_in.sum() > 0:
+                        out["receiver_forward_ratio_24h"] = round(float(amt_out.sum() / amt_in.sum()), 4)
+                    # receiver already paid the sender: this transfer closes a 2-hop cycle
+                    out["reverse_edge"] = u is not None and bool((self._out_edges(v)[0] == u).any())
+            return out
+
+    def stats(self):
+        with self._lock:
+            csr = (self._out.nbytes() + self._in.nbytes()) if self._out is not None else 0
+            return {"nodes": len(self._names), "edges": self._n, "csr_edges": self._merged,
+                    "delta_edges": self._n - self._merged, "merges": self.merges,
+                    "csr_bytes": csr, "edge_bytes": self._n * 24}
+
+
+def _now():
+    return datetime.now().timestamp()
@@ -1,7 +1,99 @@
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 import data_manager as dm
 import rules as val
-import fraud_engine as fe 
+import fraud_service as fs
+
+# --- Background verification ---
+# "Verify Recipient" ab page ko block nahi karta: recipient lookup aur fraud
+# scoring (step, rule context, model) background threads mein chalte hain.
+# Futures session state mein (sender, receiver, amount) key par rakhe jate
+# hain, is liye dobara click par dobara scoring nahi hoti; PIN gate foran
+# dikhta hai aur score ready hone par alert / status update hota hai.
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="transfer-verify")
+MAX_CHECKS = 20          # cached verifications per session
+SCORE_WAIT = 5.0         # seconds "Send Money" waits for a score still running
+HIGH_RISK = 0.3
+
+def _score_transfer(user, receiver_acc, amt_val, recipient_future):
+    """Runs alongside the lookup: step + rule context first, then the model once the recipient is known."""
+    current_step = dm.get_current_step()
+    context = dm.get_fraud_context(user['account_no'], receiver_acc, amt_val)
+    recipient = recipient_future.result()
+    if not recipient:
+        return None
+    return fs.score(
+        step=current_step,
+        trans_type='TRANSFER',
+        amount=amt_val,
+        oldbalanceOrg=user['balance'],
+        newbalanceOrig=user['balance'] - amt_val,
+        oldbalanceDest=recipient.get('balance', 0),
+        newbalanceDest=recipient.get('balance', 0) + amt_val,
+        context=context
+    )
+
+def _start_check(user, receiver_acc, amt_val):
+    """Lookup + scoring futures for this (sender, receiver, amount), started once per session (amt_val None: no scoring)."""
+    checks = st.session_state.transfer_checks
+    key = (user['account_no'], receiver_acc, amt_val)
+    if key not in checks:
+        recipient = _executor.submit(dm.get_user, account_no=receiver_acc)
+        score = None  # invalid amount: lookup only
+        if amt_val is not None:
+            score = _executor.submit(_score_transfer, dict(user), receiver_acc, amt_val, recipient)
+        checks[key] = {"recipient": recipient, "score": score}
+        while len(checks) > MAX_CHECKS:
+            checks.pop(next(iter(checks)))
+    return key, checks[key]
+
+def _high_risk(score):
+    return score is not None and score[0] and score[1] > HIGH_RISK
+
+def _risk_alert(score):
+    if _high_risk(score):
+        st.warning(f"🚨 Security Alert: High Risk Transaction ({score[1]*100:.1f}%)")
+
+def _score_status(check):
+    """Fraud check status next to the PIN gate."""
+    future = check["score"]
+    if not future.done():
+        st.info("⏳ Security check running... you can enter your PIN meanwhile.")
+        if st.button("🔄 Refresh Status"):
+            st.rerun()
+    elif future.exception() is not None:
+        st.caption("⚠️ Security check unavailable.")
+    else:
+        score = future.result()
+        _risk_alert(score)
+        if score is not None and not _high_risk(score):
+            st.caption("🛡️ Security check complete.")
+
+def _review_before_send(check, key):
+    """
+    True when "Send Money" may go ahead. A score that was still running when Send was
+    clicked, or a high-risk one, stops the click after its result is shown; the next
+    click on Send (PIN checked again) is the explicit confirmation.
+    """
+    if check is None or check["score"] is None or st.session_state.transfer_reviewed == key:
+        return True
+    future = check["score"]
+    late = not future.done()
+    try:
+        score = future.result(timeout=SCORE_WAIT)  # PIN was faster than the check: give it a moment
+    except TimeoutError:
+        st.info("⏳ Security check is still running. Please press Send Money again in a moment.")
+        return False
+    except Exception:
+        return True  # check failed: shown as unavailable, the transfer is not held up
+    if not late and not _high_risk(score):
+        return True
+    _risk_alert(score)
+    if not _high_risk(score):
+        st.caption("🛡️ Security check complete.")
+    st.session_state.transfer_reviewed = key
+    st.warning("Please review the security check above, then press 🚀 Send Money again to confirm.")
+    return False
 
 def show():
     user = st.session_state.get('logged_in_user')
@@ -18,6 +110,12 @@ def show():
         st.session_state.verified_recipient = None
     if 'temp_amount' not in st.session_state:
         st.session_state.temp_amount = 0.0
+    if 'transfer_checks' not in st.session_state:
+        st.session_state.transfer_checks = {}
+    if 'transfer_check_key' not in st.session_state:
+        st.session_state.transfer_check_key = None
+    if 'transfer_reviewed' not in st.session_state:
+        st.session_state.transfer_reviewed = None  # check key whose late / high-risk result was shown at Send
 
     # 1. Input Section
     with st.container(border=True):
@@ -30,35 +128,22 @@ def show():
             elif receiver_acc == user['account_no']:
                 st.error("You cannot transfer to your own account.")
             else:
-                all_users = dm.get_users()
-                recipient = next((u for u in all_users if u['account_no'] == receiver_acc), None)
-                
+                v_amt, m_amt = val.validate_transaction_amount(amount, user['balance'], is_transfer=True)
+                amt_val = float(amount) if v_amt else None
+                # Lookup + scoring start together; only the (in-memory) lookup is waited for here
+                key, check = _start_check(user, receiver_acc, amt_val)
+                recipient = check["recipient"].result()
+
                 if not recipient:
                     st.error("❌ Recipient account not found.")
                     dm.log_activity(user['account_no'], f"Failed transfer attempt to: {receiver_acc}")
+                elif not v_amt:
+                    st.error(m_amt)
                 else:
-                    v_amt, m_amt = val.validate_transaction_amount(amount, user['balance'], is_transfer=True)
-                    if not v_amt:
-                        st.error(m_amt)
-                    else:
-                        current_step = dm.get_current_step()
-                        amt_val = float(amount)
-                        is_fraud, prob_score = fe.predict_fraud(
-                            step=current_step,
-                            trans_type='TRANSFER',
-                            amount=amt_val,
-                            oldbalanceOrg=user['balance'],
-                            newbalanceOrig=user['balance'] - amt_val,
-                            oldbalanceDest=recipient.get('balance', 0),
-                            newbalanceDest=recipient.get('balance', 0) + amt_val
-                        )
-
-                        if is_fraud and prob_score > 0.3:
-                            st.warning(f"🚨 Security Alert: High Risk Transaction ({prob_score*100:.1f}%)")
-                        
-                        st.session_state.verified_recipient = recipient
-                        st.session_state.temp_amount = amt_val
-                        st.success("✅ Recipient Verified. See details below.")
+                    st.session_state.verified_recipient = recipient
+                    st.session_state.temp_amount = amt_val
+                    st.session_state.transfer_check_key = key
+                    st.success("✅ Recipient Verified. See details below.")
 
     # 2. Display Phase (Tabular Form & PIN Gate)
     if st.session_state.verified_recipient:
@@ -78,6 +163,10 @@ def show():
             ]
         })
 
+        check = st.session_state.transfer_checks.get(st.session_state.transfer_check_key)
+        if check is not None:
+            _score_status(check)
+
         pin_confirm = st.text_input("Enter your 4-Digit Security PIN", type="password", max_chars=4)
 
         col1, col2 = st.columns([1, 4])
@@ -93,26 +182,25 @@ def show():
                     st.rerun()
                 elif not is_valid:
                     st.error(f"❌ {msg}")
-                else:
-                    if dm.update_balance(user['account_no'], final_amt, is_deposit=False):
-                        dm.update_balance(target['account_no'], final_amt, is_deposit=True)
-                        
-                        # --- UPDATE: Added category="Transfer" for EDA ---
-                        dm.record_transaction(
-                            "Transfer", 
-                            final_amt, 
-                            user['account_no'], 
-                            receiver_acc=target['account_no'], 
-                            receiver_name=f"{target['f_name']} {target['l_name']}",
-                            category="Transfer" # Ye EDA graph ko help karega
-                        )
-                        
+                elif _review_before_send(check, st.session_state.transfer_check_key):
+                    # Debit, credit aur ledger entry aik hi atomic step mein
+                    ok, t_msg = dm.transfer(
+                        user['account_no'],
+                        target['account_no'],
+                        final_amt,
+                        receiver_name=f"{target['f_name']} {target['l_name']}",
+                        category="Transfer" # Ye EDA graph ko help karega
+                    )
+                    if ok:
                         st.balloons()
                         st.success(f"Successfully transferred Rs. {final_amt} to {target['f_name']}")
                         st.session_state.verified_recipient = None
                         st.session_state.temp_amount = 0.0
+                        st.session_state.transfer_checks = {}  # balances changed: old scores are stale
+                        st.session_state.transfer_check_key = None
+                        st.session_state.transfer_reviewed = None
                     else:
-                        st.error("Transaction Error. Please try again.")
+                        st.error(f"Transaction Error: {t_msg}")
         
         with col2:
             if st.button("❌ Cancel"):
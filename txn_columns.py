@@ -0,0 +1,327 @@
+import os
+import json
+import uuid
+import shutil
+import zlib
+from urllib.parse import quote
+import threading
+import numpy as np
+import pandas as pd
+
+import record_codec
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+# ========================================================
+# Columnar transaction store (per account, per month)
+# ========================================================
+# Ledger ki har line yahan disk par columns mein bhi jati hai: har account ki
+# ek append-only file (fixed-width rows: date, amount aur strings ke codes),
+# rows ledger ke order (yaani waqt ke order) mein. Mahine ki partition us
+# file mein date par binary search se milti hai, is liye since/until wali
+# query sirf apne account ke zaroori mahine parhti hai. (Jis account ki rows
+# date ke order mein na hon, wo unsorted.jsonl mein hai aur poori parhi
+# jati hai.) Files mmap hoti hain; memory mein sirf strings ki dictionary
+# rehti hai.
+#
+# Ledger hi asal source hai, magar ye store usay load nahi karta.
+# watermark.json batata hai ke ledger stream ke kis offset tak ki rows disk
+# par aa chuki hain; query se pehle sirf us ke baad wali rows (ledger ki tail)
+# parh kar likhi jati hain, is liye cold start par bhi poora ledger nahi parhna parta.
+#
+#   data/_txn_columns/strings.jsonl          code -> string (one JSON string per line)
+#   data/_txn_columns/watermark.json         {"rows": n, "offset": o, "last": [offset, seq, date], "store": id}
+#   data/_txn_columns/unsorted.jsonl         accounts whose rows are not in date order (JSON strings)
+#   data/_txn_columns/accounts/xx/<account>.rows
+
+COLUMNS = ["date", "type", "amount", "sender", "receiver_acc", "receiver_name", "status", "category"]
+STRING_COLUMNS = ["type", "sender", "receiver_acc", "receiver_name", "status", "category"]
+# offset: the row's ledger stream offset, so rows written again after a crash are skipped
+ROW_DTYPE = np.dtype([("offset", "<i8"), ("date", "<i8"), ("amount", "<f8")] + [(c, "<i4") for c in STRING_COLUMNS])
+
+STORE_DIR = os.path.join("data", "_txn_columns")
+BATCH_ROWS = 200000     # ledger rows parsed per write while catching up
+NAT = np.iinfo(np.int64).min
+EMPTY_WATERMARK = {"rows": 0, "offset": 0, "last": None, "store": None}
+
+
+def _epoch_seconds(dates):
+    try:   # ledger dates are "YYYY-MM-DD HH:MM:SS": numpy parses those in one C loop
+        return np.array(dates, dtype="datetime64[s]").astype(np.int64)   # None -> NaT == NAT
+    except (ValueError, TypeError):
+        pass
+    ts = pd.to_datetime(pd.Series(dates, dtype=object), errors="coerce")
+    out = ts.to_numpy(dtype="datetime64[s]").astype(np.int64)
+    out[ts.isna().to_numpy()] = NAT
+    return out
+
+
+def _bound(value):
+    return np.datetime64(pd.Timestamp(value), "s").astype(np.int64) if value is not None else None
+
+
+class TxnColumns:
+    """
+    Per-account column files kept up to date from a storage_engine.Ledger's stream.
+    The ledger file stays the single source of truth; this is a derived on-disk layout.
+    """
+
+    def __init__(self, ledger, store_dir=None, batch_rows=None):
+        self.ledger = ledger
+        self.store_dir = store_dir or STORE_DIR
+        self.batch_rows = batch_rows or BATCH_ROWS
+        self._lock = threading.RLock()
+        self._store = None
+        self._forget()
+        self._watermark = self._read_watermark()
+
+    # --- Files ---
+
+    def _path(self, *parts):
+        return os.path.join(self.store_dir, *parts)
+
+    def _account_path(self, account_no):
+        account_no = str(account_no)
+        bucket = zlib.crc32(account_no.encode()) % 256
+        return self._path("accounts", f"{bucket:02x}", quote(account_no, safe="") + ".rows")
+
+    def _read_watermark(self):
+        try:
+            with open(self._path("watermark.json")) as f:
+                wm = json.load(f)
+        except (FileNotFoundError, ValueError):
+            wm = dict(EMPTY_WATERMARK)
+        if wm["store"] != self._store:
+            self._forget()   # store rebuilt (by another process): string codes changed
+            self._store = wm["store"]
+        self._watermark = wm
+        return wm
+
+    def _write_watermark(self, wm):
+        tmp = self._path("watermark.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(wm, f)
+        os.replace(tmp, self._path("watermark.json"))
+        self._watermark = wm
+
+    def _file_lock(self):
+        os.makedirs(self.store_dir, exist_ok=True)
+        f = open(self._path(".lock"), "a")
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return f   # closing it releases the lock
+
+    def _forget(self):
+        self._strings = []          # code -> string, mirrors strings.jsonl
+        self._codes = {}            # string -> code, filled lazily (only writers need it)
+        self._strings_offset = 0
+        self._unsorted = set()      # accounts whose file is not in date order
+        self._unsorted_offset = 0
+        self._string_array = np.array([None], dtype=object)   # code -1 -> None
+
+    def _sync_strings(self):
+        """Picks up strings another process appended since the last call."""
+        path = self._path("strings.jsonl")
+        try:
+            if os.path.getsize(path) == self._strings_offset:
+                return
+            with open(path, "rb") as f:
+                f.seek(self._strings_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        data = data[:data.rfind(b"\n") + 1]   # a torn last line is read next time
+        self._strings.extend(json.loads(b"[" + b",".join(data.splitlines()) + b"]"))   # one parse
+        self._strings_offset += len(data)
+        self._string_array = np.array(self._strings + [None], dtype=object)  # code -1 -> None
+
+    def _sync_unsorted(self):
+        path = self._path("unsorted.jsonl")
+        try:
+            if os.path.getsize(path) == self._unsorted_offset:
+                return
+            with open(path, "rb") as f:
+                f.seek(self._unsorted_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        data = data[:data.rfind(b"\n") + 1]
+        self._unsorted.update(json.loads(line) for line in data.splitlines())
+        self._unsorted_offset += len(data)
+
+    def _mark_unsorted(self, account_no):
+        self._unsorted.add(account_no)
+        with open(self._path("unsorted.jsonl"), "ab") as f:
+            f.write((json.dumps(account_no) + "\n").encode())
+        self._unsorted_offset = os.path.getsize(self._path("unsorted.jsonl"))
+
+    def _code(self, value, new):
+        if value is None:
+            return -1
+        value = str(value)
+        if len(self._codes) < len(self._strings):   # strings synced since the last write
+            known = len(self._codes)
+            self._codes.update(zip(self._strings[known:], range(known, len(self._strings))))
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._strings)
+            self._strings.append(value)
+            new.append(value)
+        return code
+
+    def _wipe(self):
+        """Deletes the column files (under the file lock); they are rebuilt from ledger offset 0."""
+        shutil.rmtree(self._path("accounts"), ignore_errors=True)
+        for name in ("strings.jsonl", "unsorted.jsonl"):
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+        self._forget()
+        self._store = uuid.uuid4().hex
+        self._write_watermark(dict(EMPTY_WATERMARK, store=self._store))
+        return self._watermark
+
+    # --- Catching up with the ledger ---
+
+    def _matches(self, wm):
+        """The ledger still has the last persisted row at the same offset (not replaced / truncated)."""
+        if wm["store"] is None:
+            return False
+        if not wm["offset"]:
+            return True
+        start, seq, date = wm["last"]
+        lines = self.ledger.iter_lines_from(start)
+        try:
+            offset, line = next(lines, (None, b""))
+        finally:
+            lines.close()
+        if offset != start or offset + len(line) + 1 != wm["offset"]:
+            return False
+        try:
+            record = record_codec.decode(line)
+        except ValueError:
+            return False
+        return record.get("seq") == seq and str(record.get("date")) == date
+
+    def catch_up(self):
+        """Writes the ledger rows after the watermark (every row, for a new store) to the account files."""
+        end = self.ledger.end_offset()
+        with self._lock:
+            if end == self._watermark["offset"] and self._watermark["store"] is not None:
+                return
+            lock = self._file_lock()
+            try:
+                wm = self._read_watermark()
+                if not self._matches(wm):
+                    wm = self._wipe()
+                self._sync_strings()
+                self._sync_unsorted()
+                batch = []
+                for offset, line in self.ledger.iter_lines_from(wm["offset"]):
+                    try:
+                        batch.append((offset, len(line) + 1, record_codec.decode(line)))
+                    except ValueError:
+                        continue   # a torn line sealed off by the next append: never a row
+                    if len(batch) >= self.batch_rows:
+                        wm = self._write(batch, wm)
+                        batch = []
+                if batch:
+                    self._write(batch, wm)
+            finally:
+                lock.close()
+
+    def _write(self, batch, wm):
+        """Appends (offset, length, record) rows to their account files, then moves the watermark."""
+        records = [r for _, _, r in batch]
+        new_strings = []
+        table = np.empty(len(records), dtype=ROW_DTYPE)
+        table["offset"] = [o for o, _, _ in batch]
+        table["date"] = _epoch_seconds([r.get("date") for r in records])
+        table["amount"] = [np.nan if r.get("amount") is None else float(r["amount"]) for r in records]
+        for c in STRING_COLUMNS:
+            table[c] = [self._code(r.get(c), new_strings) for r in records]
+        by_account = {}
+        for i, r in enumerate(records):
+            for acc in {r.get("sender"), r.get("receiver_acc")}:
+                if acc is not None:
+                    by_account.setdefault(str(acc), []).append(i)
+        if new_strings:  # strings reach the disk before any row that uses their codes
+            with open(self._path("strings.jsonl"), "ab") as f:
+                f.write("".join(json.dumps(v) + "\n" for v in new_strings).encode())
+            self._strings_offset = os.path.getsize(self._path("strings.jsonl"))
+            self._string_array = np.array(self._strings + [None], dtype=object)
+        for acc, idx in by_account.items():
+            out = table[idx]
+            path = self._account_path(acc)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a+b") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size % ROW_DTYPE.itemsize:
+                    size = f.truncate(size - size % ROW_DTYPE.itemsize)   # row torn by a crash
+                dates = out["date"]
+                if size:
+                    f.seek(size - ROW_DTYPE.itemsize)
+                    previous = np.frombuffer(f.read(ROW_DTYPE.itemsize), dtype=ROW_DTYPE)[0]
+                    out = out[out["offset"] > previous["offset"]]   # written before a crash
+                    dates = np.concatenate([[previous["date"]], out["date"]])
+                if acc not in self._unsorted and (dates[1:] < dates[:-1]).any():
+                    self._mark_unsorted(acc)
+                out.tofile(f)
+        offset, length, record = batch[-1]
+        wm = {"rows": wm["rows"] + len(batch), "offset": offset + length,
+              "last": [offset, record.get("seq"), str(record.get("date"))], "store": self._store}
+        self._write_watermark(wm)
+        return wm
+
+    # --- Reading ---
+
+    def _file_rows(self, account_no):
+        self._sync_strings()
+        path = self._account_path(account_no)
+        try:
+            n = os.path.getsize(path) // ROW_DTYPE.itemsize
+        except FileNotFoundError:
+            return np.empty(0, dtype=ROW_DTYPE)
+        if n == 0:
+            return np.empty(0, dtype=ROW_DTYPE)
+        return np.memmap(path, dtype=ROW_DTYPE, mode="r", shape=(n,))
+
+    def query(self, account_no, since=None, until=None, types=None):
+        """
+        Rows for one account as a DataFrame (ledger order). since/until: date strings or
+        datetimes (inclusive); types: iterable of 'type' values. Only the account's file is
+        read, and with since/until only its rows of those months (binary search on date).
+        """
+        since, until = _bound(since), _bound(until)
+        self.catch_up()
+        with self._lock:
+            rows = self._file_rows(account_no)
+            self._sync_unsorted()
+            unsorted = str(account_no) in self._unsorted
+            strings = self._string_array
+
+        if len(rows) and (since is not None or until is not None) and not unsorted:
+            # Date-ordered file: only the rows of the requested months are read
+            dates = rows["date"]
+            lo = np.searchsorted(dates, since, "left") if since is not None else 0
+            hi = np.searchsorted(dates, until, "right") if until is not None else len(rows)
+            rows = rows[lo:hi]
+        rows = np.asarray(rows)
+        mask = None
+        if since is not None:
+            mask = rows["date"] >= since
+        if until is not None:
+            m = rows["date"] <= until
+            mask = m if mask is None else mask & m
+        if types is not None:
+            m = np.isin(strings[rows["type"]], list(types))
+            mask = m if mask is None else mask & m
+        if mask is not None:
+            rows = rows[mask]
+        cols = {c: strings[rows[c]] for c in STRING_COLUMNS}
+        cols["amount"] = rows["amount"]
+        cols["date"] = rows["date"].astype("datetime64[s]")
+        cols["date"][rows["date"] == NAT] = np.datetime64("NaT")
+        return pd.DataFrame(cols, columns=COLUMNS, copy=False)
@@ -1,36 +1,11 @@
 import streamlit as st
-import cv2
-import numpy as np
-import os
-from PIL import Image
 import data_manager as dm
+import face_store
+import face_preprocess
+import face_detect
+import face_samples
 import time
 
-def train_specific_user(face_id, account_no):
-    """Specific user ke folder se FRESH training karta hai (Zero Memory Strategy)."""
-    recognizer = cv2.face.LBPHFaceRecognizer_create()
-    path = f"data/{account_no}"
-    
-    if not os.path.exists(path) or len(os.listdir(path)) == 0:
-        return None
-
-    face_samples = []
-    ids = []
-    
-    try:
-        for img_name in os.listdir(path):
-            img_path = os.path.join(path, img_name)
-            gray_img = Image.open(img_path).convert('L')
-            img_numpy = np.array(gray_img, 'uint8')
-            
-            face_samples.append(img_numpy)
-            ids.append(int(face_id))
-            
-        recognizer.train(face_samples, np.array(ids))
-        return recognizer
-    except:
-        return None
-
 def show():
     st.header("🛡️ Biometric Identity Verification")
     st.write("Scan your face to unlock your secure banking dashboard.")
@@ -58,33 +33,26 @@ def show():
             st.rerun()
 
         if img_file_buffer:
-            # 1. Training for security (Aapka original logic)
-            with st.spinner(f"Refreshing Biometric Model for {user['account_no']}..."):
-                recognizer = train_specific_user(user['face_id'], user['account_no'])
+            # 1. Stored biometric model (trained once per enrollment, see face_store.py)
+            with st.spinner(f"Loading Biometric Model for {user['account_no']}..."):
+                matcher = face_store.get_templates(user['face_id'], user['account_no'])
             
-            if recognizer is None:
+            if matcher is None:
                 st.error("🚨 Error: Biometric data not found!")
                 return
 
             # Image processing
-            bytes_data = img_file_buffer.getvalue()
-            cv2_img = cv2.imdecode(np.frombuffer(bytes_data, np.uint8), cv2.IMREAD_COLOR)
-            gray = cv2.cvtColor(cv2_img, cv2.COLOR_BGR2GRAY)
+            gray = face_preprocess.to_gray(img_file_buffer)
             
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-            faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+            # ✅ SECURITY LAYER 1: Size check (MIN_FACE se chhote chehre detector hi reject karta hai)
+            faces = face_detect.detect_faces(gray)
 
             if len(faces) == 0:
-                st.warning("No face detected. Please adjust your lighting and try again.")
+                st.warning("No face detected (or face too far/small). Please adjust your lighting and try again.")
             
             for (x, y, w, h) in faces:
-                # ✅ SECURITY LAYER 1: Size check
-                if w < 80 or h < 80:
-                    st.error("Face too far or small!")
-                    continue
-
                 # Prediction
-                detected_id, confidence = recognizer.predict(gray[y:y+h, x:x+w])
+                detected_id, confidence = matcher.predict(face_samples.crop(gray, (x, y, w, h)))
                 
                 # ✅ SECURITY LAYER 2 & 3: Strict confidence logic (Aapka logic)
                 if detected_id == int(user['face_id']) and confidence < 35:
@@ -100,4 +68,4 @@ def show():
                 else:
                     st.warning("Face not recognized clearly. Try again.")
 
-    st.caption("⚠️ Your biometric data is trained on-the-fly and wiped after session verification.")
\ No newline at end of file
+    st.caption("⚠️ Your biometric model is built once from your enrollment samples and retrained only if they change.")
\ No newline at end of file